@@ -1,6 +1,9 @@
+import logging
 import os
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
+from kombu import Queue
 
 # Set the default Django settings module
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "TemplateService.settings")
@@ -15,6 +18,49 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
+# Task queues: single renders must not wait behind a bulk job or a long
+# cleanup, so each kind of work has its own queue and its own workers.
+# Worker concurrency and prefetch are per-process options and are set per
+# queue on the worker command lines in the Procfile.
+INTERACTIVE_QUEUE = "interactive"
+BULK_QUEUE = "bulk"
+MAINTENANCE_QUEUE = "maintenance"
+
+app.conf.task_queues = (
+    Queue(INTERACTIVE_QUEUE),
+    Queue(BULK_QUEUE),
+    Queue(MAINTENANCE_QUEUE),
+)
+app.conf.task_default_queue = INTERACTIVE_QUEUE
+
+TASK_QUEUES = {
+    "notification_templates.tasks.render_template_async": INTERACTIVE_QUEUE,
+    "notification_templates.tasks.bulk_render_templates": BULK_QUEUE,
+    "notification_templates.tasks.ingest_bulk_render_file": BULK_QUEUE,
+    "notification_templates.tasks.render_bulk_chunk": BULK_QUEUE,
+    "notification_templates.tasks.aggregate_bulk_render": BULK_QUEUE,
+    "notification_templates.tasks.warm_template_cache": MAINTENANCE_QUEUE,
+    "notification_templates.tasks.update_template_cache_for_template": MAINTENANCE_QUEUE,
+    "notification_templates.tasks.cleanup_old_render_logs": MAINTENANCE_QUEUE,
+    "notification_templates.tasks.cleanup_render_stats": MAINTENANCE_QUEUE,
+    "notification_templates.tasks.cleanup_bulk_render_jobs": MAINTENANCE_QUEUE,
+    "notification_templates.tasks.create_render_log_partitions": MAINTENANCE_QUEUE,
+    "notification_templates.tasks.health_check": MAINTENANCE_QUEUE,
+}
+app.conf.task_routes = {task: {"queue": queue} for task, queue in TASK_QUEUES.items()}
+
+# Rate limits applied to every task of a queue (per task type and worker);
+# interactive renders are never throttled
+QUEUE_RATE_LIMITS = {
+    BULK_QUEUE: "20/s",
+    MAINTENANCE_QUEUE: "30/m",
+}
+app.conf.task_annotations = {
+    task: {"rate_limit": QUEUE_RATE_LIMITS[queue]}
+    for task, queue in TASK_QUEUES.items()
+    if queue in QUEUE_RATE_LIMITS
+}
+
 # Celery Beat Schedule
 app.conf.beat_schedule = {
     "warm-template-cache-every-30-minutes": {
@@ -29,6 +75,18 @@ app.conf.beat_schedule = {
         "schedule": 86400.0,  # 24 hours in seconds
         "kwargs": {"days": 30},  # Keep logs for 30 days
     },
+    "cleanup-bulk-render-jobs-daily": {
+        "task": "notification_templates.tasks.cleanup_bulk_render_jobs",
+        "schedule": 86400.0,  # 24 hours in seconds
+    },
+    "cleanup-render-stats-daily": {
+        "task": "notification_templates.tasks.cleanup_render_stats",
+        "schedule": 86400.0,  # 24 hours in seconds
+    },
+    "create-render-log-partitions-every-6-hours": {
+        "task": "notification_templates.tasks.create_render_log_partitions",
+        "schedule": 21600.0,  # 6 hours in seconds
+    },
     "health-check-hourly": {
         "task": "notification_templates.tasks.health_check",
         "schedule": 3600.0,  # 1 hour in seconds
@@ -37,6 +95,43 @@ app.conf.beat_schedule = {
 
 app.conf.timezone = "UTC"
 
+logger = logging.getLogger(__name__)
+
+
+def preload_templates(**kwargs):
+    """Compile active templates in each new worker process before it takes tasks."""
+    from django.conf import settings
+
+    from notification_templates.services import TemplateService
+
+    if not getattr(settings, "TEMPLATE_WORKER_PRELOAD", True):
+        return
+    try:
+        stats = TemplateService.preload_templates()
+    except Exception as e:
+        logger.warning(f"Template preload failed in process {os.getpid()}: {str(e)}")
+        return
+
+    memory = "RSS unavailable"
+    if stats["rss_bytes"] is not None:
+        memory = (
+            f"RSS {stats['rss_bytes'] / 1048576:.1f} MiB "
+            f"(+{stats['rss_growth_bytes'] / 1048576:.1f} MiB)"
+        )
+    logger.info(
+        f"Preloaded {stats['templates_compiled']} templates in process {os.getpid()} "
+        f"in {stats['seconds']}s ({stats['templates_failed']} failed): "
+        f"{stats['compiled_cache_bytes'] / 1024:.1f} KiB of template source compiled, {memory}"
+    )
+
+
+@worker_init.connect
+def register_template_preload(**kwargs):
+    # Connected once the worker starts rather than at import, so it runs after
+    # Celery's Django fixup has dropped the DB and cache connections a child
+    # process inherits from its parent
+    worker_process_init.connect(preload_templates, weak=False)
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
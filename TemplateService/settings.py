@@ -210,6 +210,121 @@ LOGGING = {
 # Cache time to live is 30 minutes (for templates)
 CACHE_TTL = 60 * 30
 
+# Process-local cache of compiled templates, bounded by entries and source bytes
+TEMPLATE_COMPILED_CACHE_MAX_ENTRIES = 500
+TEMPLATE_COMPILED_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Celery worker processes compile active templates into that cache when
+# they start (see TemplateService/celery.py)
+TEMPLATE_WORKER_PRELOAD = config("TEMPLATE_WORKER_PRELOAD", default=True, cast=bool)
+
+# Lookups for missing templates are cached this long
+TEMPLATE_NEGATIVE_CACHE_TTL = 30
+# Single-flight loading: how long a loader holds the per-key lock and how
+# long concurrent callers wait for its result before querying themselves
+TEMPLATE_LOAD_LOCK_TIMEOUT = 10
+TEMPLATE_LOAD_WAIT_TIMEOUT = 2
+
+# Render counters used to pick templates for cache warmup: buffered in
+# process, flushed to time-bucketed Redis sorted sets
+TEMPLATE_USAGE_BUCKET_SECONDS = 300
+TEMPLATE_USAGE_RETENTION_SECONDS = 24 * 60 * 60
+TEMPLATE_USAGE_FLUSH_EVERY = 100
+TEMPLATE_USAGE_FLUSH_INTERVAL = 5
+# Warm the top K templates by renders over the last window (seconds)
+TEMPLATE_WARMUP_TOP_K = 50
+TEMPLATE_WARMUP_WINDOW = 60 * 60
+
+# In-process L1 in front of the Django cache for template lookups. The TTL
+# bounds staleness if a Redis pub/sub invalidation is missed.
+TEMPLATE_L1_CACHE_MAX_ENTRIES = 200
+TEMPLATE_L1_CACHE_TTL = 5
+
+# Cached template snapshots at least this large are zlib-compressed
+TEMPLATE_SNAPSHOT_COMPRESS_MIN_BYTES = 2048
+
+# Process-local memoization of rendered output for identical contexts
+TEMPLATE_RESULT_CACHE_TTL = 300
+TEMPLATE_RESULT_CACHE_MAX_ENTRIES = 1000
+TEMPLATE_RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Jinja2 bytecode cache: always in memory, optionally persisted to a directory
+TEMPLATE_JINJA2_BYTECODE_CACHE_MAX_ENTRIES = 1000
+TEMPLATE_JINJA2_BYTECODE_CACHE_DIR = config(
+    "TEMPLATE_JINJA2_BYTECODE_CACHE_DIR", default=None
+)
+
+# Maximum number of contexts accepted by the synchronous render-batch endpoint
+TEMPLATE_RENDER_BATCH_MAX_SIZE = 1000
+# Maximum number of contexts accepted when render-batch streams NDJSON
+TEMPLATE_RENDER_STREAM_MAX_SIZE = 50000
+# Rows per INSERT when render logs are written in bulk
+TEMPLATE_RENDER_LOG_BATCH_SIZE = 500
+# Items per render_bulk_chunk task when bulk_render_templates fans out
+TEMPLATE_BULK_RENDER_CHUNK_SIZE = 500
+# Bulk render file uploads are spooled here until a worker has read them; web
+# and bulk workers must share this directory. While a file is read at most
+# INGEST_MAX_BUFFERED rows wait in per-template buffers before being sent
+TEMPLATE_BULK_UPLOAD_DIR = config(
+    "TEMPLATE_BULK_UPLOAD_DIR", default=str(BASE_DIR / "spool" / "bulk_uploads")
+)
+TEMPLATE_BULK_INGEST_MAX_BUFFERED = 5000
+# Bulk render job results: page size of /bulk-jobs/{id}/results/ and days
+# jobs and their results are kept
+TEMPLATE_BULK_RESULT_PAGE_SIZE = 100
+TEMPLATE_BULK_RESULT_MAX_PAGE_SIZE = 1000
+TEMPLATE_BULK_JOB_RETENTION_DAYS = 7
+# /tasks/{id}/status/?wait= long-poll: longest wait honoured (seconds) and
+# how often the result backend is re-read while waiting. A waiting request
+# holds its worker, so keep the cap small under sync gunicorn workers and
+# only raise it with gthread/gevent workers
+TEMPLATE_TASK_STATUS_MAX_WAIT = config(
+    "TEMPLATE_TASK_STATUS_MAX_WAIT", default=5, cast=float
+)
+TEMPLATE_TASK_STATUS_POLL_INTERVAL = 0.5
+# render-async dedup: a request with an idempotency_key returns the task of
+# the first request with that key for IDEMPOTENCY_TTL seconds; without one,
+# identical requests (template, context, requester) are collapsed for
+# DEDUP_TTL seconds (0 disables the automatic key)
+TEMPLATE_RENDER_IDEMPOTENCY_TTL = 86400
+TEMPLATE_RENDER_DEDUP_TTL = 60
+# Render logs are written behind the response by a per-process background
+# flusher: at most BUFFER_SIZE queued records, flushed every FLUSH_INTERVAL
+# seconds or once BATCH_SIZE are queued. OVERFLOW is "drop" or "sync"
+TEMPLATE_RENDER_LOG_WRITE_BEHIND = config(
+    "TEMPLATE_RENDER_LOG_WRITE_BEHIND", default=True, cast=bool
+)
+TEMPLATE_RENDER_LOG_BUFFER_SIZE = 10000
+TEMPLATE_RENDER_LOG_FLUSH_INTERVAL = 1.0
+TEMPLATE_RENDER_LOG_OVERFLOW = "drop"
+# Defaults for templates without their own log policy: fraction of successful
+# renders written to the render log (failures are always logged) and whether
+# the body is stored in "full" or only as its "hash" and length
+TEMPLATE_RENDER_LOG_SAMPLE_RATE = config(
+    "TEMPLATE_RENDER_LOG_SAMPLE_RATE", default=1.0, cast=float
+)
+TEMPLATE_RENDER_LOG_BODY_MODE = config("TEMPLATE_RENDER_LOG_BODY_MODE", default="full")
+# Keyset page size for the render log listing (?page_size= up to the max)
+TEMPLATE_RENDER_LOG_PAGE_SIZE = 50
+TEMPLATE_RENDER_LOG_MAX_PAGE_SIZE = 500
+# Rows fetched per server-side cursor round trip by render log exports
+TEMPLATE_RENDER_LOG_EXPORT_CHUNK_SIZE = 2000
+# PostgreSQL render log partitioning: one partition per "day" or "week",
+# created this many periods ahead; expired partitions are dropped unless
+# DETACH_ONLY keeps them around for archiving. Other backends (and rows in
+# the default partition) are expired with chunked deletes of this size
+TEMPLATE_RENDER_LOG_PARTITION_INTERVAL = "day"
+TEMPLATE_RENDER_LOG_PARTITIONS_AHEAD = 7
+TEMPLATE_RENDER_LOG_DETACH_ONLY = False
+TEMPLATE_RENDER_LOG_DELETE_BATCH_SIZE = 1000
+# Days of per-template render stat buckets kept, by bucket size
+TEMPLATE_RENDER_STATS_MINUTE_RETENTION_DAYS = 2
+TEMPLATE_RENDER_STATS_HOUR_RETENTION_DAYS = 90
+# Without write-behind, render stats are upserted from the rendering thread
+# once this many renders are pending or this many seconds after the last write
+TEMPLATE_RENDER_STATS_FLUSH_EVERY = 100
+TEMPLATE_RENDER_STATS_FLUSH_INTERVAL = 5.0
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,6 +1,12 @@
 from django.contrib import admin
 
-from .models import NotificationTemplate, TemplateContent, TemplateRenderLog
+from .models import (
+    BulkRenderJob,
+    NotificationTemplate,
+    TemplateContent,
+    TemplateRenderLog,
+    TemplateRenderStat,
+)
 
 
 @admin.register(NotificationTemplate)
@@ -22,7 +28,7 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
 class TemplateContentAdmin(admin.ModelAdmin):
     list_display = ["template", "created_at"]
     list_filter = ["created_at"]
-    readonly_fields = ["id", "created_at", "extracted_variables"]
+    readonly_fields = ["id", "created_at", "extracted_variables", "compiled_segments"]
 
 
 @admin.register(TemplateRenderLog)
@@ -31,3 +37,24 @@ class TemplateRenderLogAdmin(admin.ModelAdmin):
     list_filter = ["success", "created_at"]
     search_fields = ["template__name", "requested_by"]
     readonly_fields = ["id", "created_at"]
+
+
+@admin.register(TemplateRenderStat)
+class TemplateRenderStatAdmin(admin.ModelAdmin):
+    list_display = [
+        "template",
+        "period",
+        "bucket_start",
+        "render_count",
+        "failure_count",
+        "latency_max_ms",
+    ]
+    list_filter = ["period", "bucket_start"]
+    search_fields = ["template__name"]
+
+
+@admin.register(BulkRenderJob)
+class BulkRenderJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "status", "total", "processed", "failed", "created_at"]
+    list_filter = ["status", "created_at"]
+    readonly_fields = ["id", "task_id", "created_at", "updated_at", "completed_at"]
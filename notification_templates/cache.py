@@ -0,0 +1,579 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Thread-safe, process-local LRU bounded by entry count, total size and age."""
+
+    def __init__(self, name, max_entries=500, max_bytes=None, ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            expired = entry is not None and entry[2] is not None
+            if expired and entry[2] <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, size=0):
+        """Store value under key, evicting least recently used entries as needed."""
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.debug(f"Not caching {key} in {self.name}: {size} bytes exceeds limit")
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove a single key; return whether it was present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[1]
+            return True
+
+    def delete_matching(self, predicate):
+        """Remove every entry whose key satisfies predicate; return how many."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[1]
+        return len(keys)
+
+    def clear(self):
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return a snapshot of size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def context_hash(context):
+    """Return a canonical SHA-256 of a render context, or None if it is not JSON-serializable."""
+    try:
+        payload = json.dumps(
+            context, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TemplateCacheKeys:
+    """
+    Single source of template cache keys.
+
+    Shared-cache keys carry a per-template generation counter stored in the
+    Django cache. Invalidation is one atomic ``incr`` of that counter: every
+    earlier key becomes unreachable at once, and a reader that fetched a
+    generation before the bump writes its (possibly stale) result to a dead
+    key. Process-local caches use the generation-free base key.
+    """
+
+    @staticmethod
+    def base(name, language="en", template_type="email"):
+        return f"template:{name}:{language}:{template_type}"
+
+    @staticmethod
+    def parse(base_key):
+        """Split a base key back into (name, language, template_type)."""
+        _, name, language, template_type = base_key.split(":", 3)
+        return name, language, template_type
+
+    @staticmethod
+    def idempotency(requested_by, key):
+        """Key holding the task id of the first render-async with this idempotency key."""
+        digest = hashlib.sha256(f"{requested_by or ''}:{key}".encode("utf-8")).hexdigest()
+        return f"render_async:idempotency:{digest}"
+
+    @staticmethod
+    def generation_key(base_key):
+        return f"{base_key}:generation"
+
+    @staticmethod
+    def versioned(base_key, generation):
+        return f"{base_key}:g{generation}"
+
+    @staticmethod
+    def _initial_generation():
+        # Time-based so an evicted counter never restarts below old generations
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def generation(base_key):
+        """Return the current generation for base_key, initializing it if needed."""
+        generation_key = TemplateCacheKeys.generation_key(base_key)
+        generation = cache.get(generation_key)
+        if generation is None:
+            cache.add(generation_key, TemplateCacheKeys._initial_generation(), None)
+            generation = cache.get(generation_key)
+        return generation
+
+    @staticmethod
+    def generations(base_keys):
+        """Return {base_key: generation} for many keys with one cache round trip."""
+        generation_keys = {
+            TemplateCacheKeys.generation_key(base_key): base_key for base_key in base_keys
+        }
+        found = cache.get_many(list(generation_keys))
+        generations = {}
+        for generation_key, base_key in generation_keys.items():
+            generation = found.get(generation_key)
+            if generation is None:
+                generation = TemplateCacheKeys.generation(base_key)
+            generations[base_key] = generation
+        return generations
+
+    @staticmethod
+    def bump(base_key):
+        """Atomically move base_key to a new generation, orphaning all cached entries."""
+        generation_key = TemplateCacheKeys.generation_key(base_key)
+        try:
+            return cache.incr(generation_key)
+        except ValueError:
+            cache.add(generation_key, TemplateCacheKeys._initial_generation(), None)
+            return cache.incr(generation_key)
+
+
+# Compiled subject/body templates keyed by TemplateSnapshot.cache_key().
+compiled_templates = LRUCache(
+    "compiled_templates",
+    max_entries=getattr(settings, "TEMPLATE_COMPILED_CACHE_MAX_ENTRIES", 500),
+    max_bytes=getattr(settings, "TEMPLATE_COMPILED_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+)
+
+# Rendered subject/body keyed by TemplateSnapshot.cache_key() and context hash.
+rendered_results = LRUCache(
+    "rendered_results",
+    max_entries=getattr(settings, "TEMPLATE_RESULT_CACHE_MAX_ENTRIES", 1000),
+    max_bytes=getattr(settings, "TEMPLATE_RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+    ttl=getattr(settings, "TEMPLATE_RESULT_CACHE_TTL", 300),
+)
+
+# L1 in front of the Django cache, keyed by TemplateCacheKeys.base().
+# The short TTL bounds how long a process can serve a deactivated version
+# if an invalidation broadcast is missed.
+template_l1 = LRUCache(
+    "template_l1",
+    max_entries=getattr(settings, "TEMPLATE_L1_CACHE_MAX_ENTRIES", 200),
+    ttl=getattr(settings, "TEMPLATE_L1_CACHE_TTL", 5),
+)
+
+INVALIDATION_CHANNEL = "notification_templates:invalidate"
+
+# Marks a lookup key whose template does not exist: NEGATIVE_ENTRY in the
+# Django cache, TEMPLATE_MISSING in the L1.
+NEGATIVE_ENTRY = b"\x00"
+TEMPLATE_MISSING = object()
+
+
+def invalidate_local_template_caches(template_ids=(), keys=()):
+    """Drop this process's cached entries for the given template ids and lookup keys."""
+    template_ids = {str(template_id) for template_id in template_ids}
+    removed = 0
+    if template_ids:
+        removed += compiled_templates.delete_matching(lambda key: key[0] in template_ids)
+        removed += rendered_results.delete_matching(lambda key: key[0] in template_ids)
+    for key in keys:
+        removed += template_l1.delete(key)
+    if removed:
+        logger.info(f"Invalidated {removed} local template cache entries")
+    return removed
+
+
+def broadcast_invalidation(template_ids=(), keys=()):
+    """Invalidate local caches and tell every other process to do the same."""
+    template_ids = [str(template_id) for template_id in template_ids]
+    keys = list(keys)
+    invalidate_local_template_caches(template_ids, keys)
+
+    connection = _get_redis_connection()
+    if connection is None:
+        return
+    message = json.dumps(
+        {"origin": _listener.origin, "template_ids": template_ids, "keys": keys}
+    )
+    try:
+        connection.publish(INVALIDATION_CHANNEL, message)
+    except Exception as e:
+        logger.warning(f"Failed to publish template invalidation: {str(e)}")
+
+
+def _get_redis_connection():
+    """Return the raw Redis client behind the default cache, or None if it is not Redis."""
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
+    except Exception as e:
+        logger.warning(f"Redis connection unavailable: {str(e)}")
+        return None
+
+
+class InvalidationListener:
+    """
+    Background subscriber applying invalidations published by other processes.
+
+    Started lazily and once per process id, so pre-forked web and Celery
+    workers each get their own thread after forking.
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+        self.origin = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.origin = f"{self._pid}:{uuid.uuid4().hex}"
+            if _get_redis_connection() is None:
+                return
+            thread = threading.Thread(
+                target=self._run, name="template-invalidation-listener", daemon=True
+            )
+            thread.start()
+            logger.info(f"Started template invalidation listener ({self.origin})")
+
+    def _run(self):
+        backoff = 1
+        while True:
+            try:
+                pubsub = _get_redis_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                backoff = 1
+                for message in pubsub.listen():
+                    self._handle(message)
+            except Exception as e:
+                logger.warning(f"Template invalidation listener error: {str(e)}")
+                # Anything published while disconnected is covered by the L1 TTL
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _handle(self, message):
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.origin:
+            return
+        invalidate_local_template_caches(
+            payload.get("template_ids", []), payload.get("keys", [])
+        )
+
+
+_listener = InvalidationListener()
+
+
+def start_invalidation_listener():
+    """Subscribe this process to template invalidation broadcasts."""
+    _listener.ensure_started()
+
+
+class SingleFlight:
+    """
+    Lets only one caller per key run an expensive loader at a time.
+
+    Threads in a process share one in-flight Future per key: the first
+    caller registers it under a striped lock and loads, the others wait on
+    it without holding any lock, so unrelated keys on the same stripe never
+    queue behind a slow load. Processes coordinate through an ``add`` (SET
+    NX) lock in the Django cache. Callers that lose that race poll the cache
+    for the winner's result and only fall back to loading themselves if it
+    does not show up in time.
+    """
+
+    def __init__(self, stripes=64, lock_timeout=10, wait_timeout=2, poll_interval=0.05):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._in_flight = {}
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def run(self, key, lookup, loader):
+        """Return lookup() if it finds a value, otherwise the result of loader()."""
+        stripe = self._locks[hash(key) % len(self._locks)]
+        with stripe:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = Future()
+
+        if not leader:
+            try:
+                return flight.result(timeout=self.lock_timeout)
+            except Exception:
+                # The loading thread failed or stalled; try on our own
+                value = lookup()
+                return value if value is not None else loader()
+
+        try:
+            value = self._load(key, lookup, loader)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            with stripe:
+                del self._in_flight[key]
+
+    def _load(self, key, lookup, loader):
+        value = lookup()
+        if value is not None:
+            return value
+
+        lock_key = f"{key}:lock"
+        acquired = cache.add(lock_key, os.getpid(), self.lock_timeout)
+        if not acquired:
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                value = lookup()
+                if value is not None:
+                    return value
+            logger.warning(f"Timed out waiting for concurrent load of {key}")
+
+        try:
+            return loader()
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+
+template_loads = SingleFlight(
+    lock_timeout=getattr(settings, "TEMPLATE_LOAD_LOCK_TIMEOUT", 10),
+    wait_timeout=getattr(settings, "TEMPLATE_LOAD_WAIT_TIMEOUT", 2),
+)
+
+
+class BufferedCounter:
+    """
+    Base for cheap, in-process buffered counters flushed to Redis.
+
+    Increments are buffered and flushed every ``flush_every`` counts or
+    ``flush_interval`` seconds with one pipelined round trip. Subclasses
+    implement ``_write_redis`` and ``_write_local``; the latter keeps counts
+    in process when there is no Redis, which is only useful for
+    single-process setups and tests.
+    """
+
+    def __init__(self, flush_every=100, flush_interval=5):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _add(self, key, count=1):
+        if count <= 0:
+            return
+        with self._lock:
+            self._pending[key] += count
+            self._pending_total += count
+            due = (
+                self._pending_total >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered counts."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        connection = _get_redis_connection()
+        if connection is None:
+            with self._lock:
+                self._write_local(pending)
+            return
+
+        try:
+            pipeline = connection.pipeline(transaction=False)
+            self._write_redis(pipeline, pending)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Failed to flush {type(self).__name__}: {str(e)}")
+
+    def clear(self):
+        """Drop buffered and locally kept counts (Redis keys expire on their own)."""
+        with self._lock:
+            self._pending = Counter()
+            self._pending_total = 0
+            self._clear_local()
+
+    def _write_redis(self, pipeline, pending):
+        raise NotImplementedError
+
+    def _write_local(self, pending):
+        raise NotImplementedError
+
+    def _clear_local(self):
+        raise NotImplementedError
+
+
+class TemplateUsageCounter(BufferedCounter):
+    """
+    Per-template render counter used to pick templates for cache warmup.
+
+    Counts are flushed into time-bucketed Redis sorted sets of
+    ``bucket_seconds`` each, kept for ``retention_seconds``.
+    """
+
+    KEY_PREFIX = "notification_templates:usage"
+
+    def __init__(
+        self, bucket_seconds=300, retention_seconds=86400, flush_every=100, flush_interval=5
+    ):
+        super().__init__(flush_every, flush_interval)
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self._local_buckets = {}
+
+    def _bucket(self, timestamp):
+        return int(timestamp // self.bucket_seconds) * self.bucket_seconds
+
+    def _bucket_key(self, bucket):
+        return f"{self.KEY_PREFIX}:{bucket}"
+
+    def incr(self, base_key, count=1):
+        """Count renders of a template; flushes when the buffer is due."""
+        self._add(base_key, count)
+
+    def _write_redis(self, pipeline, pending):
+        bucket_key = self._bucket_key(self._bucket(time.time()))
+        for base_key, count in pending.items():
+            pipeline.zincrby(bucket_key, count, base_key)
+        pipeline.expire(bucket_key, self.retention_seconds + self.bucket_seconds)
+
+    def _write_local(self, pending):
+        self._local_buckets.setdefault(self._bucket(time.time()), Counter()).update(
+            pending
+        )
+        oldest = self._bucket(time.time() - self.retention_seconds)
+        for old in [b for b in self._local_buckets if b < oldest]:
+            del self._local_buckets[old]
+
+    def _clear_local(self):
+        self._local_buckets.clear()
+
+    def _counts(self, since):
+        """Sum counts per base key over all buckets starting at or after since."""
+        buckets = range(self._bucket(since), self._bucket(time.time()) + 1, self.bucket_seconds)
+        totals = Counter()
+        connection = _get_redis_connection()
+        if connection is None:
+            with self._lock:
+                for bucket in buckets:
+                    totals.update(self._local_buckets.get(bucket, {}))
+            return totals
+
+        try:
+            pipeline = connection.pipeline(transaction=False)
+            for bucket in buckets:
+                pipeline.zrange(self._bucket_key(bucket), 0, -1, withscores=True)
+            results = pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read template usage counters: {str(e)}")
+            return totals
+
+        for members in results:
+            for member, score in members:
+                if isinstance(member, bytes):
+                    member = member.decode("utf-8")
+                totals[member] += int(score)
+        return totals
+
+    def top(self, limit, window_seconds):
+        """Return up to limit base keys ordered by renders in the last window_seconds."""
+        counts = self._counts(time.time() - window_seconds)
+        return [base_key for base_key, _ in counts.most_common(limit)]
+
+    def counts_since(self, base_keys, since):
+        """Return {base_key: renders since the given unix timestamp}."""
+        counts = self._counts(since)
+        return {base_key: counts.get(base_key, 0) for base_key in base_keys}
+
+
+template_usage = TemplateUsageCounter(
+    bucket_seconds=getattr(settings, "TEMPLATE_USAGE_BUCKET_SECONDS", 300),
+    retention_seconds=getattr(settings, "TEMPLATE_USAGE_RETENTION_SECONDS", 86400),
+    flush_every=getattr(settings, "TEMPLATE_USAGE_FLUSH_EVERY", 100),
+    flush_interval=getattr(settings, "TEMPLATE_USAGE_FLUSH_INTERVAL", 5),
+)
@@ -0,0 +1,177 @@
+import csv
+import datetime
+import json
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import TemplateRenderLog
+
+
+class RenderLogExport:
+    """
+    Stream render logs as JSONL or CSV, optionally gzip-compressed.
+
+    Rows are read with ``.values().iterator(chunk_size)``, which uses a
+    server-side cursor on PostgreSQL, and encoded while they are read, so
+    memory use does not grow with the size of the export.
+    """
+
+    FORMATS = {
+        "jsonl": ("application/x-ndjson", "jsonl"),
+        "csv": ("text/csv", "csv"),
+    }
+    COLUMNS = [
+        "id",
+        "template_id",
+        "template__name",
+        "template__language",
+        "template__version",
+        "success",
+        "error_message",
+        "requested_by",
+        "rendered_subject",
+        "rendered_body",
+        "body_hash",
+        "body_length",
+        "context_used",
+        "created_at",
+    ]
+    BUFFER_BYTES = 64 * 1024
+
+    def __init__(
+        self,
+        output_format="jsonl",
+        compress=False,
+        template_id=None,
+        template_name=None,
+        since=None,
+        until=None,
+        success=None,
+        chunk_size=None,
+    ):
+        if output_format not in self.FORMATS:
+            raise ValueError(
+                f"Unsupported export format: {output_format} (use {', '.join(self.FORMATS)})"
+            )
+        self.output_format = output_format
+        self.compress = compress
+        self.template_id = template_id
+        self.template_name = template_name
+        self.since = self.parse_time(since)
+        self.until = self.parse_time(until)
+        self.success = success
+        self.chunk_size = chunk_size or getattr(
+            settings, "TEMPLATE_RENDER_LOG_EXPORT_CHUNK_SIZE", 2000
+        )
+
+    @staticmethod
+    def parse_time(value):
+        """Parse an ISO date or datetime; naive values are taken as UTC."""
+        if value is None or isinstance(value, datetime.datetime):
+            return value
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid date or datetime: {value}")
+            parsed = datetime.datetime.combine(day, datetime.time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+        return parsed
+
+    @property
+    def content_type(self):
+        if self.compress:
+            return "application/gzip"
+        return self.FORMATS[self.output_format][0]
+
+    @property
+    def filename(self):
+        extension = self.FORMATS[self.output_format][1]
+        stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+        return f"render_logs_{stamp}.{extension}" + (".gz" if self.compress else "")
+
+    def get_queryset(self):
+        queryset = TemplateRenderLog.objects.all()
+        if self.template_id:
+            queryset = queryset.filter(template_id=self.template_id)
+        if self.template_name:
+            queryset = queryset.filter(template__name=self.template_name)
+        if self.since:
+            queryset = queryset.filter(created_at__gte=self.since)
+        if self.until:
+            queryset = queryset.filter(created_at__lt=self.until)
+        if self.success is not None:
+            queryset = queryset.filter(success=self.success)
+        return queryset.order_by("created_at", "id")
+
+    def rows(self):
+        return self.get_queryset().values(*self.COLUMNS).iterator(
+            chunk_size=self.chunk_size
+        )
+
+    def __iter__(self):
+        """Yield encoded (and optionally compressed) chunks of about BUFFER_BYTES."""
+        encode = self._jsonl if self.output_format == "jsonl" else self._csv
+        chunks = self._buffered(encode(self.rows()))
+        if self.compress:
+            chunks = self._gzip(chunks)
+        return iter(chunks)
+
+    @staticmethod
+    def _jsonl(rows):
+        for row in rows:
+            yield (json.dumps(row, cls=DjangoJSONEncoder) + "\n").encode("utf-8")
+
+    @classmethod
+    def _csv(cls, rows):
+        line = _LineBuffer()
+        writer = csv.writer(line)
+        writer.writerow(cls.COLUMNS)
+        yield line.pop()
+        for row in rows:
+            row["context_used"] = json.dumps(row["context_used"], cls=DjangoJSONEncoder)
+            row["created_at"] = row["created_at"].isoformat()
+            writer.writerow([row[column] for column in cls.COLUMNS])
+            yield line.pop()
+
+    @classmethod
+    def _buffered(cls, chunks):
+        buffer = []
+        size = 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= cls.BUFFER_BYTES:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+    @staticmethod
+    def _gzip(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+
+class _LineBuffer:
+    """File-like target for csv.writer that hands back each written line."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, value):
+        self._parts.append(value)
+
+    def pop(self):
+        line = "".join(self._parts).encode("utf-8")
+        self._parts = []
+        return line
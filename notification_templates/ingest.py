@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import os
+
+
+class BulkRenderFile:
+    """
+    Stream render requests out of a JSONL or CSV file of contexts.
+
+    Rows are decoded one at a time from a binary file object, so a file of
+    any size is read in constant memory. Every row yields a request dict
+    (template_name, language, template_type, requested_by, context), or
+    ``{"error": ...}`` when the row cannot be used; the defaults given here
+    apply when a row does not name its own template.
+
+    JSONL: each line is an object. If it has a ``context`` key it is a
+    request like the items of ``bulk-render``; otherwise the whole object is
+    the context. CSV: the header names the columns; the REQUEST_FIELDS
+    columns are request fields and every other column is a context variable.
+    """
+
+    FORMATS = ("jsonl", "csv")
+    REQUEST_FIELDS = ("template_name", "language", "template_type", "requested_by")
+
+    def __init__(
+        self,
+        fileobj,
+        input_format,
+        template_name=None,
+        language="en",
+        template_type="email",
+        requested_by="bulk_render",
+    ):
+        if input_format not in self.FORMATS:
+            raise ValueError(
+                f"Unsupported file format: {input_format} (use {', '.join(self.FORMATS)})"
+            )
+        self.fileobj = fileobj
+        self.input_format = input_format
+        self.defaults = {
+            "template_name": template_name,
+            "language": language or "en",
+            "template_type": template_type or "email",
+            "requested_by": requested_by or "bulk_render",
+        }
+
+    @classmethod
+    def detect_format(cls, filename):
+        """Format from the file extension (.jsonl, .ndjson or .csv), or None."""
+        extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+        if extension == "ndjson":
+            return "jsonl"
+        return extension if extension in cls.FORMATS else None
+
+    def __iter__(self):
+        text = io.TextIOWrapper(self.fileobj, encoding="utf-8-sig", newline="")
+        try:
+            rows = self._jsonl(text) if self.input_format == "jsonl" else self._csv(text)
+            yield from rows
+        finally:
+            # Leave the underlying file open for the caller to close
+            text.detach()
+
+    def _request(self, fields, context, line):
+        request = dict(self.defaults)
+        request.update({key: value for key, value in fields.items() if value})
+        if not request["template_name"]:
+            return {"error": f"Line {line}: no template_name given"}
+        request["context"] = context
+        return request
+
+    def _jsonl(self, text):
+        line = 0
+        for raw in text:
+            line += 1
+            if not raw.strip():
+                continue
+            try:
+                row = json.loads(raw)
+            except ValueError as e:
+                yield {"error": f"Line {line}: invalid JSON ({str(e)})"}
+                continue
+            if not isinstance(row, dict):
+                yield {"error": f"Line {line}: expected a JSON object"}
+                continue
+
+            if "context" in row:
+                context = row["context"]
+                if not isinstance(context, dict):
+                    yield {"error": f"Line {line}: context must be an object"}
+                    continue
+                fields = {key: row.get(key) for key in self.REQUEST_FIELDS}
+            else:
+                context, fields = row, {}
+            yield self._request(fields, context, line)
+
+    def _csv(self, text):
+        reader = csv.DictReader(text, restval="")
+        for row in reader:
+            if None in row:
+                yield {"error": f"Line {reader.line_num}: more values than columns"}
+                continue
+            fields = {key: row.pop(key, None) for key in self.REQUEST_FIELDS}
+            yield self._request(fields, row, reader.line_num)
@@ -0,0 +1,324 @@
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger(__name__)
+
+
+class RenderLogSink:
+    """
+    Write-behind sink for TemplateRenderLog rows.
+
+    Callers hand over unsaved log instances and return immediately; a
+    background thread (one per process id, started lazily) writes them with
+    ``bulk_create`` once ``batch_size`` records are queued or every
+    ``flush_interval`` seconds. The queue holds at most ``max_size`` records;
+    when it is full the ``overflow`` policy applies: ``drop`` discards the new
+    records and counts them, ``sync`` writes them in the calling thread.
+
+    ``created_at`` is set when a row is inserted, so it can trail the render
+    by up to ``flush_interval``. Settings are read on every call so they can
+    be overridden at runtime; with TEMPLATE_RENDER_LOG_WRITE_BEHIND off every
+    submit is written synchronously.
+    """
+
+    OVERFLOW_POLICIES = ("drop", "sync")
+
+    def __init__(self):
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    @property
+    def enabled(self):
+        return getattr(settings, "TEMPLATE_RENDER_LOG_WRITE_BEHIND", True)
+
+    @property
+    def max_size(self):
+        return getattr(settings, "TEMPLATE_RENDER_LOG_BUFFER_SIZE", 10000)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, "TEMPLATE_RENDER_LOG_BATCH_SIZE", 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, "TEMPLATE_RENDER_LOG_FLUSH_INTERVAL", 1.0)
+
+    @property
+    def overflow(self):
+        policy = getattr(settings, "TEMPLATE_RENDER_LOG_OVERFLOW", "drop")
+        return policy if policy in self.OVERFLOW_POLICIES else "drop"
+
+    def submit(self, log):
+        """Queue a single unsaved TemplateRenderLog."""
+        self.submit_many([log])
+
+    def submit_many(self, logs):
+        """Queue unsaved TemplateRenderLog instances, applying the overflow policy."""
+        logs = list(logs)
+        if not logs:
+            return
+        if not self.enabled:
+            self._write(logs)
+            return
+
+        self._ensure_started()
+        with self._lock:
+            room = max(self.max_size - len(self._queue), 0)
+            accepted, overflow = logs[:room], logs[room:]
+            self._queue.extend(accepted)
+            due = len(self._queue) >= self.batch_size
+            if overflow and self.overflow == "drop":
+                self._dropped += len(overflow)
+
+        if due:
+            self._wakeup.set()
+        if overflow:
+            if self.overflow == "sync":
+                self._write(overflow)
+            else:
+                logger.warning(
+                    f"Render log buffer full, dropped {len(overflow)} records"
+                )
+
+    def flush(self):
+        """Write everything queued so far in batch_size chunks; returns rows written."""
+        written = 0
+        while True:
+            with self._lock:
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self.batch_size, len(self._queue)))
+                ]
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": len(self._queue),
+                "max_size": self.max_size,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+    def _write(self, logs):
+        """Bulk insert render logs; failures are logged and counted, never raised."""
+        from .models import TemplateRenderLog
+
+        try:
+            TemplateRenderLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        except Exception as e:
+            logger.error(f"Failed to write {len(logs)} render logs: {str(e)}")
+            with self._lock:
+                self._failed += len(logs)
+            return 0
+        with self._lock:
+            self._written += len(logs)
+        return len(logs)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Records inherited through fork belong to the parent process
+                self._queue.clear()
+            self._pid = os.getpid()
+            thread = threading.Thread(
+                target=self._run, name="template-render-log-sink", daemon=True
+            )
+            thread.start()
+            logger.info(f"Started render log sink in process {self._pid}")
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+                render_stats.flush()
+            except Exception as e:
+                logger.error(f"Render log sink flush failed: {str(e)}")
+
+
+class RenderStatsAggregator:
+    """
+    In-process pre-aggregation of render metrics for TemplateRenderStat.
+
+    ``record`` adds a render to its minute and hour buckets in memory;
+    ``flush`` writes all buckets with multi-row upserts that increment the
+    stored counters, and runs on the render log sink's flush thread. With
+    write-behind disabled there is no such thread, so ``record`` flushes in
+    the calling thread once TEMPLATE_RENDER_STATS_FLUSH_EVERY renders are
+    pending or TEMPLATE_RENDER_STATS_FLUSH_INTERVAL seconds have passed
+    since the last flush; pending buckets are also flushed at exit.
+    """
+
+    PERIODS = {"minute": 60, "hour": 3600}
+    COUNTERS = (
+        "render_count",
+        "failure_count",
+        "logged_count",
+        "latency_sum_ms",
+        "bytes_rendered",
+    )
+    UPSERT_BATCH_SIZE = 500
+
+    def __init__(self):
+        self._buckets = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, template_id, success=True, logged=True, latency_ms=0.0, size=0):
+        now = time.time()
+        with self._lock:
+            for period, seconds in self.PERIODS.items():
+                key = (template_id, period, int(now // seconds) * seconds)
+                row = self._buckets.get(key)
+                if row is None:
+                    row = self._buckets[key] = {counter: 0 for counter in self.COUNTERS}
+                    row["latency_max_ms"] = 0.0
+                row["render_count"] += 1
+                row["failure_count"] += 0 if success else 1
+                row["logged_count"] += 1 if logged else 0
+                row["latency_sum_ms"] += latency_ms
+                row["latency_max_ms"] = max(row["latency_max_ms"], latency_ms)
+                row["bytes_rendered"] += size
+            self._pending += 1
+            due = (
+                self._pending >= getattr(settings, "TEMPLATE_RENDER_STATS_FLUSH_EVERY", 100)
+                or time.monotonic() - self._last_flush
+                >= getattr(settings, "TEMPLATE_RENDER_STATS_FLUSH_INTERVAL", 5.0)
+            )
+
+        if render_log_sink.enabled:
+            # Stats are flushed by the sink thread even if every log is sampled out
+            render_log_sink._ensure_started()
+        elif due:
+            self.flush()
+
+    def clear(self):
+        """Drop pending buckets without writing them."""
+        with self._lock:
+            self._buckets = {}
+            self._pending = 0
+
+    def flush(self):
+        """Upsert all pending buckets; returns the number of rows written."""
+        with self._lock:
+            buckets, self._buckets = self._buckets, {}
+            self._pending = 0
+            self._last_flush = time.monotonic()
+        if not buckets:
+            return 0
+
+        rows = [
+            dict(
+                row,
+                template_id=template_id,
+                period=period,
+                bucket_start=datetime.datetime.fromtimestamp(
+                    bucket, tz=datetime.timezone.utc
+                ),
+            )
+            for (template_id, period, bucket), row in buckets.items()
+        ]
+        try:
+            with transaction.atomic():
+                if connection.vendor in ("postgresql", "sqlite"):
+                    for start in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+                        self._upsert(rows[start : start + self.UPSERT_BATCH_SIZE])
+                else:
+                    for row in rows:
+                        self._update_or_create(row)
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} render stat buckets: {str(e)}")
+            return 0
+        return len(rows)
+
+    @classmethod
+    def _upsert(cls, rows):
+        """INSERT ... ON CONFLICT DO UPDATE adding to the existing counters."""
+        from .models import TemplateRenderStat
+
+        meta = TemplateRenderStat._meta
+        table = connection.ops.quote_name(meta.db_table)
+        columns = ["template_id", "period", "bucket_start", *cls.COUNTERS, "latency_max_ms"]
+        fields = [meta.get_field(column.removesuffix("_id")) for column in columns]
+        greatest = "GREATEST" if connection.vendor == "postgresql" else "MAX"
+
+        params = []
+        for row in rows:
+            for column, field in zip(columns, fields):
+                params.append(field.get_db_prep_value(row[column], connection))
+        placeholders = ", ".join(
+            ["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows)
+        )
+        updates = [
+            f"{counter} = {table}.{counter} + EXCLUDED.{counter}"
+            for counter in cls.COUNTERS
+        ]
+        updates.append(
+            f"latency_max_ms = {greatest}({table}.latency_max_ms, EXCLUDED.latency_max_ms)"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders} "
+                f"ON CONFLICT (template_id, period, bucket_start) "
+                f"DO UPDATE SET {', '.join(updates)}",
+                params,
+            )
+
+    @classmethod
+    def _update_or_create(cls, row):
+        """Portable fallback for backends without ON CONFLICT."""
+        from .models import TemplateRenderStat
+
+        key = {
+            "template_id": row["template_id"],
+            "period": row["period"],
+            "bucket_start": row["bucket_start"],
+        }
+        updated = TemplateRenderStat.objects.filter(**key).update(
+            latency_max_ms=Greatest(F("latency_max_ms"), row["latency_max_ms"]),
+            **{counter: F(counter) + row[counter] for counter in cls.COUNTERS},
+        )
+        if not updated:
+            TemplateRenderStat.objects.create(
+                latency_max_ms=row["latency_max_ms"],
+                **key,
+                **{counter: row[counter] for counter in cls.COUNTERS},
+            )
+
+
+render_log_sink = RenderLogSink()
+render_stats = RenderStatsAggregator()
+
+
+@atexit.register
+def _flush_on_exit():
+    if render_log_sink._pid == os.getpid():
+        render_log_sink.flush()
+    render_stats.flush()
@@ -0,0 +1,121 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from notification_templates.cache import compiled_templates
+from notification_templates.models import NotificationTemplate, TemplateContent
+from notification_templates.utils import TemplateRenderer
+
+
+class Command(BaseCommand):
+    help = "Compare Django and Jinja2 render times on the seeded templates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=500, help="Renders per template and engine"
+        )
+        parser.add_argument(
+            "--items",
+            type=int,
+            default=20,
+            help="Number of order_items to pass to loop-heavy templates",
+        )
+        parser.add_argument(
+            "--template",
+            action="append",
+            dest="templates",
+            help="Template name to benchmark (repeatable, default: all active)",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        templates = NotificationTemplate.objects.filter(is_active=True).select_related(
+            "content"
+        )
+        if options["templates"]:
+            templates = templates.filter(name__in=options["templates"])
+
+        if not templates:
+            self.stdout.write(
+                self.style.WARNING(
+                    "No active templates found. Run init_email_templates / init_push_templates first."
+                )
+            )
+            return
+
+        self.stdout.write(
+            f"{'template':<32} {'lang':<5} {'django ms':>10} {'jinja2 ms':>10} {'speedup':>8}"
+        )
+
+        totals = {"django": 0.0, "jinja2": 0.0}
+        for template in templates:
+            context = self._sample_context(template.content, options["items"])
+            timings = {}
+            for engine in ("django", "jinja2"):
+                renderer = TemplateRenderer(self._copy(template, engine))
+                try:
+                    timings[engine] = self._time(renderer, context, iterations)
+                except ValueError as e:
+                    timings[engine] = None
+                    self.stderr.write(f"{template.name} ({engine}): {e}")
+
+            if None in timings.values():
+                continue
+
+            totals["django"] += timings["django"]
+            totals["jinja2"] += timings["jinja2"]
+            self.stdout.write(
+                f"{template.name:<32} {template.language:<5} "
+                f"{timings['django'] * 1000:>10.4f} {timings['jinja2'] * 1000:>10.4f} "
+                f"{timings['django'] / timings['jinja2']:>7.2f}x"
+            )
+
+        if totals["jinja2"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"\nOverall: django {totals['django'] * 1000:.4f} ms, "
+                    f"jinja2 {totals['jinja2'] * 1000:.4f} ms per render set "
+                    f"({totals['django'] / totals['jinja2']:.2f}x)"
+                )
+            )
+
+    @staticmethod
+    def _copy(template, engine):
+        """Build an unsaved copy of the template that renders with the given engine."""
+        copy = NotificationTemplate(
+            id=uuid.uuid4(),
+            name=template.name,
+            language=template.language,
+            template_type=template.template_type,
+            version=template.version,
+        )
+        content = TemplateContent(
+            template=copy,
+            subject=template.content.subject,
+            body=template.content.body,
+            is_html=template.content.is_html,
+            engine=engine,
+        )
+        content.compiled_segments = content._compile_segments()
+        return copy
+
+    @staticmethod
+    def _sample_context(content, item_count):
+        context = {name: f"sample {name}" for name in content.extracted_variables}
+        context["order_items"] = [
+            {"name": f"Item {i}", "quantity": i + 1, "price": f"{(i + 1) * 9.99:.2f}"}
+            for i in range(item_count)
+        ]
+        return context
+
+    @staticmethod
+    def _time(renderer, context, iterations):
+        """Return the mean seconds per render once the template is compiled."""
+        renderer.render(context)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            renderer.render(context)
+        elapsed = time.perf_counter() - start
+        compiled_templates.delete(renderer.template.cache_key())
+        return elapsed / iterations
@@ -0,0 +1,76 @@
+import pickle
+import time
+
+from django.core.management.base import BaseCommand
+
+from notification_templates.models import NotificationTemplate
+from notification_templates.snapshots import TemplateSnapshot
+
+
+class Command(BaseCommand):
+    help = "Compare cached payload size and decode time: pickled models vs snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=1000, help="Decodes per template"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        templates = list(
+            NotificationTemplate.objects.filter(is_active=True).select_related("content")
+        )
+        if not templates:
+            self.stdout.write(
+                self.style.WARNING(
+                    "No active templates found. Run init_email_templates / init_push_templates first."
+                )
+            )
+            return
+
+        self.stdout.write(
+            f"{'template':<32} {'lang':<5} {'model B':>9} {'snap B':>8} "
+            f"{'model us':>9} {'snap us':>8}"
+        )
+
+        totals = {"model_bytes": 0, "snapshot_bytes": 0, "model_s": 0.0, "snapshot_s": 0.0}
+        for template in templates:
+            # The Django cache pickles whatever it stores, so measure the
+            # pickled form in both cases.
+            model_payload = pickle.dumps(template, pickle.HIGHEST_PROTOCOL)
+            snapshot_payload = pickle.dumps(
+                TemplateSnapshot.from_model(template).to_bytes(), pickle.HIGHEST_PROTOCOL
+            )
+
+            model_s = self._time(
+                lambda: pickle.loads(model_payload), iterations
+            )
+            snapshot_s = self._time(
+                lambda: TemplateSnapshot.from_bytes(pickle.loads(snapshot_payload)),
+                iterations,
+            )
+
+            totals["model_bytes"] += len(model_payload)
+            totals["snapshot_bytes"] += len(snapshot_payload)
+            totals["model_s"] += model_s
+            totals["snapshot_s"] += snapshot_s
+            self.stdout.write(
+                f"{template.name:<32} {template.language:<5} {len(model_payload):>9} "
+                f"{len(snapshot_payload):>8} {model_s * 1e6:>9.1f} {snapshot_s * 1e6:>8.1f}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nTotal payload: {totals['model_bytes']} B -> {totals['snapshot_bytes']} B "
+                f"({totals['snapshot_bytes'] / totals['model_bytes']:.0%}); "
+                f"decode: {totals['model_s'] * 1e6:.1f} us -> {totals['snapshot_s'] * 1e6:.1f} us "
+                f"per full template set"
+            )
+        )
+
+    @staticmethod
+    def _time(func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notification_templates.ingest import BulkRenderFile
+from notification_templates.models import BulkRenderJob
+from notification_templates.services import CeleryService
+from notification_templates.tasks import dispatch_bulk_render_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a bulk render job from a JSONL or CSV file of contexts; the file "
+        "is read here as a stream and rendered by bulk workers in chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL or CSV file to read")
+        parser.add_argument(
+            "--format",
+            dest="input_format",
+            choices=BulkRenderFile.FORMATS,
+            help="File format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--template",
+            dest="template_name",
+            help="Template for rows without a template_name column",
+        )
+        parser.add_argument("--language", default="en")
+        parser.add_argument("--type", dest="template_type", default="email")
+        parser.add_argument("--requested-by", default="bulk_render")
+        parser.add_argument("--queue", help="Task queue for the render chunks")
+
+    def handle(self, *args, **options):
+        input_format = options["input_format"] or BulkRenderFile.detect_format(
+            options["path"]
+        )
+        if input_format is None:
+            raise CommandError(
+                f"Cannot tell the format of {options['path']}; pass --format"
+            )
+        if options["queue"] and options["queue"] not in CeleryService.get_queues():
+            raise CommandError(f"Unknown queue: {options['queue']}")
+
+        try:
+            fileobj = open(options["path"], "rb")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        job = BulkRenderJob.objects.create(requested_by=options["requested_by"])
+        defaults = {
+            "template_name": options["template_name"],
+            "language": options["language"],
+            "template_type": options["template_type"],
+            "requested_by": options["requested_by"],
+        }
+        try:
+            with fileobj:
+                total = dispatch_bulk_render_file(
+                    str(job.id), fileobj, input_format, defaults, options["queue"]
+                )
+        except Exception as e:
+            BulkRenderJob.mark_failed(job.id, e)
+            raise CommandError(f"Bulk render job {job.id} failed: {str(e)}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Bulk render job {job.id}: {total} rows queued "
+                f"(results at /api/v1/bulk-jobs/{job.id}/results/)"
+            )
+        )
@@ -0,0 +1,75 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notification_templates.exports import RenderLogExport
+
+
+class Command(BaseCommand):
+    help = "Stream render logs to a JSONL or CSV file (optionally gzip-compressed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            default="-",
+            help="File to write, or - for stdout (default)",
+        )
+        parser.add_argument(
+            "--format",
+            dest="output_format",
+            choices=sorted(RenderLogExport.FORMATS),
+            default="jsonl",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Gzip-compress the output"
+        )
+        parser.add_argument("--template", dest="template_name", help="Template name")
+        parser.add_argument("--template-id", help="Template version id")
+        parser.add_argument(
+            "--since", help="Only logs created at or after this ISO date/datetime (UTC)"
+        )
+        parser.add_argument(
+            "--until", help="Only logs created before this ISO date/datetime (UTC)"
+        )
+        status = parser.add_mutually_exclusive_group()
+        status.add_argument(
+            "--success", dest="success", action="store_true", default=None
+        )
+        status.add_argument("--failed", dest="success", action="store_false")
+        parser.add_argument(
+            "--chunk-size", type=int, help="Rows fetched per database round trip"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            export = RenderLogExport(
+                output_format=options["output_format"],
+                compress=options["gzip"],
+                template_id=options["template_id"],
+                template_name=options["template_name"],
+                since=options["since"],
+                until=options["until"],
+                success=options["success"],
+                chunk_size=options["chunk_size"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        to_stdout = options["output"] == "-"
+        stream = sys.stdout.buffer if to_stdout else open(options["output"], "wb")
+        written = 0
+        try:
+            for chunk in export:
+                stream.write(chunk)
+                written += len(chunk)
+        finally:
+            if to_stdout:
+                stream.flush()
+            else:
+                stream.close()
+
+        if not to_stdout:
+            self.stderr.write(
+                self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}")
+            )
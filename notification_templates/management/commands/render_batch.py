@@ -0,0 +1,224 @@
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from notification_templates.logsink import render_log_sink, render_stats
+from notification_templates.services import TemplateService
+from notification_templates.snapshots import TemplateSnapshot
+from notification_templates.utils import TemplateRenderer
+
+# Per worker process state, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(snapshot_bytes, log, requested_by):
+    """Decode and compile the template once per worker process."""
+    template = TemplateSnapshot.from_bytes(snapshot_bytes)
+    renderer = TemplateRenderer(template)
+    renderer.compile()
+    _worker.update(template=template, renderer=renderer, log=log, requested_by=requested_by)
+
+
+def _render_chunk(start, numbered_lines):
+    """
+    Render one chunk of (line number, JSONL context) pairs.
+
+    Returns (output bytes, succeeded, failed). Output lines carry the
+    context's position among the contexts as ``index`` and its 1-based line
+    number in the input file as ``line``, which differ once blank lines
+    have been skipped.
+    """
+    items = [None] * len(numbered_lines)
+    contexts = []
+    for offset, (_, line) in enumerate(numbered_lines):
+        try:
+            context = json.loads(line)
+        except ValueError as e:
+            items[offset] = {"status": "error", "error": f"Invalid JSON: {str(e)}"}
+            continue
+        if not isinstance(context, dict):
+            items[offset] = {"status": "error", "error": "Context must be a JSON object"}
+            continue
+        contexts.append((offset, context))
+
+    if _worker["log"]:
+        rendered = TemplateService.iter_render_batch(
+            _worker["template"], [context for _, context in contexts], _worker["requested_by"]
+        )
+        # Exhaust the generator so its last batch of render logs is submitted
+        for item in rendered:
+            offset = contexts[item.pop("index")][0]
+            items[offset] = item
+        # Pool processes exit without running atexit hooks
+        render_log_sink.flush()
+        render_stats.flush()
+    else:
+        for offset, context in contexts:
+            try:
+                rendered = _worker["renderer"].render(context)
+            except ValueError as e:
+                items[offset] = {"status": "error", "error": str(e)}
+            else:
+                items[offset] = {
+                    "status": "success",
+                    "subject": rendered.get("subject"),
+                    "body": rendered.get("body"),
+                }
+
+    failed = 0
+    output = []
+    for offset, item in enumerate(items):
+        if item["status"] == "error":
+            failed += 1
+        line_number = numbered_lines[offset][0]
+        output.append(json.dumps({"index": start + offset, "line": line_number, **item}))
+    output.append("")
+    return "\n".join(output).encode("utf-8"), len(items) - failed, failed
+
+
+class _InlineExecutor:
+    """Stand-in for ProcessPoolExecutor running everything in this process."""
+
+    class _Done:
+        def __init__(self, value):
+            self._value = value
+
+        def result(self):
+            return self._value
+
+    def __init__(self, initializer, initargs):
+        initializer(*initargs)
+
+    def submit(self, fn, *args):
+        return self._Done(fn(*args))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Command(BaseCommand):
+    help = (
+        "Render a template against a JSONL file of contexts on several CPU cores, "
+        "writing JSONL results in input order; blank lines are skipped and each "
+        "result records the input line it came from"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--template", required=True, dest="template_name")
+        parser.add_argument("--language", default="en")
+        parser.add_argument("--type", dest="template_type", default="email")
+        parser.add_argument(
+            "--input", default="-", help="JSONL file of contexts, or - for stdin (default)"
+        )
+        parser.add_argument(
+            "--output", "-o", default="-", help="File to write, or - for stdout (default)"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (default: CPU count); 0 renders in this process",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Contexts per worker task"
+        )
+        parser.add_argument(
+            "--log",
+            action="store_true",
+            help="Write render logs and stats as the API does (off by default)",
+        )
+        parser.add_argument("--requested-by", default="render_batch")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 0 or options["chunk_size"] < 1:
+            raise CommandError("--workers must be >= 0 and --chunk-size >= 1")
+
+        template = TemplateService.get_template(
+            options["template_name"], options["language"], options["template_type"]
+        )
+        if template is None:
+            raise CommandError(
+                f"Template not found: {options['template_name']} ({options['language']})"
+            )
+
+        initargs = (template.to_bytes(), options["log"], options["requested_by"])
+        if options["workers"]:
+            # Forked workers must open their own database connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options["workers"],
+                initializer=_init_worker,
+                initargs=initargs,
+            )
+        else:
+            executor = _InlineExecutor(_init_worker, initargs)
+
+        from_stdin = options["input"] == "-"
+        try:
+            source = sys.stdin if from_stdin else open(options["input"], encoding="utf-8")
+        except OSError as e:
+            raise CommandError(str(e))
+        to_stdout = options["output"] == "-"
+        stream = sys.stdout.buffer if to_stdout else open(options["output"], "wb")
+
+        started = time.perf_counter()
+        totals = {"succeeded": 0, "failed": 0, "bytes": 0}
+        try:
+            with executor:
+                self._run(executor, source, stream, options, totals)
+        finally:
+            if not from_stdin:
+                source.close()
+            if to_stdout:
+                stream.flush()
+            else:
+                stream.close()
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        renders = totals["succeeded"] + totals["failed"]
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Rendered {renders} contexts ({totals['failed']} failed) in {elapsed:.2f}s "
+                f"with {options['workers']} workers: {renders / elapsed:.1f} renders/s, "
+                f"{totals['bytes'] / elapsed / 1e6:.2f} MB/s written"
+            )
+        )
+
+    @staticmethod
+    def _run(executor, source, stream, options, totals):
+        """Feed chunks to the executor, keeping a bounded window and writing in order."""
+        chunk_size = options["chunk_size"]
+        window = max(options["workers"], 1) * 2
+        lines = (
+            (number, line) for number, line in enumerate(source, 1) if line.strip()
+        )
+        pending = deque()
+        start = 0
+
+        def write_oldest():
+            output, succeeded, failed = pending.popleft().result()
+            stream.write(output)
+            totals["succeeded"] += succeeded
+            totals["failed"] += failed
+            totals["bytes"] += len(output)
+
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(_render_chunk, start, chunk))
+            start += len(chunk)
+            if len(pending) >= window:
+                write_oldest()
+        while pending:
+            write_oldest()
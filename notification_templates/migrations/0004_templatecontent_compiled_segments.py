@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:32
+
+import re
+
+from django.db import migrations, models
+from django.template.base import Lexer, TokenType
+
+# Frozen copy of notification_templates.utils.compile_segments as of this
+# migration, so later changes to the fast path cannot alter what it stores.
+SIMPLE_VARIABLE_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]*$")
+RESERVED_LITERALS = {"True", "False", "None"}
+
+
+def compile_segments(source):
+    if source is None:
+        return None
+
+    segments = [""]
+    for token in Lexer(source).tokenize():
+        if token.token_type == TokenType.TEXT:
+            segments[-1] += token.contents
+        elif token.token_type == TokenType.VAR:
+            name = token.contents
+            if not SIMPLE_VARIABLE_RE.match(name) or name in RESERVED_LITERALS:
+                return None
+            segments.extend([name, ""])
+        else:
+            return None
+    return segments
+
+
+def compile_existing_segments(apps, schema_editor):
+    TemplateContent = apps.get_model('notification_templates', 'TemplateContent')
+    for content in TemplateContent.objects.all().iterator():
+        content.compiled_segments = {
+            'subject': compile_segments(content.subject),
+            'body': compile_segments(content.body),
+        }
+        content.save(update_fields=['compiled_segments'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0003_alter_notificationtemplate_template_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templatecontent',
+            name='compiled_segments',
+            field=models.JSONField(blank=True, editable=False, help_text='Precompiled static segments and slots for variable-only subject/body.', null=True),
+        ),
+        migrations.RunPython(compile_existing_segments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0004_templatecontent_compiled_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templatecontent',
+            name='engine',
+            field=models.CharField(choices=[('django', 'Django'), ('jinja2', 'Jinja2')], default='django', help_text='Template engine used to render the subject and body', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0005_templatecontent_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationtemplate',
+            name='cache_rendered_output',
+            field=models.BooleanField(default=False, help_text='Memoize rendered output for identical contexts (broadcast templates)'),
+        ),
+    ]
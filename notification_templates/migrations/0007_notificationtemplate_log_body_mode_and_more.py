@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:45
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0006_notificationtemplate_cache_rendered_output'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationtemplate',
+            name='log_body_mode',
+            field=models.CharField(blank=True, choices=[('full', 'Full rendered body'), ('hash', 'Body hash and length only')], default='', help_text='How rendered bodies are stored in render logs (empty: global default)', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='notificationtemplate',
+            name='log_sample_rate',
+            field=models.FloatField(blank=True, help_text='Fraction of successful renders to log (empty: global default)', null=True, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)]),
+        ),
+        migrations.AddField(
+            model_name='templaterenderlog',
+            name='body_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the rendered body when only its hash is logged', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='templaterenderlog',
+            name='body_length',
+            field=models.PositiveIntegerField(blank=True, help_text='Length of the rendered body in characters', null=True),
+        ),
+    ]
@@ -0,0 +1,128 @@
+"""
+Range-partition the render log table by created_at on PostgreSQL.
+
+The table is rebuilt: the existing one is renamed, a partitioned copy is
+created with the same columns, constraints and indexes (the primary key
+becomes (id, created_at), as PostgreSQL requires the partition key in unique
+constraints), rows are copied into partitions covering their dates and the
+old table is dropped. Other backends are left untouched.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = "notification_templates_templaterenderlog"
+INTERVALS = {"day": 1, "week": 7}
+
+
+def _table_definition(cursor, table):
+    """Return (primary key name, foreign key definitions, other index definitions)."""
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'f')",
+        [table],
+    )
+    constraints = cursor.fetchall()
+    pk_name = next(name for name, kind, _ in constraints if kind == "p")
+    foreign_keys = [(name, definition) for name, kind, definition in constraints if kind == "f"]
+
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE tablename = %s AND schemaname = current_schema() AND indexname <> %s",
+        [table, pk_name],
+    )
+    return pk_name, foreign_keys, cursor.fetchall()
+
+
+def _create_partitions(cursor, since):
+    """
+    Create dated partitions from since through the configured periods ahead.
+
+    Frozen copy of the naming and period rules RenderLogPartitions uses
+    today, so this migration does not depend on application code.
+    """
+    interval = getattr(settings, "TEMPLATE_RENDER_LOG_PARTITION_INTERVAL", "day")
+    step = datetime.timedelta(days=INTERVALS.get(interval, 1))
+
+    def period_start(day):
+        if step.days == 7:
+            return day - datetime.timedelta(days=day.weekday())
+        return day
+
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    start = period_start(since or today)
+    ahead = getattr(settings, "TEMPLATE_RENDER_LOG_PARTITIONS_AHEAD", 7)
+    last = period_start(today) + step * ahead
+    while start <= last:
+        end = start + step
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{TABLE}_p{start:%Y%m%d}" PARTITION OF "{TABLE}" '
+            f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') "
+            f"TO ('{end.isoformat()} 00:00:00+00')"
+        )
+        start = end
+
+
+def _rebuild(schema_editor, partitioned):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    old_table = f"{TABLE}_rebuild"
+    with connection.cursor() as cursor:
+        pk_name, foreign_keys, indexes = _table_definition(cursor, TABLE)
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{old_table}"')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{old_table}" DROP CONSTRAINT "{name}"')
+        cursor.execute(f'ALTER TABLE "{old_table}" DROP CONSTRAINT "{pk_name}"')
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+
+        if partitioned:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}" (LIKE "{old_table}" INCLUDING DEFAULTS) '
+                f"PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, created_at)'
+            )
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT'
+            )
+            cursor.execute(f'SELECT min(created_at) FROM "{old_table}"')
+            oldest = cursor.fetchone()[0]
+            since = oldest.astimezone(datetime.timezone.utc).date() if oldest else None
+            _create_partitions(cursor, since)
+        else:
+            cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{old_table}" INCLUDING DEFAULTS)')
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id)')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{old_table}"')
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        for _, definition in indexes:
+            # Indexes read from a partitioned table are declared ON ONLY the parent
+            cursor.execute(definition.replace(" ON ONLY ", " ON ", 1))
+        cursor.execute(f'DROP TABLE "{old_table}" CASCADE')
+
+
+def partition_render_logs(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_render_logs(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notification_templates", "0007_notificationtemplate_log_body_mode_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_render_logs, unpartition_render_logs),
+    ]
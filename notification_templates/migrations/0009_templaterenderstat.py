@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0008_partition_templaterenderlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemplateRenderStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('render_count', models.PositiveIntegerField(default=0)),
+                ('failure_count', models.PositiveIntegerField(default=0)),
+                ('logged_count', models.PositiveIntegerField(default=0, help_text='Renders that were also written to the render log')),
+                ('latency_sum_ms', models.FloatField(default=0)),
+                ('latency_max_ms', models.FloatField(default=0)),
+                ('bytes_rendered', models.PositiveBigIntegerField(default=0)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_stats', to='notification_templates.notificationtemplate')),
+            ],
+            options={
+                'ordering': ['-bucket_start'],
+                'indexes': [models.Index(fields=['period', 'bucket_start'], name='notificatio_period_380791_idx')],
+                'unique_together': {('template', 'period', 'bucket_start')},
+            },
+        ),
+    ]
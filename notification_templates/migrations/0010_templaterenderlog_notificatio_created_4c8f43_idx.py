@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0009_templaterenderstat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='templaterenderlog',
+            index=models.Index(fields=['created_at', 'id'], name='notificatio_created_4c8f43_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:55
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_templates', '0010_templaterenderlog_notificatio_created_4c8f43_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkRenderJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('requested_by', models.CharField(blank=True, max_length=100, null=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('succeeded', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='notificatio_status_e5404c_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BulkRenderResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(help_text='Position in the submitted request list')),
+                ('template_name', models.CharField(max_length=200)),
+                ('success', models.BooleanField(default=True)),
+                ('rendered_subject', models.TextField(blank=True, null=True)),
+                ('rendered_body', models.TextField(blank=True, default='')),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='notification_templates.bulkrenderjob')),
+            ],
+            options={
+                'ordering': ['job', 'index'],
+                'unique_together': {('job', 'index')},
+            },
+        ),
+    ]
@@ -3,7 +3,14 @@ import re
 import uuid
 
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+from jinja2 import TemplateSyntaxError as Jinja2TemplateSyntaxError
+
+from .cache import TemplateCacheKeys, broadcast_invalidation
+from .utils import compile_segments, extract_jinja2_variables
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +20,10 @@ class NotificationTemplate(models.Model):
         ("email", "Email"),
         ("push", "Push Notification"),
     ]
+    LOG_BODY_MODES = [
+        ("full", "Full rendered body"),
+        ("hash", "Body hash and length only"),
+    ]
 
     id = models.UUIDField(
         default=uuid.uuid4, unique=True, primary_key=True, editable=False
@@ -41,6 +52,23 @@ class NotificationTemplate(models.Model):
     description = models.TextField(
         blank=True, null=True, help_text="Description of what this template is used for"
     )
+    cache_rendered_output = models.BooleanField(
+        default=False,
+        help_text="Memoize rendered output for identical contexts (broadcast templates)",
+    )
+    log_sample_rate = models.FloatField(
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+        help_text="Fraction of successful renders to log (empty: global default)",
+    )
+    log_body_mode = models.CharField(
+        max_length=10,
+        choices=LOG_BODY_MODES,
+        blank=True,
+        default="",
+        help_text="How rendered bodies are stored in render logs (empty: global default)",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -94,6 +122,11 @@ class NotificationTemplate(models.Model):
 class TemplateContent(models.Model):
     """Stores the actual content of each template version."""
 
+    ENGINES = [
+        ("django", "Django"),
+        ("jinja2", "Jinja2"),
+    ]
+
     id = models.UUIDField(
         default=uuid.uuid4, unique=True, primary_key=True, editable=False
     )
@@ -112,11 +145,23 @@ class TemplateContent(models.Model):
     is_html = models.BooleanField(
         default=True, help_text="Whether the body contains HTML content"
     )
+    engine = models.CharField(
+        max_length=10,
+        choices=ENGINES,
+        default="django",
+        help_text="Template engine used to render the subject and body",
+    )
     extracted_variables = models.JSONField(
         default=list,
         blank=True,
         help_text="Automatically extracted variable names from subject and body.",
     )
+    compiled_segments = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Precompiled static segments and slots for variable-only subject/body.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -126,20 +171,45 @@ class TemplateContent(models.Model):
         return f"Content for {self.template.name} v{self.template.version}"
 
     def _extract_variables_from_content(self):
-        """Extracts variable names from the subject and body using a regex pattern."""
+        """Extracts variable names from the subject and body for the selected engine."""
         variables = set()
         pattern = r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}"
 
         for content in [self.subject, self.body]:
-            if content:
-                variables.update(re.findall(pattern, content))
+            if not content:
+                continue
+            if self.engine == "jinja2":
+                try:
+                    variables.update(extract_jinja2_variables(content))
+                    continue
+                except Jinja2TemplateSyntaxError:
+                    logger.warning(
+                        f"Could not parse Jinja2 content for {self.template_id}; falling back to regex"
+                    )
+            variables.update(re.findall(pattern, content))
 
         return sorted(list(variables))
 
+    def _compile_segments(self):
+        """Precompile variable-only subject/body for the fast substitution path."""
+        if self.engine != "django":
+            return {"subject": None, "body": None}
+        return {
+            "subject": compile_segments(self.subject),
+            "body": compile_segments(self.body),
+        }
+
     def save(self, *args, **kwargs):
-        """Extract variables before saving."""
+        """Extract variables and precompile fast-path segments before saving."""
         self.extracted_variables = self._extract_variables_from_content()
+        self.compiled_segments = self._compile_segments()
         super().save(*args, **kwargs)
+        # Content can be created or edited in place (admin, seed commands)
+        base_key = TemplateCacheKeys.base(
+            self.template.name, self.template.language, self.template.template_type
+        )
+        TemplateCacheKeys.bump(base_key)
+        broadcast_invalidation(template_ids=[self.template_id], keys=[base_key])
 
 
 class TemplateRenderLog(models.Model):
@@ -152,6 +222,15 @@ class TemplateRenderLog(models.Model):
     context_used = models.JSONField(help_text="Context variables used for rendering")
     rendered_subject = models.TextField(blank=True, null=True)
     rendered_body = models.TextField()
+    body_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="SHA-256 of the rendered body when only its hash is logged",
+    )
+    body_length = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Length of the rendered body in characters"
+    )
     success = models.BooleanField(default=True)
     error_message = models.TextField(blank=True, null=True)
     requested_by = models.CharField(
@@ -167,7 +246,111 @@ class TemplateRenderLog(models.Model):
         indexes = [
             models.Index(fields=["template", "created_at"]),
             models.Index(fields=["success", "created_at"]),
+            models.Index(fields=["created_at", "id"]),
         ]
 
     def __str__(self):
         return f"Render log for {self.template.name} at {self.created_at}"
+
+
+class TemplateRenderStat(models.Model):
+    """
+    Per-template-version render metrics rolled up into minute and hour buckets.
+
+    Rows are maintained incrementally by the render log sink with batched
+    upserts, so dashboards never have to scan TemplateRenderLog.
+    """
+
+    PERIODS = [
+        ("minute", "Minute"),
+        ("hour", "Hour"),
+    ]
+
+    template = models.ForeignKey(
+        NotificationTemplate, on_delete=models.CASCADE, related_name="render_stats"
+    )
+    period = models.CharField(max_length=10, choices=PERIODS)
+    bucket_start = models.DateTimeField()
+    render_count = models.PositiveIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+    logged_count = models.PositiveIntegerField(
+        default=0, help_text="Renders that were also written to the render log"
+    )
+    latency_sum_ms = models.FloatField(default=0)
+    latency_max_ms = models.FloatField(default=0)
+    bytes_rendered = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("template", "period", "bucket_start")
+        ordering = ["-bucket_start"]
+        indexes = [
+            models.Index(fields=["period", "bucket_start"]),
+        ]
+
+    def __str__(self):
+        return f"{self.template.name} {self.period} stats at {self.bucket_start}"
+
+
+class BulkRenderJob(models.Model):
+    """A bulk render request; progress counters are updated as chunks finish."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (COMPLETED, "Completed"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    status = models.CharField(max_length=20, choices=STATUSES, default=PENDING)
+    task_id = models.CharField(max_length=255, blank=True, null=True)
+    requested_by = models.CharField(max_length=100, blank=True, null=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Bulk render job {self.id} ({self.status}, {self.processed}/{self.total})"
+
+    @classmethod
+    def mark_failed(cls, job_id, error):
+        """Mark a job failed with the error that stopped it."""
+        cls.objects.filter(id=job_id).update(
+            status=cls.FAILED, error_message=str(error), updated_at=timezone.now()
+        )
+
+
+class BulkRenderResult(models.Model):
+    """The outcome of one item of a bulk render job."""
+
+    job = models.ForeignKey(
+        BulkRenderJob, on_delete=models.CASCADE, related_name="results"
+    )
+    index = models.PositiveIntegerField(help_text="Position in the submitted request list")
+    template_name = models.CharField(max_length=200)
+    success = models.BooleanField(default=True)
+    rendered_subject = models.TextField(blank=True, null=True)
+    rendered_body = models.TextField(blank=True, default="")
+    error_message = models.TextField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ("job", "index")
+        ordering = ["job", "index"]
+
+    def __str__(self):
+        return f"Result {self.index} of bulk render job {self.job_id}"
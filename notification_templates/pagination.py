@@ -0,0 +1,119 @@
+import base64
+import binascii
+import datetime
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination on (created_at, id), newest first.
+
+    The cursor encodes the last row's ``created_at`` and ``id``; the next
+    page is ``WHERE (created_at, id) < cursor ORDER BY created_at DESC, id
+    DESC LIMIT n``, so every page costs the same index range scan and no
+    ``COUNT(*)`` is ever run.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.page_size = getattr(settings, "TEMPLATE_RENDER_LOG_PAGE_SIZE", 50)
+        self.max_page_size = getattr(settings, "TEMPLATE_RENDER_LOG_MAX_PAGE_SIZE", 500)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by("-created_at", "-id")
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[: self.page_size]
+        self.next_position = (
+            (results[-1].created_at, results[-1].id) if self.has_next else None
+        )
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            created_at, pk = decoded.split("|")
+            return datetime.datetime.fromisoformat(created_at), uuid.UUID(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        encoded = base64.urlsafe_b64encode(
+            f"{created_at.isoformat()}|{pk}".encode("ascii")
+        ).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("first", self.get_first_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "first": {"type": "string", "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class BulkRenderResultPagination(CursorPagination):
+    """Cursor pagination over a bulk render job's results in submission order."""
+
+    ordering = "index"
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = getattr(settings, "TEMPLATE_BULK_RESULT_PAGE_SIZE", 100)
+        self.max_page_size = getattr(settings, "TEMPLATE_BULK_RESULT_MAX_PAGE_SIZE", 1000)
@@ -0,0 +1,239 @@
+import datetime
+import logging
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from .models import TemplateRenderLog
+
+logger = logging.getLogger(__name__)
+
+
+class RenderLogPartitions:
+    """
+    Manage the time partitions of the render log table.
+
+    On PostgreSQL, migration 0008 turns TemplateRenderLog into a table
+    range-partitioned by ``created_at``, one partition per day or week
+    (TEMPLATE_RENDER_LOG_PARTITION_INTERVAL) named ``<table>_pYYYYMMDD``
+    after the first day it covers, plus a default partition that only
+    catches rows when partitions were not created ahead of time. Retention
+    then detaches and drops whole partitions. Other backends keep a plain
+    table and expire rows with chunked deletes.
+    """
+
+    TABLE = TemplateRenderLog._meta.db_table
+    DEFAULT_PARTITION = f"{TABLE}_default"
+    INTERVALS = {"day": 1, "week": 7}
+    NAME_RE = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+    @staticmethod
+    def interval():
+        interval = getattr(settings, "TEMPLATE_RENDER_LOG_PARTITION_INTERVAL", "day")
+        return interval if interval in RenderLogPartitions.INTERVALS else "day"
+
+    @classmethod
+    def period_start(cls, value, interval=None):
+        """Return the first day of the partition period containing value."""
+        if isinstance(value, datetime.datetime):
+            value = value.astimezone(datetime.timezone.utc).date()
+        if (interval or cls.interval()) == "week":
+            return value - datetime.timedelta(days=value.weekday())
+        return value
+
+    @classmethod
+    def period_end(cls, start, interval=None):
+        return start + datetime.timedelta(days=cls.INTERVALS[interval or cls.interval()])
+
+    @classmethod
+    def partition_name(cls, start):
+        return f"{cls.TABLE}_p{start:%Y%m%d}"
+
+    @classmethod
+    def is_partitioned(cls, using=None):
+        using = using or connection
+        if using.vendor != "postgresql":
+            return False
+        with using.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [cls.TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def ensure_partitions(cls, ahead=None, since=None, using=None):
+        """
+        Create missing partitions from since (default: today) through ahead periods later.
+
+        Each partition is created in its own savepoint, so one failure is
+        logged and the rest are still created. Rows already sitting in the
+        default partition for a new range are moved into it. Returns the
+        names of the partitions created. Does nothing unless the table is
+        partitioned.
+        """
+        using = using or connection
+        if not cls.is_partitioned(using):
+            return []
+        if ahead is None:
+            ahead = getattr(settings, "TEMPLATE_RENDER_LOG_PARTITIONS_AHEAD", 7)
+
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        start = cls.period_start(since or today)
+        last = cls.period_start(today)
+        for _ in range(ahead):
+            last = cls.period_end(last)
+
+        existing = set(cls.partition_names(using))
+        has_default = cls.DEFAULT_PARTITION in existing
+        created = []
+        while start <= last:
+            end = cls.period_end(start)
+            name = cls.partition_name(start)
+            if name not in existing:
+                try:
+                    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+                        cls._create_partition(cursor, name, start, end, has_default)
+                except DatabaseError as e:
+                    logger.error(f"Error creating render log partition {name}: {str(e)}")
+                else:
+                    created.append(name)
+            start = end
+        if created:
+            logger.info(f"Created render log partitions: {', '.join(created)}")
+        return created
+
+    @classmethod
+    def _create_partition(cls, cursor, name, start, end, has_default):
+        """
+        Create one dated partition.
+
+        PostgreSQL refuses to add a range the default partition already holds
+        rows for, so in that case the default partition is detached, the new
+        partition created, the rows moved into it and the default re-attached.
+        """
+        lower = f"{start.isoformat()} 00:00:00+00"
+        upper = f"{end.isoformat()} 00:00:00+00"
+        create = (
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{cls.TABLE}" '
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+        if has_default:
+            cursor.execute(
+                f'SELECT 1 FROM "{cls.DEFAULT_PARTITION}" '
+                f"WHERE created_at >= %s AND created_at < %s LIMIT 1",
+                [lower, upper],
+            )
+            has_default = cursor.fetchone() is not None
+        if not has_default:
+            cursor.execute(create)
+            return
+
+        cursor.execute(f'ALTER TABLE "{cls.TABLE}" DETACH PARTITION "{cls.DEFAULT_PARTITION}"')
+        cursor.execute(create)
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{cls.DEFAULT_PARTITION}" '
+            f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            [lower, upper],
+        )
+        logger.info(f"Moved {cursor.rowcount} render logs from the default partition to {name}")
+        cursor.execute(
+            f'ALTER TABLE "{cls.TABLE}" ATTACH PARTITION "{cls.DEFAULT_PARTITION}" DEFAULT'
+        )
+
+    @classmethod
+    def partition_names(cls, using=None):
+        """Return the names of all partitions of the table, including the default one."""
+        using = using or connection
+        with using.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits i "
+                "JOIN pg_class parent ON parent.oid = i.inhparent "
+                "JOIN pg_class child ON child.oid = i.inhrelid "
+                "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+                [cls.TABLE],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def list_partitions(cls, using=None):
+        """Return [(name, start, end)] for the dated partitions, oldest first."""
+        partitions = []
+        for name in cls.partition_names(using):
+            match = cls.NAME_RE.match(name)
+            if not match:
+                continue
+            start = datetime.datetime.strptime(match.group(1), "%Y%m%d").date()
+            partitions.append((name, start, cls.period_end(start)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @classmethod
+    def drop_partitions_before(cls, cutoff, detach_only=None, using=None):
+        """
+        Detach (and unless detach_only, drop) partitions ending at or before cutoff.
+
+        Both are metadata-only operations, so no rows are scanned or deleted.
+        Returns the affected partition names.
+        """
+        using = using or connection
+        if detach_only is None:
+            detach_only = getattr(settings, "TEMPLATE_RENDER_LOG_DETACH_ONLY", False)
+        cutoff_day = cls.period_start(cutoff, "day")
+
+        removed = []
+        for name, _, end in cls.list_partitions(using):
+            if end > cutoff_day:
+                continue
+            with transaction.atomic(using=using.alias), using.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE "{cls.TABLE}" DETACH PARTITION "{name}"')
+                if not detach_only:
+                    cursor.execute(f'DROP TABLE "{name}"')
+            removed.append(name)
+        if removed:
+            action = "Detached" if detach_only else "Dropped"
+            logger.info(f"{action} render log partitions: {', '.join(removed)}")
+        return removed
+
+    @classmethod
+    def delete_before(cls, cutoff, batch_size=None, using=None):
+        """
+        Delete rows older than cutoff in chunks, one transaction per chunk.
+
+        On a partitioned table only the default partition is scanned, since
+        dated partitions are expired by drop_partitions_before.
+        """
+        using = using or connection
+        if batch_size is None:
+            batch_size = getattr(settings, "TEMPLATE_RENDER_LOG_DELETE_BATCH_SIZE", 1000)
+
+        deleted_count = 0
+        if cls.is_partitioned(using):
+            while True:
+                with transaction.atomic(using=using.alias), using.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM "{cls.DEFAULT_PARTITION}" WHERE id IN ('
+                        f'SELECT id FROM "{cls.DEFAULT_PARTITION}" '
+                        f"WHERE created_at < %s LIMIT %s)",
+                        [cutoff, batch_size],
+                    )
+                    deleted = cursor.rowcount
+                deleted_count += deleted
+                if deleted < batch_size:
+                    return deleted_count
+
+        logs = TemplateRenderLog.objects.using(using.alias)
+        while True:
+            batch_ids = list(
+                logs.filter(created_at__lt=cutoff).values_list("id", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not batch_ids:
+                return deleted_count
+            with transaction.atomic(using=using.alias):
+                deleted, _ = logs.filter(id__in=batch_ids).delete()
+            deleted_count += deleted
+            logger.info(f"Deleted batch of {deleted} render logs")
@@ -1,13 +1,27 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import NotificationTemplate, TemplateContent, TemplateRenderLog
+from .models import (
+    BulkRenderJob,
+    BulkRenderResult,
+    NotificationTemplate,
+    TemplateContent,
+    TemplateRenderLog,
+)
 from .services import TemplateService, TemplateVersionService
 
 
 class TemplateContentSerializer(serializers.ModelSerializer):
     class Meta:
         model = TemplateContent
-        fields = ["id", "subject", "body", "extracted_variables", "created_at"]
+        fields = [
+            "id",
+            "subject",
+            "body",
+            "engine",
+            "extracted_variables",
+            "created_at",
+        ]
         read_only_fields = ["id", "extracted_variables", "created_at"]
 
 
@@ -24,6 +38,9 @@ class NotificationTemplateSerializer(serializers.ModelSerializer):
             "version",
             "is_active",
             "description",
+            "cache_rendered_output",
+            "log_sample_rate",
+            "log_body_mode",
             "content",
             "created_at",
             "updated_at",
@@ -39,6 +56,7 @@ class TemplateCreateSerializer(serializers.Serializer):
     )
     subject = serializers.CharField(max_length=255, required=False, allow_blank=True)
     body = serializers.CharField()
+    engine = serializers.ChoiceField(choices=TemplateContent.ENGINES, required=False)
     description = serializers.CharField(required=False, allow_blank=True)
 
     def validate_name(self, value):
@@ -80,6 +98,7 @@ class TemplateCreateSerializer(serializers.Serializer):
                 validated_data.get("subject", ""),
                 validated_data["body"],
                 validated_data.get("description"),
+                engine=validated_data.get("engine"),
             )
         else:
             # Create new template
@@ -93,7 +112,10 @@ class TemplateCreateSerializer(serializers.Serializer):
                 template=template,
                 subject=validated_data.get("subject", ""),
                 body=validated_data["body"],
+                engine=validated_data.get("engine", "django"),
             )
+            # Drop any negative cache entry recorded while the template was missing
+            TemplateService.clear_template_cache(name, language, template_type)
             return template
 
 class TemplateUpdateSerializer(serializers.Serializer):
@@ -110,6 +132,12 @@ class TemplateRenderSerializer(serializers.Serializer):
     )
     context = serializers.JSONField()
     requested_by = serializers.CharField(max_length=100, required=False)
+    cache_result = serializers.BooleanField(
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text="Serve identical contexts from the result cache (default: template setting)",
+    )
 
 
 class TemplateRenderResponseSerializer(serializers.Serializer):
@@ -119,11 +147,67 @@ class TemplateRenderResponseSerializer(serializers.Serializer):
     template_type = serializers.CharField()
     language = serializers.CharField()
     version = serializers.IntegerField()
+    cached = serializers.BooleanField(default=False)
+
+
+class TemplateBatchRenderSerializer(serializers.Serializer):
+    template_name = serializers.CharField(max_length=200)
+    language = serializers.CharField(max_length=10, default="en")
+    template_type = serializers.ChoiceField(
+        choices=NotificationTemplate.TEMPLATE_TYPES, default="email"
+    )
+    contexts = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.TEMPLATE_RENDER_STREAM_MAX_SIZE,
+    )
+    requested_by = serializers.CharField(max_length=100, required=False)
+    stream = serializers.BooleanField(
+        default=False,
+        help_text="Stream results as newline-delimited JSON, one line per context",
+    )
+
+    def validate(self, attrs):
+        max_size = settings.TEMPLATE_RENDER_BATCH_MAX_SIZE
+        if not attrs["stream"] and len(attrs["contexts"]) > max_size:
+            raise serializers.ValidationError(
+                {
+                    "contexts": f"At most {max_size} contexts are allowed without streaming"
+                }
+            )
+        return attrs
+
+
+class TemplateBatchRenderItemSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    status = serializers.CharField()
+    subject = serializers.CharField(allow_null=True, required=False)
+    body = serializers.CharField(required=False)
+    error = serializers.CharField(required=False)
+
+
+class TemplateBatchRenderResponseSerializer(serializers.Serializer):
+    template_name = serializers.CharField()
+    template_type = serializers.CharField()
+    language = serializers.CharField()
+    version = serializers.IntegerField()
+    total = serializers.IntegerField()
+    successful = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = TemplateBatchRenderItemSerializer(many=True)
 
 
 class TemplateRenderLogSerializer(serializers.ModelSerializer):
+    """Render log serializer; pass ``fields`` to serialize only a subset."""
+
     template_name = serializers.CharField(source="template.name", read_only=True)
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = TemplateRenderLog
         fields = [
@@ -132,6 +216,8 @@ class TemplateRenderLogSerializer(serializers.ModelSerializer):
             "context_used",
             "rendered_subject",
             "rendered_body",
+            "body_hash",
+            "body_length",
             "success",
             "error_message",
             "requested_by",
@@ -159,3 +245,43 @@ class CompleteTemplateRenderResponseSerializer(serializers.Serializer):
     version = serializers.IntegerField()
     is_html = serializers.BooleanField()
     complete_email = serializers.DictField()
+
+
+class BulkRenderJobSerializer(serializers.ModelSerializer):
+    results_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BulkRenderJob
+        fields = [
+            "id",
+            "status",
+            "task_id",
+            "requested_by",
+            "total",
+            "processed",
+            "succeeded",
+            "failed",
+            "error_message",
+            "results_url",
+            "created_at",
+            "updated_at",
+            "completed_at",
+        ]
+        read_only_fields = fields
+
+    def get_results_url(self, obj):
+        return f"/api/v1/bulk-jobs/{obj.id}/results/"
+
+
+class BulkRenderResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BulkRenderResult
+        fields = [
+            "index",
+            "template_name",
+            "success",
+            "rendered_subject",
+            "rendered_body",
+            "error_message",
+        ]
+        read_only_fields = fields
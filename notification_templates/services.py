@@ -1,104 +1,506 @@
+import datetime
+import hashlib
 import logging
-
+import math
+import os
+import random
+import time
+import uuid
+
+from celery.result import AsyncResult
+from celery.states import READY_STATES
 from django.conf import settings
 from django.core.cache import cache
-
-from .models import NotificationTemplate, TemplateRenderLog, TemplateContent
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .cache import (
+    NEGATIVE_ENTRY,
+    TEMPLATE_MISSING,
+    TemplateCacheKeys,
+    broadcast_invalidation,
+    compiled_templates,
+    context_hash,
+    rendered_results,
+    start_invalidation_listener,
+    template_l1,
+    template_loads,
+    template_usage,
+)
+from .logsink import render_log_sink, render_stats
+from .models import (
+    BulkRenderJob,
+    NotificationTemplate,
+    TemplateContent,
+    TemplateRenderLog,
+    TemplateRenderStat,
+)
+from .snapshots import TemplateSnapshot
 from .utils import TemplateRenderer
 
 logger = logging.getLogger(__name__)
 
 
+def _rss_bytes():
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
 class TemplateService:
     """Service layer for template operations."""
 
     @staticmethod
     def get_template(name, language="en", template_type="email", use_cache=True):
-        """Get template with caching support."""
-        cache_key = f"template_{name}_{language}_{template_type}"
+        """
+        Get the active template as a TemplateSnapshot, with two-tier caching.
+
+        A short-lived in-process L1 sits in front of the Django cache, so hot
+        templates are served without a network round trip. The Django cache
+        stores the snapshot's compact serialized form. Missing templates are
+        cached negatively for TEMPLATE_NEGATIVE_CACHE_TTL, and concurrent
+        misses for the same key are collapsed into a single database query.
+        """
+        if not use_cache:
+            return TemplateService._load_template(name, language, template_type)
+
+        base_key = TemplateCacheKeys.base(name, language, template_type)
+
+        start_invalidation_listener()
+        template = template_l1.get(base_key)
+        if template is not None:
+            return None if template is TEMPLATE_MISSING else template
+
+        # Read the generation before touching the database so a concurrent
+        # invalidation sends this load's write to an orphaned key.
+        cache_key = TemplateCacheKeys.versioned(
+            base_key, TemplateCacheKeys.generation(base_key)
+        )
+
+        def lookup():
+            cached = cache.get(cache_key)
+            if cached == NEGATIVE_ENTRY:
+                return TEMPLATE_MISSING
+            return TemplateSnapshot.loads(cached)
 
-        if use_cache:
-            cached_template = cache.get(cache_key)
-            if cached_template:
-                logger.debug(f"Cache hit for template: {cache_key}")
+        def load():
+            template = TemplateService._load_template(name, language, template_type)
+            if template is None:
+                cache.set(cache_key, NEGATIVE_ENTRY, settings.TEMPLATE_NEGATIVE_CACHE_TTL)
                 logger.info(
-                    f"Retrieved template {name} ({language}, {template_type}) from cache"
+                    f"Template {name} ({language}, {template_type}) not found; cached negative entry"
                 )
-                return cached_template
-
-        template = NotificationTemplate.get_active_template(
-            name, language, template_type
-        )
+                return TEMPLATE_MISSING
 
-        if template and use_cache:
-            cache.set(cache_key, template, settings.CACHE_TTL)
+            cache.set(cache_key, template.to_bytes(), settings.CACHE_TTL)
             logger.debug(f"Cached template: {cache_key}")
             logger.info(
                 f"Cached template {name} ({language}, {template_type}) with TTL {settings.CACHE_TTL}"
             )
+            return template
 
-        return template
+        template = template_loads.run(cache_key, lookup, load)
+        template_l1.set(base_key, template)
+        return None if template is TEMPLATE_MISSING else template
+
+    @staticmethod
+    def _load_template(name, language, template_type):
+        """Load the active template from the database as a snapshot."""
+        template = NotificationTemplate.get_active_template(
+            name, language, template_type
+        )
+        if template is None:
+            return None
+        return TemplateSnapshot.from_model(template)
 
     @staticmethod
-    def clear_template_cache(name, language="en", template_type="email"):
-        """Clear cache for a specific template."""
-        cache_key = f"template_{name}_{language}_{template_type}"
-        cache.delete(cache_key)
+    def clear_template_cache(name, language="en", template_type="email", template_ids=()):
+        """Clear shared and per-process caches for a specific template."""
+        base_key = TemplateCacheKeys.base(name, language, template_type)
+        TemplateCacheKeys.bump(base_key)
+        broadcast_invalidation(template_ids=template_ids, keys=[base_key])
         logger.info(f"Cleared cache for template {name} ({language}, {template_type})")
 
     @staticmethod
     def render_template(
-        name, context, language="en", template_type="email", requested_by=None
+        name,
+        context,
+        language="en",
+        template_type="email",
+        requested_by=None,
+        cache_result=None,
     ):
-        """Render template with variables substitution."""
+        """
+        Render template with variables substitution.
+
+        When cache_result is True (or None and the template has
+        cache_rendered_output set), identical contexts for the same template
+        version are served from the process-local result cache. Cache hits
+        are still logged.
+        """
+        template = None
+        started = time.perf_counter()
         try:
             template = TemplateService.get_template(name, language, template_type)
 
             if not template:
                 raise ValueError(f"Template not found: {name} ({language})")
-
-            renderer = TemplateRenderer(template)
-            result = renderer.render(context)
-
-            # Log the rendering
-            TemplateRenderLog.objects.create(
-                template=template,
-                context_used=context,
-                rendered_subject=result.get("subject"),
-                rendered_body=result.get("body"),
-                success=True,
-                requested_by=requested_by,
+            started = time.perf_counter()
+
+            template_usage.incr(TemplateCacheKeys.base(name, language, template_type))
+
+            if cache_result is None:
+                cache_result = template.cache_rendered_output
+
+            result = None
+            result_key = None
+            if cache_result:
+                digest = context_hash(context)
+                if digest is not None:
+                    result_key = (*template.cache_key(), digest)
+                    result = rendered_results.get(result_key)
+
+            if result is not None:
+                result = dict(result, cached=True)
+            else:
+                renderer = TemplateRenderer(template)
+                result = renderer.render(context)
+                if result_key is not None:
+                    size = len(result.get("body", "").encode("utf-8")) + len(
+                        (result.get("subject") or "").encode("utf-8")
+                    )
+                    rendered_results.set(result_key, dict(result), size)
+
+            # Log the rendering (sampled, written behind the response)
+            log = TemplateService._render_log(
+                template,
+                context,
+                requested_by,
+                result,
+                latency=time.perf_counter() - started,
             )
+            if log is not None:
+                render_log_sink.submit(log)
 
             logger.info(f"Successfully rendered template: {name} for {requested_by}")
             return result
 
         except Exception as e:
-            # Log failed rendering
-            template = NotificationTemplate.get_active_template(
-                name, language, template_type
-            )
+            # Log failed rendering against the template we already resolved
             if template:
-                TemplateRenderLog.objects.create(
-                    template=template,
-                    context_used=context,
-                    rendered_body="",
-                    success=False,
-                    error_message=str(e),
-                    requested_by=requested_by,
+                render_log_sink.submit(
+                    TemplateService._render_log(
+                        template,
+                        context,
+                        requested_by,
+                        error=e,
+                        latency=time.perf_counter() - started,
+                    )
                 )
 
             logger.error(f"Failed to render template {name}: {str(e)}")
             raise
 
+    @staticmethod
+    def render_batch(
+        name, contexts, language="en", template_type="email", requested_by=None
+    ):
+        """
+        Render one template against many contexts.
+
+        The template is looked up and compiled once; per-item failures are
+        reported in place and do not abort the batch.
+        """
+        template = TemplateService.get_template(name, language, template_type)
+
+        if not template:
+            raise ValueError(f"Template not found: {name} ({language})")
+
+        results = list(
+            TemplateService.iter_render_batch(template, contexts, requested_by)
+        )
+
+        failed = len([r for r in results if r["status"] == "error"])
+        logger.info(
+            f"Batch rendered template {name} for {requested_by}: {len(results) - failed} successful, {failed} failed"
+        )
+        return {
+            "template_name": template.name,
+            "template_type": template.template_type,
+            "language": template.language,
+            "version": template.version,
+            "total": len(results),
+            "successful": len(results) - failed,
+            "failed": failed,
+            "results": results,
+        }
+
+    @staticmethod
+    def iter_render_batch(template, contexts, requested_by=None):
+        """
+        Yield one result dict per context, in order, for an already resolved template.
+
+        Render logs are handed to the render log sink in chunks of
+        TEMPLATE_RENDER_LOG_BATCH_SIZE, so memory stays bounded no matter how
+        many contexts are consumed.
+        """
+        renderer = TemplateRenderer(template)
+        base_key = TemplateCacheKeys.base(
+            template.name, template.language, template.template_type
+        )
+        batch_size = settings.TEMPLATE_RENDER_LOG_BATCH_SIZE
+        logs = []
+        rendered_count = 0
+
+        for index, context in enumerate(contexts):
+            started = time.perf_counter()
+            try:
+                rendered = renderer.render(context)
+            except ValueError as e:
+                item = {"index": index, "status": "error", "error": str(e)}
+                log = TemplateService._render_log(
+                    template,
+                    context,
+                    requested_by,
+                    error=e,
+                    latency=time.perf_counter() - started,
+                )
+            else:
+                item = {
+                    "index": index,
+                    "status": "success",
+                    "subject": rendered.get("subject"),
+                    "body": rendered.get("body"),
+                }
+                log = TemplateService._render_log(
+                    template,
+                    context,
+                    requested_by,
+                    rendered,
+                    latency=time.perf_counter() - started,
+                )
+
+            rendered_count += 1
+            if log is not None:
+                logs.append(log)
+            if len(logs) >= batch_size:
+                render_log_sink.submit_many(logs)
+                logs = []
+            if rendered_count >= batch_size:
+                template_usage.incr(base_key, rendered_count)
+                rendered_count = 0
+
+            yield item
+
+        render_log_sink.submit_many(logs)
+        template_usage.incr(base_key, rendered_count)
+
+    @staticmethod
+    def _render_log(
+        template, context, requested_by, result=None, error=None, latency=0.0
+    ):
+        """
+        Build the TemplateRenderLog for one render, or None if it is sampled out.
+
+        Failures are always logged. Successes are kept at the template's
+        log_sample_rate and store either the full body or only its hash and
+        length (log_body_mode); both fall back to the global
+        TEMPLATE_RENDER_LOG_SAMPLE_RATE / TEMPLATE_RENDER_LOG_BODY_MODE.
+        Every render, sampled or not, is added to the render stats rollup.
+        """
+        if error is not None:
+            render_stats.record(
+                template.id, success=False, logged=True, latency_ms=latency * 1000
+            )
+            return TemplateRenderLog(
+                template_id=template.id,
+                context_used=context,
+                rendered_body="",
+                success=False,
+                error_message=str(error),
+                requested_by=requested_by,
+            )
+
+        sample_rate = template.log_sample_rate
+        if sample_rate is None:
+            sample_rate = settings.TEMPLATE_RENDER_LOG_SAMPLE_RATE
+        logged = sample_rate >= 1 or random.random() < sample_rate
+        body = result.get("body") or ""
+        render_stats.record(
+            template.id,
+            success=True,
+            logged=logged,
+            latency_ms=latency * 1000,
+            size=len(body.encode("utf-8"))
+            + len((result.get("subject") or "").encode("utf-8")),
+        )
+        if not logged:
+            return None
+
+        log = TemplateRenderLog(
+            template_id=template.id,
+            context_used=context,
+            rendered_subject=result.get("subject"),
+            rendered_body=body,
+            body_length=len(body),
+            success=True,
+            requested_by=requested_by,
+        )
+        body_mode = template.log_body_mode or settings.TEMPLATE_RENDER_LOG_BODY_MODE
+        if body_mode == "hash":
+            log.rendered_body = ""
+            log.body_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        return log
+
     @staticmethod
     def get_available_variables(name, language="en", template_type="email"):
         """Get available variables for a template."""
         template = TemplateService.get_template(name, language, template_type)
-        if template and hasattr(template, "content"):
-            return template.content.extracted_variables
+        if template:
+            return list(template.variables)
         return []
 
+    @staticmethod
+    def get_cache_stats():
+        """Get hit/miss statistics for the process-local template caches."""
+        return {
+            "compiled_templates": compiled_templates.stats(),
+            "rendered_results": rendered_results.stats(),
+            "template_l1": template_l1.stats(),
+        }
+
+    @staticmethod
+    def preload_templates(limit=None):
+        """
+        Compile active templates into this process's compiled template cache.
+
+        All active templates (up to ``limit``, default the cache's capacity,
+        most recently updated first) are loaded with their content in one
+        query and compiled, so first renders in this process skip compiling.
+        The invalidation listener is started so entries of versions that
+        change later are dropped. Returns counts, elapsed time and the
+        process's resident memory growth.
+        """
+        started = time.perf_counter()
+        rss_before = _rss_bytes()
+        start_invalidation_listener()
+
+        templates = (
+            NotificationTemplate.objects.filter(is_active=True)
+            .select_related("content")
+            .order_by("-updated_at")[: limit or compiled_templates.max_entries]
+        )
+        compiled = failed = 0
+        for template in templates:
+            try:
+                TemplateRenderer(TemplateSnapshot.from_model(template)).compile()
+                compiled += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Could not precompile template {template.id}: {str(e)}")
+
+        rss_after = _rss_bytes()
+        return {
+            "templates_compiled": compiled,
+            "templates_failed": failed,
+            "seconds": round(time.perf_counter() - started, 3),
+            "compiled_cache_bytes": compiled_templates.stats()["bytes"],
+            "rss_bytes": rss_after,
+            "rss_growth_bytes": (
+                rss_after - rss_before if None not in (rss_before, rss_after) else None
+            ),
+        }
+
+    @staticmethod
+    def get_render_volume(template_id, days=7):
+        """Get exact per-day render counts for a template version, including sampled-out renders."""
+        today = timezone.localdate()
+        since = today - datetime.timedelta(days=days - 1)
+        rows = {
+            row["day"]: row
+            for row in TemplateRenderStat.objects.filter(
+                template_id=template_id, period="hour", bucket_start__date__gte=since
+            )
+            .annotate(day=TruncDate("bucket_start"))
+            .values("day")
+            .annotate(
+                rendered=Sum("render_count"),
+                failed=Sum("failure_count"),
+                logged=Sum("logged_count"),
+            )
+        }
+        days_out = []
+        for offset in range(days):
+            day = since + datetime.timedelta(days=offset)
+            row = rows.get(day, {})
+            days_out.append(
+                {
+                    "date": day.isoformat(),
+                    "rendered": row.get("rendered", 0),
+                    "failed": row.get("failed", 0),
+                    "logged": row.get("logged", 0),
+                }
+            )
+        return days_out
+
+    @staticmethod
+    def get_render_stats(template, period="hour", hours=24, all_versions=False):
+        """
+        Get rolled-up render metrics per bucket, newest first.
+
+        Reads only TemplateRenderStat. With all_versions, buckets of every
+        version of the template's name/language/type are summed.
+        """
+        stats = TemplateRenderStat.objects.filter(
+            period=period,
+            bucket_start__gte=timezone.now() - datetime.timedelta(hours=hours),
+        )
+        if all_versions:
+            stats = stats.filter(
+                template__name=template.name,
+                template__language=template.language,
+                template__template_type=template.template_type,
+            )
+        else:
+            stats = stats.filter(template_id=template.id)
+
+        buckets = []
+        totals = {"render_count": 0, "failure_count": 0, "bytes_rendered": 0}
+        for row in (
+            stats.values("bucket_start")
+            .annotate(
+                render_count=Sum("render_count"),
+                failure_count=Sum("failure_count"),
+                logged_count=Sum("logged_count"),
+                latency_sum_ms=Sum("latency_sum_ms"),
+                latency_max_ms=Max("latency_max_ms"),
+                bytes_rendered=Sum("bytes_rendered"),
+            )
+            .order_by("-bucket_start")
+        ):
+            latency_sum_ms = row.pop("latency_sum_ms")
+            row["latency_avg_ms"] = (
+                latency_sum_ms / row["render_count"] if row["render_count"] else 0.0
+            )
+            buckets.append(row)
+            for key in totals:
+                totals[key] += row[key]
+
+        return {
+            "template_name": template.name,
+            "language": template.language,
+            "template_type": template.template_type,
+            "version": None if all_versions else template.version,
+            "period": period,
+            "totals": totals,
+            "buckets": buckets,
+        }
+
     @staticmethod
     def get_templates_by_type(template_type="email"):
         """Get all active templates of a specific type."""
@@ -112,9 +514,15 @@ class TemplateVersionService:
 
     @staticmethod
     def create_new_version(
-        template_name, language, template_type, subject, body, description=None
+        template_name,
+        language,
+        template_type,
+        subject,
+        body,
+        description=None,
+        engine=None,
     ):
-        """Create a new version of a template."""
+        """Create a new version of a template, keeping the current engine by default."""
         current_template = NotificationTemplate.get_active_template(
             template_name, language, template_type
         )
@@ -122,30 +530,44 @@ class TemplateVersionService:
         if not current_template:
             raise ValueError(f"Template not found: {template_name}")
 
-        # Deactivate current version
-        NotificationTemplate.objects.filter(
-            name=current_template.name,
-            language=current_template.language,
-            template_type=current_template.template_type,
-            is_active=True,
-        ).update(is_active=False)
-
-        # Create new version
-        new_version = NotificationTemplate.objects.create(
-            name=current_template.name,
-            language=current_template.language,
-            template_type=current_template.template_type,
-            version=current_template.version + 1,
-            description=description or current_template.description,
-            is_active=True,
-        )
+        # Swap versions atomically so readers never see no active version
+        with transaction.atomic():
+            # Deactivate current version
+            NotificationTemplate.objects.filter(
+                name=current_template.name,
+                language=current_template.language,
+                template_type=current_template.template_type,
+                is_active=True,
+            ).update(is_active=False)
+
+            # Create new version
+            new_version = NotificationTemplate.objects.create(
+                name=current_template.name,
+                language=current_template.language,
+                template_type=current_template.template_type,
+                version=current_template.version + 1,
+                description=description or current_template.description,
+                cache_rendered_output=current_template.cache_rendered_output,
+                log_sample_rate=current_template.log_sample_rate,
+                log_body_mode=current_template.log_body_mode,
+                is_active=True,
+            )
 
-        # Create version content
-        TemplateContent.objects.create(template=new_version, subject=subject, body=body)
+            # Create version content
+            TemplateContent.objects.create(
+                template=new_version,
+                subject=subject,
+                body=body,
+                is_html=current_template.content.is_html,
+                engine=engine or current_template.content.engine,
+            )
 
         # Clear cache for this template
         TemplateService.clear_template_cache(
-            current_template.name, current_template.language, current_template.template_type
+            current_template.name,
+            current_template.language,
+            current_template.template_type,
+            template_ids=[current_template.id],
         )
 
         logger.info(
@@ -163,17 +585,22 @@ class TemplateVersionService:
             version=version,
         )
 
-        # Deactivate all versions
-        NotificationTemplate.objects.filter(
-            name=template_name, language=language, template_type=template_type
-        ).update(is_active=False)
+        with transaction.atomic():
+            # Deactivate all versions
+            versions = NotificationTemplate.objects.filter(
+                name=template_name, language=language, template_type=template_type
+            )
+            version_ids = list(versions.values_list("id", flat=True))
+            versions.update(is_active=False)
 
-        # Activate target version
-        target_template.is_active = True
-        target_template.save()
+            # Activate target version
+            target_template.is_active = True
+            target_template.save()
 
         # Clear cache
-        TemplateService.clear_template_cache(template_name, language, template_type)
+        TemplateService.clear_template_cache(
+            template_name, language, template_type, template_ids=version_ids
+        )
 
         logger.info(f"Rolled back {template_name} to version {version}")
         return target_template
@@ -182,19 +609,48 @@ class TemplateVersionService:
 class CeleryService:
     """Service for triggering Celery tasks."""
 
+    @staticmethod
+    def get_queues():
+        """Names of the declared task queues."""
+        from celery import current_app
+
+        return [queue.name for queue in current_app.conf.task_queues or ()]
+
+    @staticmethod
+    def _queue_options(queue):
+        """apply_async options sending a task to ``queue``, or its route if None."""
+        if queue is None:
+            return {}
+        if queue not in CeleryService.get_queues():
+            raise ValueError(f"Unknown queue: {queue}")
+        return {"queue": queue}
+
     @staticmethod
     def trigger_async_render(
-        template_name, context, language="en", template_type="email", requested_by=None
+        template_name,
+        context,
+        language="en",
+        template_type="email",
+        requested_by=None,
+        queue=None,
     ):
-        """Trigger asynchronous template rendering."""
+        """
+        Trigger asynchronous template rendering.
+
+        Renders go to the interactive queue; pass ``queue`` (e.g. "bulk") to
+        keep campaign-sized streams of single renders off it.
+        """
         from .tasks import render_template_async
 
-        task = render_template_async.delay(
-            template_name=template_name,
-            context=context,
-            language=language,
-            template_type=template_type,
-            requested_by=requested_by,
+        task = render_template_async.apply_async(
+            kwargs={
+                "template_name": template_name,
+                "context": context,
+                "language": language,
+                "template_type": template_type,
+                "requested_by": requested_by,
+            },
+            **CeleryService._queue_options(queue),
         )
 
         logger.info(
@@ -203,16 +659,237 @@ class CeleryService:
         return task.id
 
     @staticmethod
-    def trigger_bulk_render(render_requests):
-        """Trigger bulk template rendering."""
+    def trigger_async_render_idempotent(
+        template_name,
+        context,
+        language="en",
+        template_type="email",
+        requested_by=None,
+        queue=None,
+        idempotency_key=None,
+    ):
+        """
+        Trigger an async render unless the same request is already queued.
+
+        The first request claims its key with ``cache.add`` (SET NX on Redis)
+        storing the new task id; later requests with the key get that task
+        id back instead of queueing another render. Keys are scoped to
+        requested_by. Without an explicit idempotency_key the key is the
+        template, context hash and requester, held for TEMPLATE_RENDER_DEDUP_TTL
+        seconds. Returns (task_id, created).
+        """
+        from .tasks import render_template_async
+
+        options = CeleryService._queue_options(queue)
+        if idempotency_key:
+            ttl = settings.TEMPLATE_RENDER_IDEMPOTENCY_TTL
+        else:
+            ttl = settings.TEMPLATE_RENDER_DEDUP_TTL
+            digest = context_hash(context)
+            if not ttl or digest is None:
+                task_id = CeleryService.trigger_async_render(
+                    template_name, context, language, template_type, requested_by, queue
+                )
+                return task_id, True
+            idempotency_key = (
+                f"{TemplateCacheKeys.base(template_name, language, template_type)}:{digest}"
+            )
+        key = TemplateCacheKeys.idempotency(requested_by, idempotency_key)
+
+        task_id = str(uuid.uuid4())
+        while not cache.add(key, task_id, ttl):
+            existing = cache.get(key)
+            if existing is not None:
+                logger.info(
+                    f"Duplicate async render for template {template_name}, returning task {existing}"
+                )
+                return existing, False
+            # The key expired between add and get; try to claim it again
+
+        try:
+            render_template_async.apply_async(
+                kwargs={
+                    "template_name": template_name,
+                    "context": context,
+                    "language": language,
+                    "template_type": template_type,
+                    "requested_by": requested_by,
+                },
+                task_id=task_id,
+                **options,
+            )
+        except Exception:
+            # Let a retry of this request queue the render
+            cache.delete(key)
+            raise
+
+        logger.info(
+            f"Triggered async render task {task_id} for template {template_name}"
+        )
+        return task_id, True
+
+    @staticmethod
+    def trigger_bulk_render(render_requests, requested_by=None, queue=None):
+        """Trigger bulk template rendering; returns the BulkRenderJob tracking it."""
         from .tasks import bulk_render_templates
 
-        task = bulk_render_templates.delay(render_requests)
+        options = CeleryService._queue_options(queue)
+        task_id = str(uuid.uuid4())
+        job = BulkRenderJob.objects.create(
+            total=len(render_requests), task_id=task_id, requested_by=requested_by
+        )
+        try:
+            bulk_render_templates.apply_async(
+                args=[render_requests],
+                kwargs={"job_id": str(job.id), "queue": queue},
+                task_id=task_id,
+                **options,
+            )
+        except Exception as e:
+            # Nothing will pick the job up, so it must not stay pending
+            BulkRenderJob.mark_failed(job.id, e)
+            raise
 
         logger.info(
-            f"Triggered bulk render task {task.id} for {len(render_requests)} templates"
+            f"Triggered bulk render job {job.id} (task {task_id}) for {len(render_requests)} templates"
         )
-        return task.id
+        return job
+
+    @staticmethod
+    def trigger_bulk_render_file(
+        uploaded_file,
+        input_format=None,
+        template_name=None,
+        language="en",
+        template_type="email",
+        requested_by=None,
+        queue=None,
+    ):
+        """
+        Start a bulk render from an uploaded JSONL or CSV file of contexts.
+
+        The upload is copied chunk by chunk into TEMPLATE_BULK_UPLOAD_DIR and
+        only its path travels through the broker; a bulk worker reads it as
+        a stream and sends render chunks (see dispatch_bulk_render_file).
+        template_name etc. apply to rows that do not name their own
+        template. Returns the BulkRenderJob; its total is set once the file
+        has been read.
+        """
+        from .ingest import BulkRenderFile
+        from .tasks import ingest_bulk_render_file
+
+        input_format = input_format or BulkRenderFile.detect_format(uploaded_file.name)
+        if input_format not in BulkRenderFile.FORMATS:
+            raise ValueError(
+                f"Unsupported file format: {input_format or uploaded_file.name} "
+                f"(use {', '.join(BulkRenderFile.FORMATS)})"
+            )
+        options = CeleryService._queue_options(queue)
+
+        task_id = str(uuid.uuid4())
+        job = BulkRenderJob.objects.create(task_id=task_id, requested_by=requested_by)
+        path = os.path.join(settings.TEMPLATE_BULK_UPLOAD_DIR, f"{job.id}.{input_format}")
+        defaults = {
+            "template_name": template_name,
+            "language": language,
+            "template_type": template_type,
+            "requested_by": requested_by,
+        }
+        try:
+            os.makedirs(settings.TEMPLATE_BULK_UPLOAD_DIR, exist_ok=True)
+            with open(path, "wb") as spool:
+                for chunk in uploaded_file.chunks():
+                    spool.write(chunk)
+            ingest_bulk_render_file.apply_async(
+                args=[str(job.id), path, input_format, defaults, queue],
+                task_id=task_id,
+                **options,
+            )
+        except Exception as e:
+            # Nothing will pick the job up, so it must not stay pending
+            BulkRenderJob.mark_failed(job.id, e)
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+        logger.info(
+            f"Triggered bulk render job {job.id} (task {task_id}) from file {uploaded_file.name}"
+        )
+        return job
+
+    @staticmethod
+    def get_task_status(task_id):
+        """
+        Report a task's Celery state, plus bulk job progress when it has one.
+
+        Progress is read from the BulkRenderJob row, whose counters are exact,
+        and falls back to the PROGRESS metadata the bulk task publishes. An
+        unknown task id is indistinguishable from a queued one: both PENDING.
+        """
+        from .tasks import PROGRESS_STATE
+
+        result = AsyncResult(task_id)
+        state = result.state
+        job = BulkRenderJob.objects.filter(task_id=task_id).first()
+
+        payload = {"task_id": task_id, "state": state, "ready": state in READY_STATES}
+        if job is not None:
+            payload["ready"] = payload["ready"] or job.status in (
+                BulkRenderJob.COMPLETED,
+                BulkRenderJob.FAILED,
+            )
+            payload["progress"] = {
+                "job_id": str(job.id),
+                "status": job.status,
+                "total": job.total,
+                "processed": job.processed,
+                "succeeded": job.succeeded,
+                "failed": job.failed,
+            }
+            payload["results_url"] = f"/api/v1/bulk-jobs/{job.id}/results/"
+        elif state == PROGRESS_STATE and isinstance(result.info, dict):
+            payload["progress"] = result.info
+        else:
+            payload["progress"] = None
+
+        # Custom PROGRESS metadata need not carry processed/total counters
+        progress = payload["progress"] or {}
+        total, processed = progress.get("total"), progress.get("processed", 0)
+        numbers = (int, float)
+        if isinstance(total, numbers) and total > 0 and isinstance(processed, numbers):
+            progress["percent"] = round(100 * processed / total, 1)
+
+        if state == "SUCCESS":
+            payload["result"] = result.result
+        elif state == "FAILURE":
+            payload["error"] = str(result.result)
+        return payload
+
+    @staticmethod
+    def wait_for_task_status(task_id, wait=0):
+        """
+        Long-poll: return once the status changes or the task is ready.
+
+        Waits at most ``wait`` seconds (capped at TEMPLATE_TASK_STATUS_MAX_WAIT),
+        re-reading the state every TEMPLATE_TASK_STATUS_POLL_INTERVAL seconds;
+        the status as of the deadline is returned if nothing changed. The
+        wait sleeps in the request, so under sync workers it occupies a
+        worker for its whole length.
+        """
+        # NaN compares false with everything and would slip through min/max
+        if math.isnan(wait):
+            wait = 0
+        wait = min(max(wait, 0), settings.TEMPLATE_TASK_STATUS_MAX_WAIT)
+        deadline = time.monotonic() + wait
+        initial = CeleryService.get_task_status(task_id)
+        current = initial
+        while not current["ready"] and current == initial:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(settings.TEMPLATE_TASK_STATUS_POLL_INTERVAL, remaining))
+            current = CeleryService.get_task_status(task_id)
+        return current
 
     @staticmethod
     def trigger_cache_warmup():
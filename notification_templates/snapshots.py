@@ -0,0 +1,170 @@
+import json
+import logging
+import uuid
+import zlib
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateSnapshot:
+    """
+    Immutable, compact view of a template version holding exactly what rendering needs.
+
+    Snapshots are what the template caches store instead of pickled model
+    instances. ``to_bytes``/``from_bytes`` use a small versioned format:
+    one format-version byte, one encoding byte (``j`` for JSON, ``z`` for
+    zlib-compressed JSON) and a JSON array of the fields in ``__slots__``
+    order.
+    """
+
+    FORMAT_VERSION = 1
+    RAW = b"j"
+    COMPRESSED = b"z"
+
+    __slots__ = (
+        "id",
+        "name",
+        "language",
+        "template_type",
+        "version",
+        "subject",
+        "body",
+        "is_html",
+        "engine",
+        "variables",
+        "compiled_segments",
+        "cache_rendered_output",
+        "log_sample_rate",
+        "log_body_mode",
+    )
+
+    def __init__(
+        self,
+        id,
+        name,
+        language,
+        template_type,
+        version,
+        subject,
+        body,
+        is_html=True,
+        engine="django",
+        variables=(),
+        compiled_segments=None,
+        cache_rendered_output=False,
+        log_sample_rate=None,
+        log_body_mode="",
+    ):
+        values = locals()
+        for field in self.__slots__:
+            object.__setattr__(self, field, values[field])
+        object.__setattr__(self, "variables", tuple(variables))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, TemplateSnapshot):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __hash__(self):
+        return hash((self.id, self.version))
+
+    def __repr__(self):
+        return f"<TemplateSnapshot {self.name} ({self.language}, {self.template_type}) v{self.version}>"
+
+    def __reduce__(self):
+        return (self.from_bytes, (self.to_bytes(),))
+
+    def cache_key(self):
+        """
+        Key for this version's entries in the process-local caches.
+
+        The source is part of the key, so content edited in place under the
+        same id and version never matches an older entry, even if the
+        invalidation broadcast is missed. The id comes first so entries can
+        still be evicted by template id.
+        """
+        return (str(self.id), self.version, self.engine, self.is_html, self.subject, self.body)
+
+    @classmethod
+    def from_model(cls, template):
+        """Build a snapshot from a NotificationTemplate with its content loaded."""
+        content = template.content
+        return cls(
+            id=template.id,
+            name=template.name,
+            language=template.language,
+            template_type=template.template_type,
+            version=template.version,
+            subject=content.subject,
+            body=content.body,
+            is_html=content.is_html,
+            engine=content.engine,
+            variables=content.extracted_variables or (),
+            compiled_segments=content.compiled_segments,
+            cache_rendered_output=template.cache_rendered_output,
+            log_sample_rate=template.log_sample_rate,
+            log_body_mode=template.log_body_mode,
+        )
+
+    @classmethod
+    def coerce(cls, template):
+        """Return template as a snapshot, converting model instances."""
+        if isinstance(template, cls):
+            return template
+        return cls.from_model(template)
+
+    def to_bytes(self, compress_min_bytes=None):
+        """Serialize; payloads of at least compress_min_bytes are zlib-compressed."""
+        if compress_min_bytes is None:
+            compress_min_bytes = getattr(
+                settings, "TEMPLATE_SNAPSHOT_COMPRESS_MIN_BYTES", 2048
+            )
+
+        values = [getattr(self, field) for field in self.__slots__]
+        values[0] = str(self.id)
+        payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+
+        encoding = self.RAW
+        if compress_min_bytes and len(payload) >= compress_min_bytes:
+            payload = zlib.compress(payload)
+            encoding = self.COMPRESSED
+        return bytes([self.FORMAT_VERSION]) + encoding + payload
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Deserialize bytes produced by to_bytes; raise ValueError on unknown formats."""
+        if not isinstance(data, (bytes, bytearray)) or len(data) < 2:
+            raise ValueError("Not a template snapshot payload")
+        if data[0] != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported template snapshot format: {data[0]}")
+
+        encoding, payload = data[1:2], data[2:]
+        if encoding == cls.COMPRESSED:
+            payload = zlib.decompress(payload)
+        elif encoding != cls.RAW:
+            raise ValueError(f"Unsupported template snapshot encoding: {encoding!r}")
+
+        values = json.loads(payload)
+        values[0] = uuid.UUID(values[0])
+        return cls(*values)
+
+    @classmethod
+    def loads(cls, data):
+        """Decode a cached payload, returning None for stale or foreign entries."""
+        if data is None:
+            return None
+        try:
+            return cls.from_bytes(data)
+        except (ValueError, zlib.error) as e:
+            logger.debug(f"Ignoring undecodable template cache entry: {str(e)}")
+            return None
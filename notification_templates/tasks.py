@@ -1,37 +1,115 @@
 import logging
+import os
+import time
 
-from celery import shared_task
+from celery import chord, group, shared_task
+from celery.exceptions import Ignore
+from django.conf import settings
 from django.core.cache import cache
 from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
-from .models import NotificationTemplate, TemplateRenderLog
+from .cache import TemplateCacheKeys, template_usage
+from .logsink import render_log_sink
+from .models import BulkRenderJob, BulkRenderResult, NotificationTemplate
 from .services import TemplateService
+from .snapshots import TemplateSnapshot
 
 logger = logging.getLogger(__name__)
 
 
+WARMUP_STATE_KEY = "template_warmup:last"
+# Custom Celery state carrying a bulk job's counters while its chunks run
+PROGRESS_STATE = "PROGRESS"
+
+
 @shared_task
 def warm_template_cache():
-    """Warm up cache for frequently used templates."""
+    """
+    Warm up cache for the most frequently rendered templates.
+
+    Picks the top TEMPLATE_WARMUP_TOP_K templates by renders in the last
+    TEMPLATE_WARMUP_WINDOW seconds, loads them in one query and writes them
+    with a single set_many; templates invalidated while the run was loading
+    them are skipped. The result also reports how many of the
+    templates warmed by the previous run were rendered (hit) or not (missed)
+    since then.
+    """
     try:
-        frequent_templates = NotificationTemplate.objects.filter(
-            is_active=True
-        ).select_related("content")[:50]  # Cache top 50 templates
-
-        cache_keys = []
-        for template in frequent_templates:
-            cache_key = (
-                f"template_{template.name}_{template.language}_{template.template_type}"
+        template_usage.flush()
+        top_k = settings.TEMPLATE_WARMUP_TOP_K
+        top_keys = template_usage.top(top_k, settings.TEMPLATE_WARMUP_WINDOW)
+
+        active = NotificationTemplate.objects.filter(is_active=True).select_related(
+            "content"
+        )
+        if top_keys:
+            candidate_keys = list(top_keys)
+        else:
+            # No usage recorded yet (fresh deploy): fall back to any active templates
+            candidate_keys = [
+                TemplateCacheKeys.base(*row)
+                for row in active.values_list("name", "language", "template_type")[:top_k]
+            ]
+
+        # Read the generations before loading the templates, as get_template
+        # does: a version swap that lands in between bumps the generation, and
+        # the snapshot loaded here is skipped instead of cached as current.
+        generations = TemplateCacheKeys.generations(candidate_keys)
+
+        base_keys = {}
+        if candidate_keys:
+            lookup = Q()
+            for base_key in candidate_keys:
+                name, language, template_type = TemplateCacheKeys.parse(base_key)
+                lookup |= Q(name=name, language=language, template_type=template_type)
+            base_keys = {
+                TemplateCacheKeys.base(
+                    template.name, template.language, template.template_type
+                ): template
+                for template in active.filter(lookup)
+            }
+
+        current = TemplateCacheKeys.generations(base_keys)
+        entries = {}
+        skipped = 0
+        for base_key, template in base_keys.items():
+            if current[base_key] != generations.get(base_key):
+                skipped += 1
+                continue
+            entries[TemplateCacheKeys.versioned(base_key, current[base_key])] = (
+                TemplateSnapshot.from_model(template).to_bytes()
             )
-            cache.set(cache_key, template, 1800)  # 30 minutes
-            cache_keys.append(cache_key)
+        cache.set_many(entries, settings.CACHE_TTL)
+        cache_keys = list(entries)
+
+        # Score the previous run: which warmed templates were actually used
+        previous_window = None
+        previous = cache.get(WARMUP_STATE_KEY)
+        if previous:
+            counts = template_usage.counts_since(previous["keys"], previous["at"])
+            hits = len([count for count in counts.values() if count > 0])
+            previous_window = {
+                "warmed": len(previous["keys"]),
+                "hit": hits,
+                "missed": len(previous["keys"]) - hits,
+                "since": previous["at"],
+            }
+        cache.set(
+            WARMUP_STATE_KEY, {"keys": list(base_keys), "at": time.time()}, None
+        )
 
-        logger.info(f"Warmed up cache for {len(frequent_templates)} templates")
+        logger.info(
+            f"Warmed up cache for {len(cache_keys)} templates, skipped {skipped} changed during warmup (previous window: {previous_window})"
+        )
         return {
             "status": "success",
-            "templates_cached": len(frequent_templates),
+            "templates_cached": len(cache_keys),
+            "selection": "usage" if top_keys else "fallback",
             "cache_keys": cache_keys,
+            "skipped_stale": skipped,
+            "previous_window": previous_window,
         }
 
     except Exception as e:
@@ -41,41 +119,34 @@ def warm_template_cache():
 
 @shared_task
 def cleanup_old_render_logs(days=30):
-    """Clean up old render logs."""
+    """
+    Clean up old render logs.
+
+    On a partitioned table (PostgreSQL) expired partitions are detached and
+    dropped; otherwise rows are deleted in chunks, each in its own
+    transaction.
+    """
     from datetime import timedelta
 
     from django.utils import timezone
 
+    from .partitions import RenderLogPartitions
+
     try:
         cutoff_date = timezone.now() - timedelta(days=days)
 
-        with transaction.atomic():
-            # Get count before deletion for logging
-            logs_to_delete = TemplateRenderLog.objects.filter(
-                created_at__lt=cutoff_date
-            )
-
-            # Delete in chunks to avoid large transactions
-            deleted_count = 0
-            batch_size = 1000
-
-            while True:
-                batch = logs_to_delete[:batch_size]
-                if not batch:
-                    break
-
-                batch_ids = list(batch.values_list("id", flat=True))
-                deleted, _ = TemplateRenderLog.objects.filter(id__in=batch_ids).delete()
-                deleted_count += deleted
-
-                logger.info(f"Deleted batch of {deleted} render logs")
+        partitions_dropped = []
+        if RenderLogPartitions.is_partitioned():
+            partitions_dropped = RenderLogPartitions.drop_partitions_before(cutoff_date)
+        deleted_count = RenderLogPartitions.delete_before(cutoff_date)
 
         logger.info(
-            f"Cleaned up {deleted_count} old render logs (older than {days} days)"
+            f"Cleaned up {deleted_count} old render logs and {len(partitions_dropped)} partitions (older than {days} days)"
         )
         return {
             "status": "success",
             "logs_deleted": deleted_count,
+            "partitions_dropped": partitions_dropped,
             "days_retained": days,
         }
 
@@ -84,6 +155,47 @@ def cleanup_old_render_logs(days=30):
         return {"status": "error", "error": str(e)}
 
 
+@shared_task
+def cleanup_render_stats():
+    """Delete render stat buckets past their retention."""
+    from datetime import timedelta
+
+    from .models import TemplateRenderStat
+
+    try:
+        retention = {
+            "minute": settings.TEMPLATE_RENDER_STATS_MINUTE_RETENTION_DAYS,
+            "hour": settings.TEMPLATE_RENDER_STATS_HOUR_RETENTION_DAYS,
+        }
+        deleted_count = 0
+        for period, days in retention.items():
+            deleted, _ = TemplateRenderStat.objects.filter(
+                period=period, bucket_start__lt=timezone.now() - timedelta(days=days)
+            ).delete()
+            deleted_count += deleted
+
+        logger.info(f"Cleaned up {deleted_count} render stat buckets")
+        return {"status": "success", "buckets_deleted": deleted_count}
+
+    except Exception as e:
+        logger.error(f"Error cleaning up render stats: {str(e)}")
+        return {"status": "error", "error": str(e)}
+
+
+@shared_task
+def create_render_log_partitions(ahead=None):
+    """Create render log partitions ahead of time (PostgreSQL only)."""
+    from .partitions import RenderLogPartitions
+
+    try:
+        created = RenderLogPartitions.ensure_partitions(ahead)
+        return {"status": "success", "partitions_created": created}
+
+    except Exception as e:
+        logger.error(f"Error creating render log partitions: {str(e)}")
+        return {"status": "error", "error": str(e)}
+
+
 @shared_task
 def health_check():
     """Celery health check task."""
@@ -104,6 +216,8 @@ def health_check():
             "database": "connected",
             "cache": "connected" if cache_status else "disconnected",
             "active_templates": template_count,
+            "template_caches": TemplateService.get_cache_stats(),
+            "render_log_sink": render_log_sink.stats(),
             "timestamp": timezone.now().isoformat(),
         }
 
@@ -138,11 +252,18 @@ def render_template_async(
         return {"status": "error", "template_name": template_name, "error": str(e)}
 
 
-@shared_task
-def bulk_render_templates(render_requests):
+@shared_task(bind=True)
+def bulk_render_templates(self, render_requests, job_id=None, queue=None):
     """
     Bulk render multiple templates asynchronously.
 
+    Items are grouped by template (name, language, type) and requester,
+    split into chunks of TEMPLATE_BULK_RENDER_CHUNK_SIZE and rendered by
+    render_bulk_chunk tasks in parallel. Results go to BulkRenderResult rows
+    of the job (created here when job_id is not given); this task is replaced
+    by the chord, so its own result is the small aggregate_bulk_render
+    summary.
+
     Args:
         render_requests: List of dictionaries with template rendering parameters
         Example:
@@ -158,53 +279,317 @@ def bulk_render_templates(render_requests):
                 'language': 'en'
             }
         ]
+        job_id: BulkRenderJob to record results against
+        queue: Queue for the chunk and callback tasks instead of their routes
     """
     try:
-        from .services import TemplateService
+        if job_id is None:
+            job_id = str(
+                BulkRenderJob.objects.create(
+                    total=len(render_requests), task_id=self.request.id
+                ).id
+            )
+        BulkRenderJob.objects.filter(id=job_id).update(
+            status=BulkRenderJob.RUNNING, updated_at=timezone.now()
+        )
+        _publish_bulk_progress(job_id)
+
+        groups = {}
+        for index, request in enumerate(render_requests):
+            key = (
+                request["template_name"],
+                request.get("language", "en"),
+                request.get("template_type", "email"),
+                request.get("requested_by", "bulk_render"),
+            )
+            groups.setdefault(key, []).append((index, request["context"]))
 
-        results = []
-        for request in render_requests:
-            try:
-                result = TemplateService.render_template(
-                    template_name=request["template_name"],
-                    context=request["context"],
-                    language=request.get("language", "en"),
-                    template_type=request.get("template_type", "email"),
-                    requested_by=request.get("requested_by", "bulk_render"),
-                )
-                results.append(
-                    {
-                        "template_name": request["template_name"],
-                        "status": "success",
-                        "rendered_subject": result.get("subject"),
-                        "body_preview": result.get("body", "")[:100] + "..."
-                        if result.get("body")
-                        else "",
-                    }
-                )
-            except Exception as e:
-                results.append(
-                    {
-                        "template_name": request["template_name"],
-                        "status": "error",
-                        "error": str(e),
-                    }
-                )
+        options = {"queue": queue} if queue else {}
+        chunk_size = settings.TEMPLATE_BULK_RENDER_CHUNK_SIZE
+        chunks = [
+            render_bulk_chunk.s(job_id, *key, items[start : start + chunk_size]).set(
+                **options
+            )
+            for key, items in groups.items()
+            for start in range(0, len(items), chunk_size)
+        ]
+        if not chunks:
+            _complete_bulk_job(job_id)
+            return aggregate_bulk_render([], job_id)
 
         logger.info(
-            f"Bulk render completed: {len([r for r in results if r['status'] == 'success'])} successful, {len([r for r in results if r['status'] == 'error'])} failed"
+            f"Bulk render job {job_id}: {len(render_requests)} items split into {len(chunks)} chunks over {len(groups)} templates"
         )
+        return self.replace(chord(group(chunks), aggregate_bulk_render.s(job_id).set(**options)))
 
-        return {
-            "status": "completed",
-            "total_requests": len(render_requests),
-            "successful": len([r for r in results if r["status"] == "success"]),
-            "failed": len([r for r in results if r["status"] == "error"]),
-            "results": results,
+    except Ignore:
+        raise
+    except Exception as e:
+        logger.error(f"Bulk render task failed: {str(e)}")
+        if job_id is not None:
+            BulkRenderJob.mark_failed(job_id, e)
+        return {"status": "error", "job_id": job_id, "error": str(e)}
+
+
+@shared_task
+def render_bulk_chunk(
+    job_id, template_name, language, template_type, requested_by, items
+):
+    """
+    Render one chunk of a bulk job; every item uses the same template.
+
+    The template is fetched and compiled once for the whole chunk. items is
+    a list of (index, context) pairs, index being the item's position in the
+    original request list. Results are bulk inserted and the job counters
+    incremented in one transaction; the chunk that completes the count marks
+    the job completed. A chunk that raises marks the job failed.
+    """
+    try:
+        template = TemplateService.get_template(template_name, language, template_type)
+        if not template:
+            error = f"Template not found: {template_name} ({language})"
+            results = [
+                BulkRenderResult(
+                    job_id=job_id,
+                    index=index,
+                    template_name=template_name,
+                    success=False,
+                    error_message=error,
+                )
+                for index, _ in items
+            ]
+        else:
+            results = []
+            rendered = TemplateService.iter_render_batch(
+                template, [context for _, context in items], requested_by
+            )
+            # Exhaust the generator so its last batch of render logs is submitted
+            for item in rendered:
+                result = BulkRenderResult(
+                    job_id=job_id,
+                    index=items[item["index"]][0],
+                    template_name=template_name,
+                )
+                if item["status"] == "success":
+                    result.rendered_subject = item.get("subject")
+                    result.rendered_body = item.get("body") or ""
+                else:
+                    result.success = False
+                    result.error_message = item["error"]
+                results.append(result)
+
+        failed = _record_bulk_results(job_id, results)
+        _complete_bulk_job(job_id)
+        _publish_bulk_progress(job_id)
+    except Exception as e:
+        # A failed chunk means the chord callback never runs, so the job
+        # would otherwise stay running forever
+        logger.error(f"Bulk render chunk of job {job_id} failed: {str(e)}")
+        BulkRenderJob.mark_failed(job_id, e)
+        raise
+    return {"successful": len(results) - failed, "failed": failed}
+
+
+def _record_bulk_results(job_id, results):
+    """Insert results and add them to the job counters atomically; returns failures."""
+    failed = len([result for result in results if not result.success])
+    with transaction.atomic():
+        BulkRenderResult.objects.bulk_create(
+            results, batch_size=settings.TEMPLATE_RENDER_LOG_BATCH_SIZE
+        )
+        BulkRenderJob.objects.filter(id=job_id).update(
+            processed=F("processed") + len(results),
+            succeeded=F("succeeded") + len(results) - failed,
+            failed=F("failed") + failed,
+            updated_at=timezone.now(),
+        )
+    return failed
+
+
+def _complete_bulk_job(job_id):
+    """Mark the job completed once every item has been processed."""
+    BulkRenderJob.objects.filter(
+        id=job_id, status=BulkRenderJob.RUNNING, processed__gte=F("total")
+    ).update(
+        status=BulkRenderJob.COMPLETED,
+        completed_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def _publish_bulk_progress(job_id):
+    """
+    Store the job's counters as the bulk task's PROGRESS state.
+
+    Chunks run under their own task ids, so the state is written against the
+    job's task_id, the id clients were given. The chord callback runs after
+    every chunk has returned, so its result always replaces the last update.
+    Jobs ingested from a file have no chord: once such a job is completed
+    its summary is stored as the task's SUCCESS result here instead.
+    """
+    job = BulkRenderJob.objects.filter(id=job_id).first()
+    if not job or not job.task_id:
+        return
+    if job.status == BulkRenderJob.COMPLETED:
+        state, meta = "SUCCESS", _bulk_summary(job)
+    else:
+        state = PROGRESS_STATE
+        meta = {
+            "job_id": str(job.id),
+            "total": job.total,
+            "processed": job.processed,
+            "succeeded": job.succeeded,
+            "failed": job.failed,
         }
+    try:
+        bulk_render_templates.update_state(task_id=job.task_id, state=state, meta=meta)
+    except Exception as e:
+        logger.warning(f"Could not publish progress of bulk job {job_id}: {str(e)}")
+
+
+def _bulk_summary(job):
+    return {
+        "status": job.status,
+        "job_id": str(job.id),
+        "total_requests": job.total,
+        "successful": job.succeeded,
+        "failed": job.failed,
+        "results_url": f"/api/v1/bulk-jobs/{job.id}/results/",
+    }
 
+
+@shared_task
+def aggregate_bulk_render(chunk_results, job_id):
+    """Chord callback: report the job's totals (results stay in the database)."""
+    job = BulkRenderJob.objects.get(id=job_id)
+
+    logger.info(
+        f"Bulk render job {job_id} {job.status}: {job.succeeded} successful, {job.failed} failed"
+    )
+
+    return _bulk_summary(job)
+
+
+def dispatch_bulk_render_file(job_id, fileobj, input_format, defaults=None, queue=None):
+    """
+    Parse a JSONL/CSV file of render requests into render_bulk_chunk tasks.
+
+    The file is read as a stream. Rows are buffered per template and
+    requester, and a chunk task is sent as soon as a buffer holds
+    TEMPLATE_BULK_RENDER_CHUNK_SIZE rows; if the buffers together pass
+    TEMPLATE_BULK_INGEST_MAX_BUFFERED rows (many templates interleaved) they
+    are all sent early. Rows that cannot be parsed are stored as failed
+    results. The job stays pending while the file is read, then gets its
+    total and becomes running, so chunks that finish early cannot complete
+    it. Returns the number of rows read.
+    """
+    from .ingest import BulkRenderFile
+
+    options = {"queue": queue} if queue else {}
+    chunk_size = settings.TEMPLATE_BULK_RENDER_CHUNK_SIZE
+    max_buffered = settings.TEMPLATE_BULK_INGEST_MAX_BUFFERED
+    buffers = {}
+    buffered = 0
+    invalid = []
+    chunks_sent = 0
+
+    def send(key):
+        render_bulk_chunk.apply_async(args=[job_id, *key, buffers.pop(key)], **options)
+
+    total = 0
+    for index, request in enumerate(
+        BulkRenderFile(fileobj, input_format, **(defaults or {}))
+    ):
+        total += 1
+        if "error" in request:
+            invalid.append(
+                BulkRenderResult(
+                    job_id=job_id,
+                    index=index,
+                    template_name=(defaults or {}).get("template_name") or "",
+                    success=False,
+                    error_message=request["error"],
+                )
+            )
+            if len(invalid) >= chunk_size:
+                _record_bulk_results(job_id, invalid)
+                invalid = []
+            continue
+
+        key = tuple(request[field] for field in BulkRenderFile.REQUEST_FIELDS)
+        items = buffers.setdefault(key, [])
+        items.append((index, request["context"]))
+        buffered += 1
+        if len(items) >= chunk_size:
+            buffered -= len(items)
+            send(key)
+            chunks_sent += 1
+        elif buffered >= max_buffered:
+            for pending in list(buffers):
+                send(pending)
+                chunks_sent += 1
+            buffered = 0
+
+    for pending in list(buffers):
+        send(pending)
+        chunks_sent += 1
+    if invalid:
+        _record_bulk_results(job_id, invalid)
+
+    BulkRenderJob.objects.filter(id=job_id).update(
+        total=total, status=BulkRenderJob.RUNNING, updated_at=timezone.now()
+    )
+    _complete_bulk_job(job_id)
+    _publish_bulk_progress(job_id)
+
+    logger.info(
+        f"Bulk render job {job_id}: {total} rows read from file into {chunks_sent} chunks"
+    )
+    return total
+
+
+@shared_task(bind=True)
+def ingest_bulk_render_file(
+    self, job_id, path, input_format, defaults=None, queue=None
+):
+    """
+    Read a spooled bulk render upload and fan it out to render_bulk_chunk tasks.
+
+    The spooled file is deleted afterwards. The task runs under the job's
+    task id and ends with Ignore, so its own return value never overwrites
+    the progress and final summary published for the job.
+    """
+    try:
+        with open(path, "rb") as fileobj:
+            dispatch_bulk_render_file(job_id, fileobj, input_format, defaults, queue)
     except Exception as e:
-        logger.error(f"Bulk render task failed: {str(e)}")
+        logger.error(f"Bulk render file ingestion failed for job {job_id}: {str(e)}")
+        BulkRenderJob.mark_failed(job_id, e)
+        raise
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    raise Ignore()
+
+
+@shared_task
+def cleanup_bulk_render_jobs(days=None):
+    """Delete bulk render jobs, and their results, older than the retention period."""
+    from datetime import timedelta
+
+    try:
+        days = days or settings.TEMPLATE_BULK_JOB_RETENTION_DAYS
+        deleted, _ = BulkRenderJob.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+
+        logger.info(f"Cleaned up {deleted} bulk render jobs and results")
+        return {"status": "success", "rows_deleted": deleted}
+
+    except Exception as e:
+        logger.error(f"Error cleaning up bulk render jobs: {str(e)}")
         return {"status": "error", "error": str(e)}
 
 
@@ -216,7 +601,7 @@ def update_template_cache_for_template(template_id):
 
         # Clear existing cache
         TemplateService.clear_template_cache(
-            template.name, template.language, template.template_type
+            template.name, template.language, template.template_type, template_ids=[template.id]
         )
 
         # Warm cache
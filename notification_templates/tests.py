@@ -1,8 +1,46 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.template import Context, Engine
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import NotificationTemplate, TemplateContent
-from .services import TemplateVersionService
+from .cache import (
+    LRUCache,
+    SingleFlight,
+    TemplateCacheKeys,
+    compiled_templates,
+    rendered_results,
+    template_usage,
+    template_l1,
+)
+from .exports import RenderLogExport
+from .ingest import BulkRenderFile
+from .logsink import RenderLogSink, render_log_sink, render_stats
+from .models import (
+    BulkRenderJob,
+    NotificationTemplate,
+    TemplateContent,
+    TemplateRenderLog,
+    TemplateRenderStat,
+)
+from .partitions import RenderLogPartitions
+from .services import TemplateService, TemplateVersionService
+from .snapshots import TemplateSnapshot
+from .utils import SegmentTemplate, TemplateRenderer, compile_segments
 
 
 class TemplateVersionServiceTest(TestCase):
@@ -142,3 +180,1400 @@ class TemplateAPITest(TestCase):
         self.assertFalse(v1.is_active)
         self.assertTrue(v2.is_active)
         self.assertFalse(v3.is_active)
+
+
+class CompiledTemplateCacheTest(TestCase):
+    def setUp(self):
+        compiled_templates.clear()
+        self.template = NotificationTemplate.objects.create(
+            name="cached_template", language="en", template_type="email"
+        )
+        TemplateContent.objects.create(
+            template=self.template,
+            subject="Hi {{user_name}}",
+            body="<p>Hello {{user_name}}</p>",
+        )
+
+    def test_render_reuses_compiled_template(self):
+        renderer = TemplateRenderer(self.template)
+        renderer.render({"user_name": "Ada"})
+        result = renderer.render({"user_name": "Grace"})
+
+        self.assertEqual(result["subject"], "Hi Grace")
+        stats = compiled_templates.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_new_version_invalidates_compiled_template(self):
+        TemplateRenderer(self.template).render({"user_name": "Ada"})
+
+        new_version = TemplateVersionService.create_new_version(
+            self.template.name, "en", "email", "Hey {{user_name}}", "New body"
+        )
+
+        self.assertEqual(compiled_templates.stats()["entries"], 0)
+        result = TemplateRenderer(new_version).render({"user_name": "Ada"})
+        self.assertEqual(result["subject"], "Hey Ada")
+
+    def test_content_edited_in_place_is_recompiled_without_invalidation(self):
+        TemplateRenderer(self.template).render({"user_name": "Ada"})
+
+        # As if this process missed the invalidation broadcast
+        with mock.patch("notification_templates.models.broadcast_invalidation"):
+            content = self.template.content
+            content.subject = "Hey {{user_name}}"
+            content.save()
+        self.template.refresh_from_db()
+
+        result = TemplateRenderer(self.template).render({"user_name": "Ada"})
+        self.assertEqual(result["subject"], "Hey Ada")
+
+    def test_lru_respects_entry_and_byte_limits(self):
+        lru = LRUCache("test", max_entries=2, max_bytes=10)
+        lru.set("a", 1, size=4)
+        lru.set("b", 2, size=4)
+        lru.get("a")
+        lru.set("c", 3, size=4)
+
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), 1)
+        self.assertEqual(lru.stats()["evictions"], 1)
+
+        lru.set("big", 4, size=11)
+        self.assertIsNone(lru.get("big"))
+
+
+class FastPathParityTest(TestCase):
+    """The segment fast path must produce exactly what the Django engine does."""
+
+    sources = [
+        "👋 Welcome {{user_name}}! Your {{app_name}} account is ready. Tap to explore features.",
+        "💳 Payment successful! ${{amount}} charged for {{service_name}}. Receipt: {{receipt_link}}",
+        '💬 New message from {{sender_name}}: "{{message_preview}}..."',
+        "{{user_name}}{{app_name}}",
+        "<p>Hello {{ user_name }},</p><a href=\"{{setup_link}}\">Setup</a>",
+        "No variables at all",
+        "Unclosed {{ brace",
+        "",
+    ]
+    contexts = [
+        {"user_name": "Ada", "app_name": "Acme", "amount": 10},
+        {"user_name": "<script>alert('x')</script>", "app_name": "A & B"},
+        {"amount": 12.5, "sender_name": None, "message_preview": ["a", "<b>"]},
+        {"amount": Decimal("9.99"), "receipt_link": "https://x.io/?a=1&b=2"},
+        {"user_name": True, "setup_link": datetime.date(2024, 1, 31)},
+        {},
+    ]
+
+    def test_variable_only_templates_match_django_engine(self):
+        engine = Engine.get_default()
+        for source in self.sources:
+            segments = compile_segments(source)
+            self.assertIsNotNone(segments, source)
+            for context in self.contexts:
+                with self.subTest(source=source, context=context):
+                    expected = engine.from_string(source).render(Context(context))
+                    actual = SegmentTemplate(segments).render(context)
+                    self.assertEqual(actual, expected)
+
+    def test_tags_filters_and_lookups_use_django_engine(self):
+        for source in [
+            "{% if user_name %}Hi{% endif %}",
+            "{{ user_name|upper }}",
+            "{{ user.name }}",
+            "{# comment #}{{ user_name }}",
+            "{{ _private }}",
+            "{{ None }}",
+        ]:
+            with self.subTest(source=source):
+                self.assertIsNone(compile_segments(source))
+
+    def test_segments_are_compiled_on_save(self):
+        template = NotificationTemplate.objects.create(name="fast_path")
+        content = TemplateContent.objects.create(
+            template=template,
+            subject="Hi {{user_name}}",
+            body="{% for item in items %}{{ item }}{% endfor %}",
+        )
+
+        self.assertEqual(content.compiled_segments["subject"], ["Hi ", "user_name", ""])
+        self.assertIsNone(content.compiled_segments["body"])
+
+        compiled_templates.clear()
+        result = TemplateRenderer(template).render(
+            {"user_name": "<Ada>", "items": ["a", "b"]}
+        )
+        self.assertEqual(result["subject"], "Hi &lt;Ada&gt;")
+        self.assertEqual(result["body"], "ab")
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+class TemplateBatchRenderAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        self.client = APIClient()
+        template = NotificationTemplate.objects.create(name="batch_template")
+        TemplateContent.objects.create(
+            template=template,
+            subject="Hi {{user_name}}",
+            body="{% for k, v in pairs %}{{ k }}={{ v }};{% endfor %}",
+        )
+
+    def test_render_batch_preserves_order_and_reports_errors(self):
+        response = self.client.post(
+            "/api/v1/templates/render-batch/",
+            {
+                "template_name": "batch_template",
+                "contexts": [
+                    {"user_name": "Ada", "pairs": [["a", 1]]},
+                    {"user_name": "Bob", "pairs": [["a", 1, 2]]},
+                    {"user_name": "Cy", "pairs": []},
+                ],
+                "requested_by": "tests",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["successful"], 2)
+        self.assertEqual(response.data["failed"], 1)
+        results = response.data["results"]
+        self.assertEqual([r["index"] for r in results], [0, 1, 2])
+        self.assertEqual(results[0]["body"], "a=1;")
+        self.assertEqual(results[1]["status"], "error")
+        self.assertEqual(results[2]["subject"], "Hi Cy")
+        self.assertEqual(TemplateRenderLog.objects.count(), 3)
+
+    def test_render_batch_streams_ndjson(self):
+        response = self.client.post(
+            "/api/v1/templates/render-batch/",
+            {
+                "template_name": "batch_template",
+                "contexts": [{"user_name": "Ada"}, {"pairs": [["a", 1, 2]]}],
+                "stream": True,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual([line["status"] for line in lines], ["success", "error"])
+        self.assertEqual(lines[0]["subject"], "Hi Ada")
+        self.assertEqual(TemplateRenderLog.objects.count(), 2)
+
+    def test_render_batch_unknown_template(self):
+        response = self.client.post(
+            "/api/v1/templates/render-batch/",
+            {"template_name": "missing", "contexts": [{}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class Jinja2EngineTest(TestCase):
+    def setUp(self):
+        compiled_templates.clear()
+
+    def _create(self, subject, body, is_html=True):
+        template = NotificationTemplate.objects.create(name="jinja_template")
+        TemplateContent.objects.create(
+            template=template,
+            subject=subject,
+            body=body,
+            is_html=is_html,
+            engine="jinja2",
+        )
+        return template
+
+    def test_render_with_loops_and_autoescape(self):
+        template = self._create(
+            "Order {{ order_number }}",
+            "{% for item in items %}<li>{{ item.name }} x{{ item.qty }}</li>{% endfor %}",
+        )
+
+        result = TemplateRenderer(template).render(
+            {"order_number": 7, "items": [{"name": "<b>Pen</b>", "qty": 2}]}
+        )
+
+        self.assertEqual(result["subject"], "Order 7")
+        self.assertEqual(result["body"], "<li>&lt;b&gt;Pen&lt;/b&gt; x2</li>")
+
+    def test_plain_text_is_not_escaped(self):
+        template = self._create("", "Hi {{ name }}", is_html=False)
+        result = TemplateRenderer(template).render({"name": "A & B"})
+        self.assertEqual(result["body"], "Hi A & B")
+
+    def test_extracts_jinja2_variables(self):
+        template = self._create(
+            "Hi {{ user_name }}",
+            "{% for item in items %}{{ item.name }}{% endfor %}{{ total|round }}",
+        )
+        self.assertEqual(
+            template.content.extracted_variables, ["items", "total", "user_name"]
+        )
+        self.assertEqual(template.content.compiled_segments["body"], None)
+
+    def test_sandbox_blocks_unsafe_access(self):
+        template = self._create("", "{{ name.__class__.__mro__ }}")
+        with self.assertRaises(ValueError):
+            TemplateRenderer(template).render({"name": "x"})
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+class RenderedResultCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        rendered_results.clear()
+        self.template = NotificationTemplate.objects.create(
+            name="maintenance_notice", template_type="push", cache_rendered_output=True
+        )
+        TemplateContent.objects.create(
+            template=self.template, body="Down at {{start_time}}", is_html=False
+        )
+
+    def test_identical_contexts_are_served_from_cache_and_logged(self):
+        first = TemplateService.render_template(
+            "maintenance_notice", {"start_time": "10:00"}, template_type="push"
+        )
+        second = TemplateService.render_template(
+            "maintenance_notice", {"start_time": "10:00"}, template_type="push"
+        )
+
+        self.assertNotIn("cached", first)
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["body"], first["body"])
+        self.assertEqual(rendered_results.stats()["hits"], 1)
+        self.assertEqual(TemplateRenderLog.objects.count(), 2)
+
+    def test_request_can_opt_out(self):
+        for _ in range(2):
+            result = TemplateService.render_template(
+                "maintenance_notice",
+                {"start_time": "10:00"},
+                template_type="push",
+                cache_result=False,
+            )
+        self.assertNotIn("cached", result)
+        self.assertEqual(rendered_results.stats()["entries"], 0)
+
+
+class TwoTierTemplateCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        self.template = NotificationTemplate.objects.create(name="hot_template")
+        TemplateContent.objects.create(template=self.template, body="v1")
+
+    def test_l1_serves_repeat_lookups_without_django_cache(self):
+        TemplateService.get_template("hot_template")
+        cache.clear()
+
+        with self.assertNumQueries(0):
+            template = TemplateService.get_template("hot_template")
+        self.assertEqual(template.id, self.template.id)
+        self.assertEqual(template_l1.stats()["hits"], 1)
+
+    def test_new_version_invalidates_l1(self):
+        TemplateService.get_template("hot_template")
+        TemplateVersionService.create_new_version(
+            "hot_template", "en", "email", "", "v2"
+        )
+
+        template = TemplateService.get_template("hot_template")
+        self.assertEqual(template.version, 2)
+
+
+class TemplateSnapshotTest(TestCase):
+    def setUp(self):
+        self.template = NotificationTemplate.objects.create(name="snapshot_template")
+        TemplateContent.objects.create(
+            template=self.template,
+            subject="Hi {{user_name}}",
+            body="<p>{{user_name}}</p>" * 200,
+        )
+        self.template.refresh_from_db()
+
+    def test_round_trip_with_compression(self):
+        snapshot = TemplateSnapshot.from_model(self.template)
+
+        compressed = snapshot.to_bytes(compress_min_bytes=1024)
+        raw = snapshot.to_bytes(compress_min_bytes=0)
+
+        self.assertEqual(compressed[1:2], TemplateSnapshot.COMPRESSED)
+        self.assertEqual(raw[1:2], TemplateSnapshot.RAW)
+        self.assertLess(len(compressed), len(raw))
+        self.assertEqual(TemplateSnapshot.from_bytes(compressed), snapshot)
+        self.assertEqual(TemplateSnapshot.from_bytes(raw), snapshot)
+        self.assertEqual(snapshot.variables, ("user_name",))
+
+    def test_snapshot_is_immutable(self):
+        snapshot = TemplateSnapshot.from_model(self.template)
+        with self.assertRaises(AttributeError):
+            snapshot.body = "changed"
+
+    def test_unknown_format_is_treated_as_cache_miss(self):
+        self.assertIsNone(TemplateSnapshot.loads(b"\x09jnope"))
+        self.assertIsNone(TemplateSnapshot.loads(self.template))
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+class TemplateLookupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        self.client = APIClient()
+
+    def test_missing_template_is_cached_negatively(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(TemplateService.get_template("not_there"))
+            template_l1.clear()
+            self.assertIsNone(TemplateService.get_template("not_there"))
+
+    def test_creating_template_clears_negative_entry(self):
+        self.assertIsNone(TemplateService.get_template("late_template"))
+
+        response = self.client.post(
+            "/api/v1/templates/",
+            {"name": "late_template", "subject": "Hi", "body": "Body"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertIsNotNone(TemplateService.get_template("late_template"))
+
+    def test_failed_render_does_not_query_template_twice(self):
+        with self.assertNumQueries(1):
+            with self.assertRaises(ValueError):
+                TemplateService.render_template("not_there", {})
+
+    def test_single_flight_waits_for_concurrent_loader(self):
+        flight = SingleFlight(wait_timeout=1, poll_interval=0.01)
+        cache.add("key:lock", "other-process", 10)
+        lookups = iter([None, None, "loaded elsewhere"])
+
+        result = flight.run("key", lambda: next(lookups), lambda: self.fail("loaded twice"))
+
+        self.assertEqual(result, "loaded elsewhere")
+
+    def test_single_flight_does_not_hold_stripe_during_load(self):
+        flight = SingleFlight(stripes=1)
+        started, release = threading.Event(), threading.Event()
+        results = []
+
+        def slow_loader():
+            started.set()
+            release.wait(5)
+            return "slow"
+
+        def load(key, loader):
+            results.append(flight.run(key, lambda: None, loader))
+
+        slow = threading.Thread(target=load, args=("slow", slow_loader))
+        slow.start()
+        started.wait(5)
+        # Same stripe, different key: must not wait for the slow load
+        fast = threading.Thread(target=load, args=("fast", lambda: "fast"))
+        fast.start()
+        fast.join(1)
+        finished_first = not fast.is_alive()
+        release.set()
+        slow.join(5)
+        fast.join(5)
+
+        self.assertTrue(finished_first)
+        self.assertEqual(results, ["fast", "slow"])
+
+    def test_single_flight_shares_one_load_between_threads(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "loaded"
+
+        def load():
+            results.append(flight.run("key", lambda: None, loader))
+
+        threads = [threading.Thread(target=load) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, ["loaded"] * 4)
+
+
+class TemplateCacheKeysTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        template_usage.clear()
+        template = NotificationTemplate.objects.create(name="gen_template")
+        TemplateContent.objects.create(template=template, body="v1")
+
+    def test_invalidation_orphans_writes_from_older_generation(self):
+        base_key = TemplateCacheKeys.base("gen_template")
+        stale_key = TemplateCacheKeys.versioned(
+            base_key, TemplateCacheKeys.generation(base_key)
+        )
+
+        TemplateVersionService.create_new_version("gen_template", "en", "email", "", "v2")
+        # A reader that resolved the old generation finishes its write late
+        cache.set(stale_key, b"stale")
+
+        template_l1.clear()
+        self.assertEqual(TemplateService.get_template("gen_template").body, "v2")
+
+    def test_warmup_uses_generation_keys(self):
+        from .tasks import warm_template_cache
+
+        result = warm_template_cache()
+
+        base_key = TemplateCacheKeys.base("gen_template")
+        expected_key = TemplateCacheKeys.versioned(
+            base_key, TemplateCacheKeys.generation(base_key)
+        )
+        self.assertEqual(result["cache_keys"], [expected_key])
+        with self.assertNumQueries(0):
+            self.assertEqual(TemplateService.get_template("gen_template").body, "v1")
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+class UsageDrivenWarmupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        template_usage.clear()
+        for name in ("busy_template", "idle_template"):
+            template = NotificationTemplate.objects.create(name=name)
+            TemplateContent.objects.create(template=template, body=f"{name} body")
+
+    def test_warmup_picks_most_rendered_templates(self):
+        from .tasks import warm_template_cache
+
+        for _ in range(3):
+            TemplateService.render_template("busy_template", {})
+
+        with self.settings(TEMPLATE_WARMUP_TOP_K=1):
+            result = warm_template_cache()
+
+        self.assertEqual(result["selection"], "usage")
+        self.assertEqual(len(result["cache_keys"]), 1)
+        self.assertTrue(result["cache_keys"][0].startswith("template:busy_template:"))
+        self.assertIsNone(result["previous_window"])
+
+    def test_warmup_reports_hits_of_previous_window(self):
+        from .tasks import warm_template_cache
+
+        # No usage yet: both templates are warmed via the fallback
+        self.assertEqual(warm_template_cache()["selection"], "fallback")
+
+        TemplateService.render_template("busy_template", {})
+        result = warm_template_cache()
+
+        self.assertEqual(result["previous_window"]["warmed"], 2)
+        self.assertEqual(result["previous_window"]["hit"], 1)
+        self.assertEqual(result["previous_window"]["missed"], 1)
+
+    def test_warmup_skips_templates_invalidated_while_loading(self):
+        from .tasks import warm_template_cache
+
+        busy_key = TemplateCacheKeys.base("busy_template")
+        real_generations = TemplateCacheKeys.generations
+        calls = []
+
+        def generations(base_keys):
+            found = real_generations(base_keys)
+            if not calls:
+                # A version swap lands between the generation read and the query
+                TemplateCacheKeys.bump(busy_key)
+            calls.append(list(base_keys))
+            return found
+
+        with mock.patch.object(TemplateCacheKeys, "generations", side_effect=generations):
+            result = warm_template_cache()
+
+        self.assertEqual(result["skipped_stale"], 1)
+        self.assertEqual(result["templates_cached"], 1)
+        self.assertFalse(any(key.startswith(busy_key + ":") for key in result["cache_keys"]))
+        current = TemplateCacheKeys.versioned(busy_key, TemplateCacheKeys.generation(busy_key))
+        self.assertIsNone(cache.get(current))
+
+
+class RenderLogSinkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        self.template = NotificationTemplate.objects.create(name="logged_template")
+        TemplateContent.objects.create(template=self.template, body="Hi {{user_name}}")
+        # Flush explicitly instead of from the background thread
+        patcher = mock.patch.object(RenderLogSink, "_ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(render_log_sink.flush)
+        self.addCleanup(render_stats.clear)
+
+    def _log(self):
+        return TemplateRenderLog(
+            template_id=self.template.id, context_used={}, rendered_body="x"
+        )
+
+    def test_render_does_not_wait_for_log_insert(self):
+        TemplateService.get_template("logged_template")
+
+        with self.assertNumQueries(0):
+            TemplateService.render_template("logged_template", {"user_name": "Ada"})
+
+        self.assertEqual(render_log_sink.flush(), 1)
+        self.assertEqual(TemplateRenderLog.objects.get().rendered_body, "Hi Ada")
+
+    @override_settings(TEMPLATE_RENDER_LOG_BUFFER_SIZE=2, TEMPLATE_RENDER_LOG_OVERFLOW="drop")
+    def test_full_buffer_drops_new_records(self):
+        sink = RenderLogSink()
+
+        sink.submit_many([self._log() for _ in range(3)])
+
+        self.assertEqual(sink.stats()["dropped"], 1)
+        self.assertEqual(sink.flush(), 2)
+        self.assertEqual(TemplateRenderLog.objects.count(), 2)
+
+    @override_settings(TEMPLATE_RENDER_LOG_BUFFER_SIZE=2, TEMPLATE_RENDER_LOG_OVERFLOW="sync")
+    def test_full_buffer_writes_overflow_synchronously(self):
+        sink = RenderLogSink()
+
+        sink.submit_many([self._log() for _ in range(3)])
+
+        self.assertEqual(TemplateRenderLog.objects.count(), 1)
+        sink.flush()
+        self.assertEqual(TemplateRenderLog.objects.count(), 3)
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+class RenderLogSamplingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        render_stats.clear()
+        self.template = NotificationTemplate.objects.create(
+            name="sampled_template", log_sample_rate=0.0, log_body_mode="hash"
+        )
+        TemplateContent.objects.create(
+            template=self.template, body="Hi {{user_name}}{% if fail %}{% url 'x' %}{% endif %}"
+        )
+
+    def test_sampled_out_renders_are_still_counted(self):
+        for _ in range(3):
+            TemplateService.render_template("sampled_template", {"user_name": "Ada"})
+        render_stats.flush()
+
+        self.assertEqual(TemplateRenderLog.objects.count(), 0)
+        today = TemplateService.get_render_volume(self.template.id, days=1)[0]
+        self.assertEqual((today["rendered"], today["failed"], today["logged"]), (3, 0, 0))
+
+    def test_failures_are_always_logged(self):
+        with self.assertRaises(ValueError):
+            TemplateService.render_template("sampled_template", {"fail": True})
+        render_stats.flush()
+
+        log = TemplateRenderLog.objects.get()
+        self.assertFalse(log.success)
+        today = TemplateService.get_render_volume(self.template.id, days=1)[0]
+        self.assertEqual((today["rendered"], today["failed"], today["logged"]), (1, 1, 1))
+
+    @override_settings(TEMPLATE_RENDER_LOG_SAMPLE_RATE=0.0)
+    def test_hash_mode_stores_digest_and_length_only(self):
+        NotificationTemplate.objects.filter(pk=self.template.pk).update(log_sample_rate=1.0)
+        TemplateService.clear_template_cache("sampled_template")
+
+        TemplateService.render_template("sampled_template", {"user_name": "Ada"})
+
+        log = TemplateRenderLog.objects.get()
+        self.assertEqual(log.rendered_body, "")
+        self.assertEqual(log.body_length, len("Hi Ada"))
+        self.assertEqual(log.body_hash, hashlib.sha256(b"Hi Ada").hexdigest())
+
+
+class RenderLogRetentionTest(TestCase):
+    def setUp(self):
+        self.template = NotificationTemplate.objects.create(name="retained_template")
+        TemplateRenderLog.objects.bulk_create(
+            TemplateRenderLog(template=self.template, context_used={}, rendered_body="x")
+            for _ in range(5)
+        )
+
+    @override_settings(TEMPLATE_RENDER_LOG_DELETE_BATCH_SIZE=2)
+    def test_cleanup_deletes_expired_rows_in_chunks(self):
+        from .tasks import cleanup_old_render_logs
+
+        old_ids = list(TemplateRenderLog.objects.values_list("id", flat=True)[:3])
+        TemplateRenderLog.objects.filter(id__in=old_ids).update(
+            created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+
+        result = cleanup_old_render_logs(days=30)
+
+        self.assertEqual(result["logs_deleted"], 3)
+        self.assertEqual(result["partitions_dropped"], [])
+        self.assertEqual(TemplateRenderLog.objects.count(), 2)
+
+    def test_partitions_are_not_used_outside_postgres(self):
+        self.assertFalse(RenderLogPartitions.is_partitioned())
+        self.assertEqual(RenderLogPartitions.ensure_partitions(), [])
+
+    def test_ensure_partitions_moves_default_rows_and_skips_failures(self):
+        from django.db import DatabaseError
+
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        yesterday = today - datetime.timedelta(days=1)
+        gap = RenderLogPartitions.partition_name(yesterday)
+        broken = RenderLogPartitions.partition_name(today + datetime.timedelta(days=1))
+        statements = []
+
+        class Cursor:
+            """Records SQL for a partitioned table whose default holds yesterday's rows."""
+
+            rowcount = 3
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def execute(self, sql, params=None):
+                if broken in sql:
+                    raise DatabaseError("disk full")
+                statements.append(sql)
+                self.row = (1,) if params and params[0].startswith(yesterday.isoformat()) else None
+
+            def fetchone(self):
+                return self.row
+
+        using = mock.Mock(alias="default", vendor="postgresql", cursor=Cursor)
+        default = [RenderLogPartitions.DEFAULT_PARTITION]
+        with mock.patch.object(
+            RenderLogPartitions, "is_partitioned", return_value=True
+        ), mock.patch.object(RenderLogPartitions, "partition_names", return_value=default):
+            created = RenderLogPartitions.ensure_partitions(ahead=2, since=yesterday, using=using)
+
+        later = [
+            RenderLogPartitions.partition_name(today + datetime.timedelta(days=days))
+            for days in (0, 2)
+        ]
+        self.assertEqual(created, [gap] + later)
+        # Yesterday's range: detach default, create, move the rows, re-attach
+        self.assertIn("SELECT 1", statements[0])
+        self.assertIn("DETACH PARTITION", statements[1])
+        self.assertIn(f'CREATE TABLE IF NOT EXISTS "{gap}"', statements[2])
+        self.assertIn(f'INSERT INTO "{gap}"', statements[3])
+        self.assertIn("ATTACH PARTITION", statements[4])
+        # Later ranges have no default rows and are created directly
+        self.assertFalse(any("DETACH" in sql for sql in statements[5:]))
+
+    def test_partition_periods(self):
+        day = datetime.date(2026, 10, 15)  # a Thursday
+
+        self.assertEqual(RenderLogPartitions.period_start(day, "day"), day)
+        self.assertEqual(
+            RenderLogPartitions.period_start(day, "week"), datetime.date(2026, 10, 12)
+        )
+        self.assertEqual(
+            RenderLogPartitions.period_end(datetime.date(2026, 10, 12), "week"),
+            datetime.date(2026, 10, 19),
+        )
+        self.assertEqual(
+            RenderLogPartitions.partition_name(day),
+            "notification_templates_templaterenderlog_p20261015",
+        )
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+class RenderStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        render_stats.clear()
+        self.client = APIClient()
+        self.template = NotificationTemplate.objects.create(name="stats_template")
+        TemplateContent.objects.create(
+            template=self.template, body="Hi {{user_name}}{% if fail %}{% url 'x' %}{% endif %}"
+        )
+
+    def test_renders_are_rolled_up_per_minute_and_hour(self):
+        TemplateService.render_template("stats_template", {"user_name": "Ada"})
+        TemplateService.render_template("stats_template", {"user_name": "Bob"})
+        with self.assertRaises(ValueError):
+            TemplateService.render_template("stats_template", {"fail": True})
+        render_stats.flush()
+
+        for period in ("minute", "hour"):
+            stat = TemplateRenderStat.objects.get(template=self.template, period=period)
+            self.assertEqual((stat.render_count, stat.failure_count), (3, 1))
+            self.assertEqual(stat.bytes_rendered, len("Hi Ada") + len("Hi Bob"))
+            self.assertGreaterEqual(stat.latency_sum_ms, stat.latency_max_ms)
+
+    def test_buffered_records_are_written_with_one_upsert(self):
+        now = datetime.datetime(2026, 10, 15, 12, 30, tzinfo=datetime.timezone.utc)
+        with override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=True), mock.patch.object(
+            RenderLogSink, "_ensure_started"
+        ), mock.patch("notification_templates.logsink.time.time", return_value=now.timestamp()):
+            for _ in range(5):
+                render_stats.record(self.template.id, latency_ms=2.0, size=10)
+
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(render_stats.flush(), 2)
+            render_stats.record(self.template.id, latency_ms=7.0, size=10)
+            render_stats.flush()
+
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+
+        stat = TemplateRenderStat.objects.get(template=self.template, period="hour")
+        self.assertEqual(stat.render_count, 6)
+        self.assertEqual(stat.latency_max_ms, 7.0)
+        self.assertEqual(stat.bytes_rendered, 60)
+
+    def test_renders_do_not_write_stats_until_a_threshold(self):
+        with override_settings(TEMPLATE_RENDER_STATS_FLUSH_EVERY=3):
+            render_stats.flush()
+            with self.assertNumQueries(0):
+                render_stats.record(self.template.id)
+                render_stats.record(self.template.id)
+            render_stats.record(self.template.id)
+
+        stat = TemplateRenderStat.objects.get(template=self.template, period="hour")
+        self.assertEqual(stat.render_count, 3)
+
+    def test_stats_endpoint_reads_rollup(self):
+        TemplateService.render_template("stats_template", {"user_name": "Ada"})
+        render_stats.flush()
+
+        response = self.client.get(f"/api/v1/templates/{self.template.id}/stats/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["totals"]["render_count"], 1)
+        self.assertEqual(len(response.data["buckets"]), 1)
+        bad = self.client.get(f"/api/v1/templates/{self.template.id}/stats/?period=day")
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RenderLogListingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        template = NotificationTemplate.objects.create(name="listed_template")
+        TemplateRenderLog.objects.bulk_create(
+            TemplateRenderLog(
+                template=template, context_used={"i": i}, rendered_body="x" * 100
+            )
+            for i in range(5)
+        )
+        # Identical timestamps exercise the id tie-breaker
+        TemplateRenderLog.objects.update(
+            created_at=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen = []
+        url = "/api/v1/render-logs/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_heavy_fields_are_deferred_unless_expanded(self):
+        row = self.client.get("/api/v1/render-logs/").data["results"][0]
+        self.assertNotIn("rendered_body", row)
+        self.assertNotIn("context_used", row)
+        self.assertEqual(row["template_name"], "listed_template")
+
+        row = self.client.get("/api/v1/render-logs/?expand=body").data["results"][0]
+        self.assertEqual(row["rendered_body"], "x" * 100)
+        self.assertNotIn("context_used", row)
+
+        row = self.client.get("/api/v1/render-logs/?fields=success,context_used").data[
+            "results"
+        ][0]
+        self.assertEqual(set(row), {"id", "success", "context_used"})
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/render-logs/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RenderLogExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        template = NotificationTemplate.objects.create(name="exported_template")
+        TemplateRenderLog.objects.bulk_create(
+            [
+                TemplateRenderLog(
+                    template=template, context_used={"i": 1}, rendered_body="ok"
+                ),
+                TemplateRenderLog(
+                    template=template,
+                    context_used={"i": 2},
+                    rendered_body="",
+                    success=False,
+                    error_message="boom",
+                ),
+            ]
+        )
+
+    def test_export_streams_gzipped_jsonl(self):
+        response = self.client.get("/api/v1/render-logs/export/?gzip=true")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn(".jsonl.gz", response["Content-Disposition"])
+        body = gzip.decompress(b"".join(response.streaming_content))
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(sorted(row["context_used"]["i"] for row in rows), [1, 2])
+        self.assertEqual(rows[0]["template__name"], "exported_template")
+
+    def test_export_filters_and_csv(self):
+        response = self.client.get("/api/v1/render-logs/export/?output=csv&success=false")
+
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(rows[0], RenderLogExport.COLUMNS)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][RenderLogExport.COLUMNS.index("error_message")], "boom")
+
+    def test_export_rejects_bad_parameters(self):
+        response = self.client.get("/api/v1/render-logs/export/?since=yesterday")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "logs.jsonl")
+            call_command(
+                "export_render_logs", output=path, success=True, stderr=io.StringIO()
+            )
+            with open(path) as exported:
+                lines = exported.read().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(json.loads(lines[0])["success"])
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False, TEMPLATE_BULK_RENDER_CHUNK_SIZE=2)
+class BulkRenderFanOutTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        for name in ("bulk_a", "bulk_b"):
+            template = NotificationTemplate.objects.create(name=name)
+            TemplateContent.objects.create(template=template, body=name + " {{n}}")
+        self.client = APIClient()
+
+    def test_chunk_results_are_stored_on_the_job(self):
+        from .services import CeleryService
+        from .tasks import bulk_render_templates
+
+        requests = [
+            {"template_name": name, "context": {"n": i}}
+            for i, name in enumerate(["bulk_a", "bulk_b", "bulk_a", "missing", "bulk_a"])
+        ]
+
+        # Eager apply_async forbids joining the replacement chord; apply() allows it
+        with mock.patch.object(
+            bulk_render_templates,
+            "apply_async",
+            side_effect=lambda args, kwargs, task_id: bulk_render_templates.apply(
+                args, kwargs, task_id=task_id
+            ),
+        ), mock.patch.object(
+            TemplateService, "get_template", wraps=TemplateService.get_template
+        ) as get_template:
+            job = CeleryService.trigger_bulk_render(requests)
+
+        # One lookup per chunk: bulk_a has 2 chunks, bulk_b and missing 1 each
+        self.assertEqual(get_template.call_count, 4)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkRenderJob.COMPLETED)
+        self.assertEqual((job.processed, job.succeeded, job.failed), (5, 4, 1))
+        self.assertEqual(TemplateRenderLog.objects.count(), 4)
+
+        page = self.client.get(f"/api/v1/bulk-jobs/{job.id}/results/?page_size=3").data
+        self.assertEqual([r["index"] for r in page["results"]], [0, 1, 2])
+        self.assertEqual(page["results"][1]["rendered_body"], "bulk_b 1")
+        rest = self.client.get(page["next"]).data
+        self.assertEqual([r["index"] for r in rest["results"]], [3, 4])
+        self.assertFalse(rest["results"][0]["success"])
+        self.assertIsNone(rest["next"])
+
+    def test_task_result_is_a_summary(self):
+        from .tasks import bulk_render_templates
+
+        result = bulk_render_templates.apply(
+            args=[[{"template_name": "bulk_a", "context": {"n": 1}}]]
+        ).get()
+
+        self.assertEqual(result["successful"], 1)
+        self.assertNotIn("results", result)
+        self.assertEqual(BulkRenderJob.objects.get(id=result["job_id"]).processed, 1)
+
+    def test_enqueue_failure_marks_job_failed(self):
+        from .services import CeleryService
+        from .tasks import bulk_render_templates
+
+        requests = [{"template_name": "bulk_a", "context": {"n": 1}}]
+        with mock.patch.object(
+            bulk_render_templates, "apply_async", side_effect=ConnectionError("broker down")
+        ), self.assertRaises(ConnectionError):
+            CeleryService.trigger_bulk_render(requests)
+
+        job = BulkRenderJob.objects.get()
+        self.assertEqual((job.status, job.error_message), (BulkRenderJob.FAILED, "broker down"))
+
+    def test_failed_chunk_marks_job_failed(self):
+        from django.db import DatabaseError
+
+        from .tasks import render_bulk_chunk
+
+        job = BulkRenderJob.objects.create(status=BulkRenderJob.RUNNING, total=1)
+        with mock.patch(
+            "notification_templates.tasks._record_bulk_results",
+            side_effect=DatabaseError("connection lost"),
+        ):
+            result = render_bulk_chunk.apply(
+                args=[str(job.id), "bulk_a", "en", "email", "svc", [(0, {"n": 1})]]
+            )
+
+        self.assertTrue(result.failed())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error_message), (BulkRenderJob.FAILED, "connection lost"))
+
+
+@override_settings(TEMPLATE_TASK_STATUS_POLL_INTERVAL=0.01)
+class TaskStatusAPITest(TestCase):
+    def setUp(self):
+        from .tasks import bulk_render_templates
+
+        self.backend = bulk_render_templates.backend
+        self.client = APIClient()
+
+    def test_bulk_task_reports_job_progress(self):
+        job = BulkRenderJob.objects.create(
+            task_id="bulk-task", status=BulkRenderJob.RUNNING, total=4, processed=1, succeeded=1
+        )
+        self.backend.store_result("bulk-task", {"processed": 1}, "PROGRESS")
+
+        data = self.client.get("/api/v1/tasks/bulk-task/status/").data
+
+        self.assertEqual(data["state"], "PROGRESS")
+        self.assertFalse(data["ready"])
+        self.assertEqual(data["progress"]["job_id"], str(job.id))
+        self.assertEqual(data["progress"]["processed"], 1)
+        self.assertEqual(data["progress"]["percent"], 25.0)
+
+    def test_finished_task_returns_its_result(self):
+        self.backend.store_result("done-task", {"status": "success"}, "SUCCESS")
+
+        data = self.client.get("/api/v1/tasks/done-task/status/?wait=5").data
+
+        self.assertTrue(data["ready"])
+        self.assertEqual(data["result"], {"status": "success"})
+        self.assertIsNone(data["progress"])
+
+    def test_progress_without_counters_has_no_percent(self):
+        self.backend.store_result("ingest-task", {"stage": "reading", "total": 10}, "PROGRESS")
+        self.backend.store_result("empty-task", {"processed": 0, "total": 0}, "PROGRESS")
+
+        ingest = self.client.get("/api/v1/tasks/ingest-task/status/")
+        empty = self.client.get("/api/v1/tasks/empty-task/status/")
+
+        self.assertEqual(ingest.status_code, status.HTTP_200_OK)
+        self.assertEqual(ingest.data["progress"]["percent"], 0.0)
+        self.assertNotIn("percent", empty.data["progress"])
+
+    def test_wait_returns_when_the_state_changes(self):
+        from .services import CeleryService
+
+        self.backend.store_result("slow-task", {"processed": 1}, "PROGRESS")
+        statuses = iter(["PROGRESS", "PROGRESS", "SUCCESS"])
+        real_status = CeleryService.get_task_status
+
+        def changing_status(task_id):
+            self.backend.store_result(task_id, {"processed": 2}, next(statuses))
+            return real_status(task_id)
+
+        with mock.patch.object(
+            CeleryService, "get_task_status", side_effect=changing_status
+        ) as get_status:
+            data = self.client.get("/api/v1/tasks/slow-task/status/?wait=5").data
+
+        self.assertEqual(get_status.call_count, 3)
+        self.assertEqual(data["state"], "SUCCESS")
+
+    @override_settings(TEMPLATE_TASK_STATUS_MAX_WAIT=0.05)
+    def test_wait_is_capped(self):
+        data = self.client.get("/api/v1/tasks/unknown-task/status/?wait=60").data
+
+        self.assertEqual(data["state"], "PENDING")
+        self.assertFalse(data["ready"])
+
+    def test_invalid_wait(self):
+        for wait in ("soon", "nan", "inf", "-inf"):
+            response = self.client.get(f"/api/v1/tasks/any/status/?wait={wait}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_service_ignores_non_finite_wait(self):
+        from .services import CeleryService
+
+        data = CeleryService.wait_for_task_status("unknown-task", float("nan"))
+        self.assertEqual(data["state"], "PENDING")
+
+
+class TaskQueueRoutingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_tasks_are_routed_by_kind_of_work(self):
+        from TemplateService.celery import app
+
+        def queue_of(task):
+            return app.amqp.router.route({}, f"notification_templates.tasks.{task}")[
+                "queue"
+            ].name
+
+        self.assertEqual(queue_of("render_template_async"), "interactive")
+        self.assertEqual(queue_of("render_bulk_chunk"), "bulk")
+        self.assertEqual(queue_of("cleanup_old_render_logs"), "maintenance")
+        self.assertEqual(
+            app.tasks["notification_templates.tasks.render_bulk_chunk"].rate_limit,
+            "20/s",
+        )
+
+    def test_queue_can_be_chosen_per_render(self):
+        from .services import CeleryService
+        from .tasks import render_template_async
+
+        with mock.patch.object(render_template_async, "apply_async") as apply_async:
+            CeleryService.trigger_async_render("welcome", {}, queue="bulk")
+            CeleryService.trigger_async_render("welcome", {})
+
+        self.assertEqual(apply_async.call_args_list[0].kwargs["queue"], "bulk")
+        self.assertNotIn("queue", apply_async.call_args_list[1].kwargs)
+
+    def test_unknown_queue_is_rejected(self):
+        response = self.client.post(
+            "/api/v1/templates/render-async/",
+            {"template_name": "welcome", "queue": "urgent"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unknown queue", response.data["error"])
+
+
+class BulkRenderFileTest(TestCase):
+    def test_jsonl_rows(self):
+        lines = [
+            '{"context": {"n": 1}, "template_name": "other", "language": "fr"}',
+            '{"n": 2}',
+            "",
+            "{not json",
+            '["n"]',
+        ]
+        rows = list(
+            BulkRenderFile(io.BytesIO("\n".join(lines).encode()), "jsonl", "bulk_a")
+        )
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            (rows[0]["template_name"], rows[0]["language"], rows[0]["context"]),
+            ("other", "fr", {"n": 1}),
+        )
+        self.assertEqual((rows[1]["template_name"], rows[1]["context"]), ("bulk_a", {"n": 2}))
+        self.assertIn("Line 4: invalid JSON", rows[2]["error"])
+        self.assertIn("Line 5: expected a JSON object", rows[3]["error"])
+
+    def test_csv_columns(self):
+        data = "template_name,n,name\nbulk_b,1,Ann\n,2,Bob\n"
+        rows = list(BulkRenderFile(io.BytesIO(data.encode("utf-8-sig")), "csv"))
+
+        self.assertEqual(rows[0]["template_name"], "bulk_b")
+        self.assertEqual(rows[0]["context"], {"n": "1", "name": "Ann"})
+        self.assertEqual(rows[1], {"error": "Line 3: no template_name given"})
+
+    def test_detect_format(self):
+        self.assertEqual(BulkRenderFile.detect_format("rows.NDJSON"), "jsonl")
+        self.assertEqual(BulkRenderFile.detect_format("rows.csv"), "csv")
+        self.assertIsNone(BulkRenderFile.detect_format("rows.xlsx"))
+
+
+@override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False, TEMPLATE_BULK_RENDER_CHUNK_SIZE=2)
+class BulkRenderFileIngestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        for name in ("bulk_a", "bulk_b"):
+            template = NotificationTemplate.objects.create(name=name)
+            TemplateContent.objects.create(template=template, body=name + " {{n}}")
+        self.client = APIClient()
+        self.spool = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool.cleanup)
+
+        from .tasks import ingest_bulk_render_file, render_bulk_chunk
+
+        # Run the tasks in process whatever CELERY_TASK_ALWAYS_EAGER says
+        self.send_chunk = self.run_in_process(render_bulk_chunk)
+        self.run_in_process(ingest_bulk_render_file)
+
+    def run_in_process(self, task):
+        patcher = mock.patch.object(
+            task,
+            "apply_async",
+            side_effect=lambda args=None, kwargs=None, task_id=None, **options: task.apply(
+                args, kwargs, task_id=task_id
+            ),
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_uploaded_csv_is_rendered_in_chunks(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        rows = ["template_name,n", "bulk_a,0", "bulk_b,1", "bulk_a,2", "bulk_a,3", "missing,4"]
+        upload = SimpleUploadedFile("rows.csv", "\n".join(rows).encode())
+
+        with override_settings(TEMPLATE_BULK_UPLOAD_DIR=self.spool.name):
+            response = self.client.post(
+                "/api/v1/templates/bulk-render-file/", {"file": upload}, format="multipart"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        # bulk_a fills a chunk of 2 mid-file; the rest are sent at the end
+        self.assertEqual(self.send_chunk.call_count, 4)
+        job = BulkRenderJob.objects.get(id=response.data["job_id"])
+        self.assertEqual(job.status, BulkRenderJob.COMPLETED)
+        self.assertEqual((job.total, job.succeeded, job.failed), (5, 4, 1))
+        self.assertEqual(
+            list(job.results.order_by("index").values_list("rendered_body", flat=True)[:4]),
+            ["bulk_a 0", "bulk_b 1", "bulk_a 2", "bulk_a 3"],
+        )
+        self.assertEqual(os.listdir(self.spool.name), [])
+
+    def test_unsupported_upload_is_rejected(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        upload = SimpleUploadedFile("rows.xlsx", b"...")
+        response = self.client.post(
+            "/api/v1/templates/bulk-render-file/", {"file": upload}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(BulkRenderJob.objects.exists())
+
+    def test_command_reads_a_jsonl_file(self):
+        path = os.path.join(self.spool.name, "rows.jsonl")
+        with open(path, "w") as f:
+            f.write('{"n": 1}\n{"n": 2}\n{"context": {"n": 3}, "template_name": "bulk_b"}\n')
+
+        out = io.StringIO()
+        call_command("bulk_render_file", path, "--template", "bulk_a", stdout=out)
+
+        job = BulkRenderJob.objects.get()
+        self.assertIn(str(job.id), out.getvalue())
+        self.assertEqual((job.status, job.total, job.succeeded), (BulkRenderJob.COMPLETED, 3, 3))
+        self.assertEqual(job.results.get(index=2).rendered_body, "bulk_b 3")
+
+    def test_command_marks_job_failed_when_dispatch_raises(self):
+        path = os.path.join(self.spool.name, "rows.jsonl")
+        with open(path, "w") as f:
+            f.write('{"n": 1}\n')
+        self.send_chunk.side_effect = ConnectionError("broker down")
+
+        with self.assertRaisesMessage(CommandError, "broker down"):
+            call_command("bulk_render_file", path, "--template", "bulk_a", stdout=io.StringIO())
+
+        job = BulkRenderJob.objects.get()
+        self.assertEqual((job.status, job.error_message), (BulkRenderJob.FAILED, "broker down"))
+
+    def test_upload_marks_job_failed_when_enqueue_raises(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from .services import CeleryService
+        from .tasks import ingest_bulk_render_file
+
+        upload = SimpleUploadedFile("rows.jsonl", b'{"n": 1}\n')
+        with override_settings(TEMPLATE_BULK_UPLOAD_DIR=self.spool.name), mock.patch.object(
+            ingest_bulk_render_file, "apply_async", side_effect=ConnectionError("broker down")
+        ), self.assertRaises(ConnectionError):
+            CeleryService.trigger_bulk_render_file(upload, template_name="bulk_a")
+
+        job = BulkRenderJob.objects.get()
+        self.assertEqual((job.status, job.error_message), (BulkRenderJob.FAILED, "broker down"))
+        self.assertEqual(os.listdir(self.spool.name), [])
+
+
+class RenderAsyncIdempotencyTest(TestCase):
+    def setUp(self):
+        from .tasks import render_template_async
+
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch.object(render_template_async, "apply_async")
+        self.apply_async = patcher.start()
+        self.apply_async.return_value.id = "queued-task"
+        self.addCleanup(patcher.stop)
+
+    def post(self, headers=None, **data):
+        body = {"template_name": "welcome", "context": {"n": 1}, "requested_by": "svc"}
+        body.update(data)
+        return self.client.post(
+            "/api/v1/templates/render-async/", body, format="json", headers=headers
+        )
+
+    def test_idempotency_key_returns_the_first_task(self):
+        first = self.post(idempotency_key="order-1")
+        retry = self.post(headers={"Idempotency-Key": "order-1"}, context={"n": 2})
+        other = self.post(idempotency_key="order-2")
+
+        self.assertEqual(first.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data["status"], "duplicate")
+        self.assertEqual(retry.data["task_id"], first.data["task_id"])
+        self.assertNotEqual(other.data["task_id"], first.data["task_id"])
+        self.assertEqual(self.apply_async.call_count, 2)
+        self.assertEqual(
+            self.apply_async.call_args_list[0].kwargs["task_id"], first.data["task_id"]
+        )
+
+    def test_identical_requests_are_collapsed(self):
+        first = self.post(context={"b": 1, "a": 2})
+        retry = self.post(context={"a": 2, "b": 1})
+        other_requester = self.post(context={"a": 2, "b": 1}, requested_by="other")
+
+        self.assertEqual(retry.data["task_id"], first.data["task_id"])
+        self.assertEqual(other_requester.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.apply_async.call_count, 2)
+
+    @override_settings(TEMPLATE_RENDER_DEDUP_TTL=0)
+    def test_automatic_dedup_can_be_disabled(self):
+        self.post()
+        self.post()
+        self.assertEqual(self.apply_async.call_count, 2)
+
+    def test_failed_enqueue_releases_the_key(self):
+        self.apply_async.side_effect = [ConnectionError("broker down"), mock.DEFAULT]
+
+        failed = self.post(idempotency_key="order-3")
+        retry = self.post(idempotency_key="order-3")
+
+        self.assertEqual(failed.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(retry.status_code, status.HTTP_202_ACCEPTED)
+
+
+class WorkerTemplatePreloadTest(TestCase):
+    def setUp(self):
+        compiled_templates.clear()
+        for name in ("preload_a", "preload_b"):
+            template = NotificationTemplate.objects.create(name=name)
+            TemplateContent.objects.create(template=template, body=name + " {{n}}")
+        inactive = NotificationTemplate.objects.create(name="preload_old", is_active=False)
+        TemplateContent.objects.create(template=inactive, body="old")
+
+    def test_active_templates_are_compiled_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = TemplateService.preload_templates()
+
+        self.assertEqual((stats["templates_compiled"], stats["templates_failed"]), (2, 0))
+        self.assertEqual(compiled_templates.stats()["entries"], 2)
+
+        misses = compiled_templates.stats()["misses"]
+        template = NotificationTemplate.objects.get(name="preload_a")
+        TemplateRenderer(template).render({"n": 1})
+        self.assertEqual(compiled_templates.stats()["misses"], misses)
+
+    def test_worker_process_hook_logs_preload(self):
+        from TemplateService.celery import preload_templates
+
+        with self.assertLogs("TemplateService.celery", "INFO") as logs:
+            preload_templates()
+        self.assertIn("Preloaded 2 templates", logs.output[0])
+
+        compiled_templates.clear()
+        with override_settings(TEMPLATE_WORKER_PRELOAD=False):
+            preload_templates()
+        self.assertEqual(compiled_templates.stats()["entries"], 0)
+
+
+class RenderBatchCommandTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        template_l1.clear()
+        render_stats.clear()
+        template = NotificationTemplate.objects.create(name="offline")
+        TemplateContent.objects.create(template=template, subject="Hi {{n}}", body="Body {{n}}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input = os.path.join(self.directory.name, "contexts.jsonl")
+        self.output = os.path.join(self.directory.name, "out.jsonl")
+        with open(self.input, "w") as f:
+            f.write('{"n": 0}\n{"n": 1}\n\n[1]\n{"n": 3\n{"n": 4}\n')
+
+    def read_output(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_renders_in_input_order_across_processes(self):
+        err = io.StringIO()
+        call_command(
+            "render_batch",
+            template_name="offline",
+            input=self.input,
+            output=self.output,
+            workers=2,
+            chunk_size=2,
+            stderr=err,
+        )
+
+        rows = self.read_output()
+        self.assertEqual([row["index"] for row in rows], [0, 1, 2, 3, 4])
+        # The blank third line is skipped but later rows keep their line numbers
+        self.assertEqual([row["line"] for row in rows], [1, 2, 4, 5, 6])
+        self.assertEqual(rows[1]["body"], "Body 1")
+        self.assertEqual(rows[4]["subject"], "Hi 4")
+        self.assertEqual([row["status"] for row in rows[2:4]], ["error", "error"])
+        self.assertIn("Rendered 5 contexts (2 failed)", err.getvalue())
+        self.assertIn("renders/s", err.getvalue())
+        self.assertEqual(TemplateRenderLog.objects.count(), 0)
+
+    @override_settings(TEMPLATE_RENDER_LOG_WRITE_BEHIND=False)
+    def test_render_logs_are_optional(self):
+        call_command(
+            "render_batch",
+            template_name="offline",
+            input=self.input,
+            output=self.output,
+            workers=0,
+            chunk_size=2,
+            log=True,
+            stderr=io.StringIO(),
+        )
+
+        self.assertEqual(len(self.read_output()), 5)
+        self.assertEqual(TemplateRenderLog.objects.count(), 3)
+
+    def test_unknown_template(self):
+        with self.assertRaises(CommandError):
+            call_command("render_batch", template_name="nope", input=self.input)
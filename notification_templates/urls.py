@@ -1,12 +1,21 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import TemplateRenderLogViewSet, TemplateViewSet
+from .views import (
+    BulkRenderJobViewSet,
+    TaskStatusView,
+    TemplateRenderLogViewSet,
+    TemplateViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"templates", TemplateViewSet, basename="template")
 router.register(r"render-logs", TemplateRenderLogViewSet, basename="render-log")
+router.register(r"bulk-jobs", BulkRenderJobViewSet, basename="bulk-job")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path(
+        "tasks/<str:task_id>/status/", TaskStatusView.as_view(), name="task-status"
+    ),
 ]
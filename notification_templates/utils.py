@@ -1,50 +1,263 @@
 import logging
-from typing import Any, Dict
+import re
+import threading
+from typing import Any, Dict, List, Optional
 
+from django.conf import settings
 from django.template import Context, Engine, Template
+from django.template.base import Lexer, TokenType, Variable, render_value_in_context
 from django.template.exceptions import TemplateSyntaxError
+from jinja2 import BytecodeCache, FileSystemBytecodeCache, meta
+from jinja2 import TemplateSyntaxError as Jinja2TemplateSyntaxError
+from jinja2.sandbox import SandboxedEnvironment
+
+from .cache import LRUCache, compiled_templates
+from .snapshots import TemplateSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Plain variable names the fast path can substitute without Django's parser.
+# Leading underscores and the True/False/None literals keep Django semantics
+# (syntax error / literal value), so they are left to the regular engine.
+SIMPLE_VARIABLE_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]*$")
+RESERVED_LITERALS = {"True", "False", "None"}
+
+_MISSING = object()
+
+
+def compile_segments(source: Optional[str]) -> Optional[List[str]]:
+    """
+    Compile a variable-only template into alternating static text and slot names.
+
+    Returns None when the source uses tags, comments, filters or attribute
+    lookups, in which case it must be rendered by the Django engine.
+    """
+    if source is None:
+        return None
+
+    segments = [""]
+    for token in Lexer(source).tokenize():
+        if token.token_type == TokenType.TEXT:
+            segments[-1] += token.contents
+        elif token.token_type == TokenType.VAR:
+            name = token.contents
+            if not SIMPLE_VARIABLE_RE.match(name) or name in RESERVED_LITERALS:
+                return None
+            segments.extend([name, ""])
+        else:
+            return None
+    return segments
+
+
+class SegmentTemplate:
+    """
+    Renders precompiled segments by plain substitution.
+
+    Output matches the Django engine for ``{{ var }}`` placeholders: values
+    are localized and autoescaped the same way, and missing variables render
+    as the engine's ``string_if_invalid``.
+    """
+
+    __slots__ = ("segments",)
+
+    def __init__(self, segments: List[str]):
+        self.segments = segments
+
+    def render(self, context: Dict[str, Any]) -> str:
+        render_context = Context(context)
+        parts = list(self.segments)
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            value = context.get(name, _MISSING)
+            if value is _MISSING or callable(value):
+                # Let Django resolve the rare cases it treats specially.
+                value = self._resolve(name, render_context)
+            parts[index] = render_value_in_context(value, render_context)
+        return "".join(parts)
+
+    @staticmethod
+    def _resolve(name, context):
+        try:
+            return Variable(name).resolve(context)
+        except Exception:
+            string_if_invalid = Engine.get_default().string_if_invalid
+            if "%s" in string_if_invalid:
+                return string_if_invalid % name
+            return string_if_invalid
+
+
+class DjangoTemplate:
+    """Adapts a compiled Django template to render from a plain context dict."""
+
+    __slots__ = ("template",)
+
+    def __init__(self, template: Template):
+        self.template = template
+
+    def render(self, context: Dict[str, Any]) -> str:
+        return self.template.render(Context(context))
+
+
+class Jinja2BytecodeCache(BytecodeCache):
+    """
+    In-memory Jinja2 bytecode cache, optionally backed by a directory.
+
+    Compiled bytecode survives eviction from the compiled-template cache and,
+    with TEMPLATE_JINJA2_BYTECODE_CACHE_DIR set, process restarts.
+    """
+
+    def __init__(self, max_entries=1000, directory=None):
+        self.memory = LRUCache("jinja2_bytecode", max_entries=max_entries)
+        self.filesystem = FileSystemBytecodeCache(directory) if directory else None
+
+    def load_bytecode(self, bucket):
+        data = self.memory.get(bucket.key)
+        if data is not None:
+            bucket.bytecode_from_string(data)
+            return
+
+        if self.filesystem is not None:
+            self.filesystem.load_bytecode(bucket)
+            if bucket.code is not None:
+                data = bucket.bytecode_to_string()
+                self.memory.set(bucket.key, data, len(data))
+
+    def dump_bytecode(self, bucket):
+        data = bucket.bytecode_to_string()
+        self.memory.set(bucket.key, data, len(data))
+        if self.filesystem is not None:
+            self.filesystem.dump_bytecode(bucket)
+
+    def clear(self):
+        self.memory.clear()
+        if self.filesystem is not None:
+            self.filesystem.clear()
+
+
+_jinja2_environments = {}
+_jinja2_lock = threading.Lock()
+
+
+def get_jinja2_environment(autoescape: bool) -> SandboxedEnvironment:
+    """Return the shared sandboxed Jinja2 environment for the given escaping mode."""
+    environment = _jinja2_environments.get(autoescape)
+    if environment is not None:
+        return environment
+
+    with _jinja2_lock:
+        if not _jinja2_environments:
+            bytecode_cache = Jinja2BytecodeCache(
+                max_entries=getattr(
+                    settings, "TEMPLATE_JINJA2_BYTECODE_CACHE_MAX_ENTRIES", 1000
+                ),
+                directory=getattr(settings, "TEMPLATE_JINJA2_BYTECODE_CACHE_DIR", None),
+            )
+            for escape in (True, False):
+                _jinja2_environments[escape] = SandboxedEnvironment(
+                    autoescape=escape,
+                    bytecode_cache=bytecode_cache,
+                    # Compiled templates are cached by TemplateRenderer
+                    cache_size=0,
+                )
+    return _jinja2_environments[autoescape]
+
+
+def compile_jinja2_template(source: str, name: str, autoescape: bool):
+    """Compile Jinja2 source, going through the environment's bytecode cache."""
+    environment = get_jinja2_environment(autoescape)
+    # Escaping is decided at compile time, so it is part of the cache name
+    name = f"{name}:{'html' if autoescape else 'text'}"
+
+    bytecode_cache = environment.bytecode_cache
+    bucket = bytecode_cache.get_bucket(environment, name, None, source)
+    code = bucket.code
+    if code is None:
+        code = environment.compile(source, name)
+        bucket.code = code
+        bytecode_cache.set_bucket(bucket)
+
+    return environment.template_class.from_code(
+        environment, code, environment.make_globals(None)
+    )
+
+
+def extract_jinja2_variables(source: str) -> List[str]:
+    """Return variables a Jinja2 template expects from its render context."""
+    environment = get_jinja2_environment(autoescape=False)
+    return sorted(meta.find_undeclared_variables(environment.parse(source)))
+
 
 class TemplateRenderer:
     """Handles template rendering with variable substitution and HTML support."""
 
     def __init__(self, template):
-        self.template = template
-        self.content = template.content
+        # Accepts a TemplateSnapshot or a NotificationTemplate with content
+        self.template = TemplateSnapshot.coerce(template)
+
+    def compile(self):
+        """Compile subject and body, reusing the process-local compiled cache."""
+        template = self.template
+        key = template.cache_key()
+        compiled = compiled_templates.get(key)
+        if compiled is not None:
+            return compiled
+
+        subject_template = None
+        if template.engine == "jinja2":
+            name = f"{template.id}:{template.version}"
+            if template.subject:
+                subject_template = compile_jinja2_template(
+                    template.subject, f"{name}:subject", template.is_html
+                )
+            body_template = compile_jinja2_template(
+                template.body, f"{name}:body", template.is_html
+            )
+        else:
+            # Variable-only templates skip the Django parser entirely
+            segments = template.compiled_segments or {}
+
+            if template.subject:
+                if segments.get("subject") is not None:
+                    subject_template = SegmentTemplate(segments["subject"])
+                else:
+                    subject_template = DjangoTemplate(Template(template.subject))
+
+            if segments.get("body") is not None:
+                body_template = SegmentTemplate(segments["body"])
+            else:
+                # Use Django template engine for both HTML and plain text bodies
+                engine = Engine.get_default()
+                body_template = DjangoTemplate(engine.from_string(template.body))
+
+        compiled = (subject_template, body_template)
+        size = len(template.body.encode("utf-8"))
+        if template.subject:
+            size += len(template.subject.encode("utf-8"))
+        compiled_templates.set(key, compiled, size)
+        return compiled
 
     def render(self, context: Dict[str, Any]) -> Dict[str, str]:
         """Render template with given context."""
         try:
             rendered_data = {}
+            subject_template, body_template = self.compile()
 
             # Render subject if exists
-            if self.content.subject:
-                subject_template = Template(self.content.subject)
-                rendered_data["subject"] = subject_template.render(Context(context))
+            if subject_template is not None:
+                rendered_data["subject"] = subject_template.render(context)
 
-            # Render body with HTML support
-            if self.content.is_html:
-                # Use Django template engine for HTML templates
-                engine = Engine.get_default()
-                body_template = engine.from_string(self.content.body)
-                rendered_data["body"] = body_template.render(Context(context))
-            else:
-                # Plain text rendering
-                body_template = Template(self.content.body)
-                rendered_data["body"] = body_template.render(Context(context))
+            rendered_data["body"] = body_template.render(context)
 
             # Add template metadata
             rendered_data["template_name"] = self.template.name
             rendered_data["template_type"] = self.template.template_type
             rendered_data["language"] = self.template.language
             rendered_data["version"] = self.template.version
-            rendered_data["is_html"] = self.content.is_html
+            rendered_data["is_html"] = self.template.is_html
 
             return rendered_data
 
-        except TemplateSyntaxError as e:
+        except (TemplateSyntaxError, Jinja2TemplateSyntaxError) as e:
             logger.error(
                 f"Template syntax error in {self.template.name} ({self.template.language}, {self.template.template_type}): {str(e)}"
             )
@@ -57,7 +270,7 @@ class TemplateRenderer:
 
     def validate_context(self, context: Dict[str, Any]) -> bool:
         """Validate if context contains all required variables."""
-        available_vars = set(self.content.extracted_variables)
+        available_vars = set(self.template.variables)
         provided_vars = set(context.keys())
 
         missing_vars = available_vars - provided_vars
@@ -93,7 +306,7 @@ class AdvancedTemplateRenderer:
             "to_email": context.get("to_email"),
             "subject": result["subject"],
             "body": result["body"],
-            "content_type": "text/html" if template.content.is_html else "text/plain",
+            "content_type": "text/html" if template.is_html else "text/plain",
         }
 
         return result
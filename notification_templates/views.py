@@ -1,16 +1,33 @@
+import json
 import logging
+import math
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-
-from .models import NotificationTemplate, TemplateRenderLog
+from rest_framework.views import APIView
+
+from .exports import RenderLogExport
+from .models import (
+    BulkRenderJob,
+    NotificationTemplate,
+    TemplateRenderLog,
+    TemplateRenderStat,
+)
+from .pagination import BulkRenderResultPagination, KeysetPagination
 from .serializers import (
+    BulkRenderJobSerializer,
+    BulkRenderResultSerializer,
     NotificationTemplateSerializer,
+    TemplateBatchRenderResponseSerializer,
+    TemplateBatchRenderSerializer,
     TemplateCreateSerializer,
     TemplateRenderLogSerializer,
     TemplateRenderResponseSerializer,
@@ -74,6 +91,7 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 language=data["language"],
                 template_type=data["template_type"],
                 requested_by=data.get("requested_by"),
+                cache_result=data.get("cache_result"),
             )
 
             response_serializer = TemplateRenderResponseSerializer(rendered)
@@ -90,6 +108,67 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @swagger_auto_schema(
+        method="post",
+        request_body=TemplateBatchRenderSerializer,
+        responses={200: TemplateBatchRenderResponseSerializer},
+    )
+    @action(detail=False, methods=["post"], url_path="render-batch")
+    def render_batch(self, request):
+        """Render one template against many contexts in a single request."""
+        serializer = TemplateBatchRenderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.validated_data
+        if data["stream"]:
+            return self._stream_render_batch(data)
+
+        try:
+            rendered = TemplateService.render_batch(
+                name=data["template_name"],
+                contexts=data["contexts"],
+                language=data["language"],
+                template_type=data["template_type"],
+                requested_by=data.get("requested_by"),
+            )
+            # Results are already plain dicts; skip per-item serializer overhead
+            return Response(rendered)
+
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error rendering batch: {str(e)}")
+            return Response(
+                {"error": "Internal server error"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+    def _stream_render_batch(self, data):
+        """Stream render-batch results as NDJSON, one line per context."""
+        template = TemplateService.get_template(
+            data["template_name"], data["language"], data["template_type"]
+        )
+        if not template:
+            return Response(
+                {
+                    "error": f"Template not found: {data['template_name']} ({data['language']})"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def lines():
+            items = TemplateService.iter_render_batch(
+                template, data["contexts"], data.get("requested_by")
+            )
+            for item in items:
+                yield json.dumps(item, cls=DjangoJSONEncoder) + "\n"
+
+        response = StreamingHttpResponse(
+            lines(), content_type="application/x-ndjson"
+        )
+        response["X-Template-Version"] = str(template.version)
+        return response
+
     @swagger_auto_schema(
         method="get",
         responses={
@@ -133,6 +212,88 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "days", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=7
+            )
+        ],
+        responses={200: openapi.Response("Per-day render counts")},
+    )
+    @action(detail=True, methods=["get"])
+    def volume(self, request, pk=None):
+        """Get exact per-day render counts, including renders not kept in the log."""
+        template = self.get_object()
+        try:
+            days = min(max(int(request.query_params.get("days", 7)), 1), 90)
+        except ValueError:
+            return Response(
+                {"error": "days must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {
+                "template_id": str(template.id),
+                "version": template.version,
+                "days": TemplateService.get_render_volume(template.id, days),
+            }
+        )
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "period",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=["minute", "hour"],
+                default="hour",
+            ),
+            openapi.Parameter(
+                "hours", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=24
+            ),
+            openapi.Parameter(
+                "all_versions", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, default=False
+            ),
+        ],
+        responses={200: openapi.Response("Render metrics per bucket")},
+    )
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """Get render counts, failures, latency and bytes per minute or hour bucket."""
+        template = self.get_object()
+        period = request.query_params.get("period", "hour")
+        if period not in dict(TemplateRenderStat.PERIODS):
+            return Response(
+                {"error": "period must be 'minute' or 'hour'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            hours = min(max(int(request.query_params.get("hours", 24)), 1), 24 * 90)
+        except ValueError:
+            return Response(
+                {"error": "hours must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        all_versions = request.query_params.get("all_versions", "").lower() in (
+            "1",
+            "true",
+        )
+        return Response(
+            TemplateService.get_render_stats(template, period, hours, all_versions)
+        )
+
+    def perform_update(self, serializer):
+        template = serializer.save()
+        # Logging and result-cache settings live in the cached snapshot
+        TemplateService.clear_template_cache(
+            template.name,
+            template.language,
+            template.template_type,
+            template_ids=[template.id],
+        )
+
     @method_decorator(cache_page(60 * 30))  # Cache for 30 minutes
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
@@ -153,9 +314,21 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 ),
                 "context": openapi.Schema(type=openapi.TYPE_OBJECT),
                 "requested_by": openapi.Schema(type=openapi.TYPE_STRING),
+                "queue": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="Task queue; defaults to interactive",
+                ),
+                "idempotency_key": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description=(
+                        "Requests repeating a key get the first request's task "
+                        "(also read from the Idempotency-Key header)"
+                    ),
+                ),
             },
         ),
         responses={
+            200: openapi.Response("Duplicate of an accepted request"),
             202: openapi.Response(
                 "Task accepted",
                 schema=openapi.Schema(
@@ -179,6 +352,10 @@ class TemplateViewSet(viewsets.ModelViewSet):
         language = request.data.get("language", "en")
         template_type = request.data.get("template_type", "email")
         requested_by = request.data.get("requested_by")
+        queue = request.data.get("queue")
+        idempotency_key = request.data.get("idempotency_key") or request.headers.get(
+            "Idempotency-Key"
+        )
 
         if not template_name:
             return Response(
@@ -187,10 +364,27 @@ class TemplateViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            task_id = CeleryService.trigger_async_render(
-                template_name, context, language, template_type, requested_by
+            task_id, created = CeleryService.trigger_async_render_idempotent(
+                template_name,
+                context,
+                language,
+                template_type,
+                requested_by,
+                queue,
+                idempotency_key,
             )
 
+            if not created:
+                return Response(
+                    {
+                        "task_id": task_id,
+                        "status": "duplicate",
+                        "message": f"Template rendering already started for {template_name}",
+                        "monitor_url": f"/api/v1/tasks/{task_id}/status/",
+                    },
+                    status=status.HTTP_200_OK,
+                )
+
             return Response(
                 {
                     "task_id": task_id,
@@ -201,6 +395,8 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_202_ACCEPTED,
             )
 
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error triggering async render: {str(e)}")
             return Response(
@@ -216,7 +412,11 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 "render_requests": openapi.Schema(
                     type=openapi.TYPE_ARRAY,
                     items=openapi.Schema(type=openapi.TYPE_OBJECT),
-                )
+                ),
+                "queue": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="Task queue; defaults to bulk",
+                ),
             },
         ),
         responses={202: openapi.Response("Bulk task accepted")},
@@ -235,18 +435,27 @@ class TemplateViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            task_id = CeleryService.trigger_bulk_render(render_requests)
+            job = CeleryService.trigger_bulk_render(
+                render_requests,
+                request.data.get("requested_by"),
+                request.data.get("queue"),
+            )
 
             return Response(
                 {
-                    "task_id": task_id,
+                    "task_id": job.task_id,
+                    "job_id": str(job.id),
                     "status": "accepted",
                     "message": f"Bulk rendering started for {len(render_requests)} templates",
-                    "monitor_url": f"/api/v1/tasks/{task_id}/status/",
+                    "monitor_url": f"/api/v1/tasks/{job.task_id}/status/",
+                    "job_url": f"/api/v1/bulk-jobs/{job.id}/",
+                    "results_url": f"/api/v1/bulk-jobs/{job.id}/results/",
                 },
                 status=status.HTTP_202_ACCEPTED,
             )
 
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error triggering bulk render: {str(e)}")
             return Response(
@@ -254,6 +463,82 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @swagger_auto_schema(
+        method="post",
+        manual_parameters=[
+            openapi.Parameter(
+                "file",
+                openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=True,
+                description="JSONL or CSV file, one render per row",
+            ),
+            openapi.Parameter("format", openapi.IN_FORM, type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "template_name",
+                openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                description="Template for rows without a template_name column",
+            ),
+            openapi.Parameter("language", openapi.IN_FORM, type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "template_type", openapi.IN_FORM, type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter("requested_by", openapi.IN_FORM, type=openapi.TYPE_STRING),
+            openapi.Parameter("queue", openapi.IN_FORM, type=openapi.TYPE_STRING),
+        ],
+        responses={202: openapi.Response("Bulk file accepted")},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-render-file",
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_render_file(self, request):
+        """Bulk render the rows of an uploaded JSONL or CSV file asynchronously."""
+        from .services import CeleryService
+
+        uploaded_file = request.FILES.get("file")
+        if not uploaded_file:
+            return Response(
+                {"error": "file is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            job = CeleryService.trigger_bulk_render_file(
+                uploaded_file,
+                input_format=request.data.get("format"),
+                template_name=request.data.get("template_name"),
+                language=request.data.get("language", "en"),
+                template_type=request.data.get("template_type", "email"),
+                requested_by=request.data.get("requested_by"),
+                queue=request.data.get("queue"),
+            )
+
+            return Response(
+                {
+                    "task_id": job.task_id,
+                    "job_id": str(job.id),
+                    "status": "accepted",
+                    "message": f"Bulk rendering started for {uploaded_file.name}",
+                    "monitor_url": f"/api/v1/tasks/{job.task_id}/status/",
+                    "job_url": f"/api/v1/bulk-jobs/{job.id}/",
+                    "results_url": f"/api/v1/bulk-jobs/{job.id}/results/",
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error triggering bulk file render: {str(e)}")
+            return Response(
+                {"error": "Failed to start bulk rendering"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
     @swagger_auto_schema(
         method="post", responses={202: openapi.Response("Cache warmup started")}
     )
@@ -281,16 +566,226 @@ class TemplateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @swagger_auto_schema(
+        method="get",
+        responses={200: openapi.Response("Template cache statistics")},
+    )
+    @action(detail=False, methods=["get"], url_path="cache-stats")
+    def cache_stats(self, request):
+        """Get hit/miss statistics for this process's template caches."""
+        return Response(TemplateService.get_cache_stats())
+
 
 class TemplateRenderLogViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for viewing template render logs."""
+    """
+    ViewSet for viewing template render logs.
+
+    The list is keyset-paginated newest first and leaves out the heavy
+    rendered_body and context_used columns unless asked for with
+    ``?expand=body,context``; ``?fields=`` selects an explicit subset.
+    """
 
     queryset = TemplateRenderLog.objects.select_related("template")
     serializer_class = TemplateRenderLogSerializer
+    pagination_class = KeysetPagination
+
+    HEAVY_FIELDS = {"body": "rendered_body", "context": "context_used"}
 
     def get_queryset(self):
         queryset = super().get_queryset()
         template_id = self.request.query_params.get("template_id")
         if template_id:
             queryset = queryset.filter(template_id=template_id)
+        if self.action == "list":
+            fields = self.get_list_fields()
+            if "template_name" not in fields:
+                queryset = queryset.select_related(None)
+            columns = [
+                "template__name" if name == "template_name" else name for name in fields
+            ]
+            queryset = queryset.only("created_at", "template_id", *columns)
         return queryset
+
+    def get_list_fields(self):
+        """Fields serialized by the list action."""
+        available = TemplateRenderLogSerializer.Meta.fields
+        requested = self.request.query_params.get("fields")
+        if requested:
+            fields = {"id"} | {
+                name.strip()
+                for name in requested.split(",")
+                if name.strip() in available
+            }
+        else:
+            expand = {
+                name.strip()
+                for name in self.request.query_params.get("expand", "").split(",")
+            }
+            fields = set(available) - {
+                field for key, field in self.HEAVY_FIELDS.items() if key not in expand
+            }
+        return [name for name in available if name in fields]
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list":
+            kwargs["fields"] = self.get_list_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("template_id", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Comma-separated fields to return",
+            ),
+            openapi.Parameter(
+                "expand",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="Heavy fields to include: body, context",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "output",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=sorted(RenderLogExport.FORMATS),
+                default="jsonl",
+            ),
+            openapi.Parameter("gzip", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter("template_id", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("template_name", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter(
+                "since",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="ISO date/datetime, inclusive (UTC if naive)",
+            ),
+            openapi.Parameter(
+                "until",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                description="ISO date/datetime, exclusive (UTC if naive)",
+            ),
+            openapi.Parameter("success", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: openapi.Response("Streamed JSONL or CSV file")},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream matching render logs as a JSONL or CSV download, optionally gzipped."""
+        params = request.query_params
+        success = params.get("success")
+        try:
+            export = RenderLogExport(
+                output_format=params.get("output", "jsonl"),
+                compress=params.get("gzip", "").lower() in ("1", "true"),
+                template_id=params.get("template_id"),
+                template_name=params.get("template_name"),
+                since=params.get("since"),
+                until=params.get("until"),
+                success=None if success is None else success.lower() in ("1", "true"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(export, content_type=export.content_type)
+        response["Content-Disposition"] = f'attachment; filename="{export.filename}"'
+        return response
+
+
+class BulkRenderJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for following bulk render jobs and reading their results."""
+
+    queryset = BulkRenderJob.objects.all()
+    serializer_class = BulkRenderJobSerializer
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "success", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN
+            ),
+        ],
+        responses={200: BulkRenderResultSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"])
+    def results(self, request, pk=None):
+        """Page through a job's results in submission order."""
+        job = self.get_object()
+        results = job.results.all()
+        success = request.query_params.get("success")
+        if success is not None:
+            results = results.filter(success=success.lower() in ("1", "true"))
+
+        paginator = BulkRenderResultPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = BulkRenderResultSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TaskStatusView(APIView):
+    """Celery task status, with progress for bulk render jobs."""
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "wait",
+                openapi.IN_QUERY,
+                description=(
+                    "Long-poll for up to this many seconds until the status "
+                    "changes or the task finishes; capped by "
+                    "TEMPLATE_TASK_STATUS_MAX_WAIT (5 by default)"
+                ),
+                type=openapi.TYPE_NUMBER,
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                "Task status",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "task_id": openapi.Schema(type=openapi.TYPE_STRING),
+                        "state": openapi.Schema(type=openapi.TYPE_STRING),
+                        "ready": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                        "progress": openapi.Schema(
+                            type=openapi.TYPE_OBJECT, x_nullable=True
+                        ),
+                        "result": openapi.Schema(type=openapi.TYPE_OBJECT),
+                        "error": openapi.Schema(type=openapi.TYPE_STRING),
+                    },
+                ),
+            )
+        },
+    )
+    def get(self, request, task_id):
+        from .services import CeleryService
+
+        try:
+            wait = float(request.query_params.get("wait", 0))
+        except ValueError:
+            wait = None
+        if wait is None or not math.isfinite(wait):
+            return Response(
+                {"error": "wait must be a number of seconds"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            return Response(CeleryService.wait_for_task_status(task_id, wait))
+        except Exception as e:
+            logger.error(f"Error reading status of task {task_id}: {str(e)}")
+            return Response(
+                {"error": "Failed to read task status"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )